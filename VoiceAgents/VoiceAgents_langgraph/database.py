@@ -42,6 +42,9 @@ class DatabaseService:
         self.prescriptions = self._load_csv("prescriptions.csv")
         self.caregivers = self._load_csv("caregivers.csv")
         self.policy = self._load_json("policy_config.json")
+        # id -> first matching row, built on first lookup
+        self._patients_by_id = None
+        self._caregivers_by_id = None
 
     # ------------------ Loaders ------------------
     def _load_csv(self, filename):
@@ -59,10 +62,21 @@ class DatabaseService:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
 
+    @staticmethod
+    def _index_first(df, column) -> Dict[str, Dict]:
+        """Map str(df[column]) to the first matching row as a plain dict."""
+        index = {}
+        if not df.empty:
+            for row in df.to_dict("records"):
+                index.setdefault(str(row[column]), row)
+        return index
+
     # ------------------ Core Queries ------------------
     def get_patient(self, patient_id: str):
-        df = self.patients[self.patients["patient_id"].astype(str) == str(patient_id)]
-        return df.iloc[0].to_dict() if not df.empty else None
+        if self._patients_by_id is None:
+            self._patients_by_id = self._index_first(self.patients, "patient_id")
+        row = self._patients_by_id.get(str(patient_id))
+        return dict(row) if row is not None else None
 
     def get_appointments(self, patient_id: str):
         df = self.appointments[self.appointments["patient_id"].astype(str) == str(patient_id)]
@@ -73,8 +87,10 @@ class DatabaseService:
         return df.to_dict(orient="records")
 
     def get_caregiver(self, caregiver_id: str):
-        df = self.caregivers[self.caregivers["caregiver_id"].astype(str) == str(caregiver_id)]
-        return df.iloc[0].to_dict() if not df.empty else None
+        if self._caregivers_by_id is None:
+            self._caregivers_by_id = self._index_first(self.caregivers, "caregiver_id")
+        row = self._caregivers_by_id.get(str(caregiver_id))
+        return dict(row) if row is not None else None
 
     def get_policy_rules(self):
         return self.policy
@@ -153,12 +169,14 @@ class DatabaseService:
             return []
         out = []
         cutoff = datetime.utcnow() - timedelta(days=days)
+        pid = str(patient_id)
+        symptom = symptom.lower()
         with open(SYMPTOMS_LOG_CSV, "r", encoding="utf-8") as f:
             r = csv.DictReader(f)
             for row in r:
-                if str(row["patient_id"]) != str(patient_id):
+                if row["patient_id"] != pid:
                     continue
-                if row["symptom"].lower() != symptom.lower():
+                if row["symptom"].lower() != symptom:
                     continue
                 try:
                     ts = datetime.fromisoformat(row["ts_iso"].rstrip("Z"))
@@ -190,3 +208,28 @@ class DatabaseService:
         )
         return grouped.to_dict("records")
 
+
+    def get_symptom_trends_all(self, days: int = 7) -> Dict[str, List[Dict]]:
+        """
+        Same trend summary as get_symptom_trends, for every patient at once
+        (one read of the symptom log instead of one per patient).
+        """
+        if not os.path.exists(SYMPTOMS_LOG_CSV):
+            return {}
+        df = pd.read_csv(SYMPTOMS_LOG_CSV)
+        if "ts_iso" not in df.columns or "symptom" not in df.columns:
+            return {}
+        df["date"] = pd.to_datetime(df["ts_iso"].str.rstrip("Z"))
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        recent = df[df["date"] >= cutoff]
+        if recent.empty:
+            return {}
+        grouped = (
+            recent.groupby([recent["patient_id"].astype(str), "symptom"])
+            .agg(freq=("symptom", "count"), avg_severity=("severity", "mean"))
+        )
+        trends = {}
+        for pid, g in grouped.groupby(level=0):
+            g = g.droplevel(0).reset_index().sort_values("freq", ascending=False)
+            trends[pid] = g.to_dict("records")
+        return trends
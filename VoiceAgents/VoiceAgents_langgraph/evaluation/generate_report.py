@@ -2,274 +2,259 @@
 Generate HTML evaluation report with visualizations
 """
 
+import functools
+import hashlib
+import io
 import json
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
 from pathlib import Path
 
+# Optional fast JSON parser; falls back to the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 HERE = Path(__file__).resolve().parent
 RESULTS_DIR = HERE / "results"
 
-
-def load_results():
-    """Load all evaluation results"""
-    summary_file = RESULTS_DIR / "summary_metrics.json"
-    perf_file = RESULTS_DIR / "performance_summary.json"
-    cm_file = RESULTS_DIR / "confusion_matrices.json"
-
-    with open(summary_file, 'r') as f:
-        summary = json.load(f)
-
-    with open(perf_file, 'r') as f:
-        performance = json.load(f)
-
-    # Load confusion matrices if they exist
-    confusion_matrices = {}
-    if cm_file.exists():
-        with open(cm_file, 'r') as f:
-            confusion_matrices = json.load(f)
-
-    return summary, performance, confusion_matrices
-
-
-def generate_confusion_matrix_html(matrix_name, matrix_data):
-    """Generate HTML for a confusion matrix"""
-    if not matrix_data:
-        return "<p>No data available</p>"
-
-    # Get all unique labels (predicted and actual)
-    all_labels = sorted(set(list(matrix_data.keys()) + [pred for preds in matrix_data.values() for pred in preds.keys()]))
-
-    if not all_labels:
-        return "<p>No data available</p>"
-
-    html = f"""
+# Confusion-matrix titles and their layout in the report grid
+_MATRIX_TITLES = {
+    "orchestration_routing": "Orchestration: Agent Routing",
+    "medication_intent": "Medication: Intent Classification",
+    "medication_risk": "Medication: Risk Level",
+    "followup_risk": "Follow-Up: Risk Triage"
+}
+_CM_ROW1 = ("orchestration_routing", "medication_intent")  # Orchestration and Medication Intent
+_CM_ROW2 = ("medication_risk", "followup_risk")  # Medication Risk and Follow-Up Risk
+
+# Confusion-matrix cell classes
+_CM_DIAG_CLASS = "cm-correct"
+_CM_OFF_CLASS = "cm-error"
+_CM_ZERO_CLASS = "cm-zero"
+
+# Confusion-matrix header, row-opening and cell markup, formatted per label/cell
+_CM_HEADER = '                    <th class="cm-header">{}</th>\n'
+_CM_ROW_OPEN = ('                <tr>\n'
+                '                    <td class="cm-label"><strong>{}</strong></td>\n')
+_CM_CELL = '                    <td class="cm-cell {}">{}</td>\n'
+
+# Opening of the compact table used when a matrix is diagonal-only
+_CM_DIAG_OPEN = """
     <div class="confusion-matrix-container">
-        <h4>{matrix_name}</h4>
+        <h4>{}</h4>
         <table class="confusion-matrix">
             <thead>
                 <tr>
-                    <th class="cm-corner">Actual \\ Predicted</th>
-"""
-    for label in all_labels:
-        html += f'                    <th class="cm-header">{label}</th>\n'
-    html += """                </tr>
+                    <th class="cm-corner">Label</th>
+                    <th class="cm-header">Correct</th>
+                </tr>
             </thead>
             <tbody>
 """
-
-    # Generate rows
-    for actual in all_labels:
-        html += f'                <tr>\n'
-        html += f'                    <td class="cm-label"><strong>{actual}</strong></td>\n'
-        for predicted in all_labels:
-            count = matrix_data.get(actual, {}).get(predicted, 0)
-            # Color code: green for correct (diagonal), red for errors
-            cell_class = "cm-correct" if actual == predicted else "cm-error"
-            if count == 0:
-                cell_class = "cm-zero"
-            html += f'                    <td class="cm-cell {cell_class}">{count}</td>\n'
-        html += '                </tr>\n'
-
-    html += """            </tbody>
+_CM_TABLE_CLOSE = """            </tbody>
         </table>
     </div>
 """
-    return html
 
-
-def generate_html_report(summary, performance, confusion_matrices):
-    """Generate HTML report"""
-    html = f"""
+# Static document head (doctype, CSS, page header); built once at import.
+# The confusion-matrix CSS is kept separate so reports without matrices can leave it out.
+_HEAD_OPEN = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Voice Agents - Evaluation Report</title>
-    <style>
-        * {{
+"""
+
+_BASE_CSS = """        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
 
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             color: #333;
-        }}
+        }
 
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background: white;
             border-radius: 16px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.3);
             overflow: hidden;
-        }}
+        }
 
-        header {{
+        header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 40px;
             text-align: center;
-        }}
+        }
 
-        h1 {{
+        h1 {
             font-size: 36px;
             margin-bottom: 10px;
-        }}
+        }
 
-        .subtitle {{
+        .subtitle {
             font-size: 16px;
             opacity: 0.9;
-        }}
+        }
 
-        .content {{
+        .content {
             padding: 40px;
-        }}
+        }
 
-        .metric-grid {{
+        .metric-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
             gap: 20px;
             margin-bottom: 40px;
-        }}
+        }
 
-        .metric-card {{
+        .metric-card {
             background: #f8f9fa;
             border-radius: 12px;
             padding: 24px;
             border-left: 4px solid #667eea;
-        }}
+        }
 
-        .metric-card h3 {{
+        .metric-card h3 {
             font-size: 14px;
             color: #666;
             margin-bottom: 12px;
             text-transform: uppercase;
             letter-spacing: 0.5px;
-        }}
+        }
 
-        .metric-value {{
+        .metric-value {
             font-size: 36px;
             font-weight: bold;
             color: #667eea;
-        }}
+        }
 
-        .metric-label {{
+        .metric-label {
             font-size: 12px;
             color: #999;
             margin-top: 4px;
-        }}
+        }
 
-        .section {{
+        .section {
             margin-bottom: 40px;
-        }}
+        }
 
-        .section-title {{
+        .section-title {
             font-size: 24px;
             margin-bottom: 20px;
             color: #333;
             border-bottom: 2px solid #667eea;
             padding-bottom: 10px;
-        }}
+        }
 
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             background: white;
             border-radius: 8px;
             overflow: hidden;
-        }}
+        }
 
-        th {{
+        th {
             background: #667eea;
             color: white;
             padding: 16px;
             text-align: left;
             font-weight: 600;
-        }}
+        }
 
-        td {{
+        td {
             padding: 14px 16px;
             border-bottom: 1px solid #e9ecef;
-        }}
+        }
 
-        tr:last-child td {{
+        tr:last-child td {
             border-bottom: none;
-        }}
+        }
 
-        tr:hover {{
+        tr:hover {
             background: #f8f9fa;
-        }}
+        }
 
-        .badge {{
+        .badge {
             display: inline-block;
             padding: 4px 12px;
             border-radius: 12px;
             font-size: 12px;
             font-weight: 600;
-        }}
+        }
 
-        .badge-excellent {{
+        .badge-excellent {
             background: #d4edda;
             color: #155724;
-        }}
+        }
 
-        .badge-good {{
+        .badge-good {
             background: #d1ecf1;
             color: #0c5460;
-        }}
+        }
 
-        .badge-fair {{
+        .badge-fair {
             background: #fff3cd;
             color: #856404;
-        }}
+        }
 
-        .progress-bar {{
+        .progress-bar {
             width: 100%;
             height: 8px;
             background: #e9ecef;
             border-radius: 4px;
             overflow: hidden;
             margin-top: 8px;
-        }}
+        }
 
-        .progress-fill {{
+        .progress-fill {
             height: 100%;
             background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
             transition: width 0.3s ease;
-        }}
+        }
 
-        .footer {{
+        .footer {
             background: #f8f9fa;
             padding: 20px;
             text-align: center;
             color: #666;
             font-size: 14px;
-        }}
+        }
+
+"""
 
-        /* Confusion Matrix Styles */
-        .confusion-matrix-container {{
+_CM_CSS = """        /* Confusion Matrix Styles */
+        .confusion-matrix-container {
             margin: 20px 0;
-        }}
+        }
 
-        .confusion-matrix-container h4 {{
+        .confusion-matrix-container h4 {
             margin-bottom: 12px;
             color: #667eea;
             font-size: 16px;
-        }}
+        }
 
-        .confusion-matrix {{
+        .confusion-matrix {
             width: 100%;
             max-width: 500px;
             margin: 0;
             border-collapse: collapse;
             font-size: 13px;
-        }}
+        }
 
-        .confusion-matrix th.cm-corner {{
+        .confusion-matrix th.cm-corner {
             background: #f8f9fa;
             color: #666;
             font-weight: 600;
@@ -277,9 +262,9 @@ def generate_html_report(summary, performance, confusion_matrices):
             border: 1px solid #dee2e6;
             text-align: left;
             font-size: 11px;
-        }}
+        }
 
-        .confusion-matrix th.cm-header {{
+        .confusion-matrix th.cm-header {
             background: #667eea;
             color: white;
             padding: 8px;
@@ -287,70 +272,82 @@ def generate_html_report(summary, performance, confusion_matrices):
             font-weight: 600;
             border: 1px solid #5568d3;
             font-size: 12px;
-        }}
+        }
 
-        .confusion-matrix td.cm-label {{
+        .confusion-matrix td.cm-label {
             background: #f8f9fa;
             font-weight: 600;
             padding: 8px;
             border: 1px solid #dee2e6;
             white-space: nowrap;
-        }}
+        }
 
-        .confusion-matrix td.cm-cell {{
+        .confusion-matrix td.cm-cell {
             text-align: center;
             padding: 12px 8px;
             border: 1px solid #dee2e6;
             font-weight: 600;
             min-width: 50px;
-        }}
+        }
 
-        .confusion-matrix td.cm-correct {{
+        .confusion-matrix td.cm-correct {
             background: #d4edda;
             color: #155724;
-        }}
+        }
 
-        .confusion-matrix td.cm-error {{
+        .confusion-matrix td.cm-error {
             background: #f8d7da;
             color: #721c24;
-        }}
+        }
 
-        .confusion-matrix td.cm-zero {{
+        .confusion-matrix td.cm-zero {
             background: #f8f9fa;
             color: #ccc;
-        }}
+        }
 
-        .cm-grid {{
+        .cm-grid {
             display: flex;
             flex-direction: column;
             gap: 40px;
             margin-top: 20px;
-        }}
+        }
 
-        .cm-row {{
+        .cm-row {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
             gap: 40px;
-        }}
+        }
+
+"""
 
-        @media print {{
-            body {{
+_PRINT_CSS = """        @media print {
+            body {
                 background: white;
-            }}
+            }
 
-            .container {{
+            .container {
                 box-shadow: none;
-            }}
-        }}
-    </style>
-</head>
+            }
+        }
+"""
+
+_HEAD_CLOSE = """</head>
 <body>
     <div class="container">
         <header>
             <h1>Voice Agents Evaluation Report</h1>
             <p class="subtitle">Comprehensive Performance & Accuracy Analysis</p>
         </header>
+"""
 
+_CSS_FULL = _BASE_CSS + _CM_CSS + _PRINT_CSS
+_CSS_NO_CM = _BASE_CSS + _PRINT_CSS
+_HTML_HEAD = _HEAD_OPEN + "    <style>\n" + _CSS_FULL + "    </style>\n" + _HEAD_CLOSE
+_HTML_HEAD_NO_CM = _HEAD_OPEN + "    <style>\n" + _CSS_NO_CM + "    </style>\n" + _HEAD_CLOSE
+_CSS_LINK = '    <link rel="stylesheet" href="{}">\n'
+
+# Overall metrics and agent breakdown; filled with str.format_map in generate_html_report
+_REPORT_SUMMARY = """
         <div class="content">
             <!-- Summary Metrics -->
             <div class="section">
@@ -358,34 +355,34 @@ def generate_html_report(summary, performance, confusion_matrices):
                 <div class="metric-grid">
                     <div class="metric-card">
                         <h3>Orchestration</h3>
-                        <div class="metric-value">{summary['orchestration']['accuracy']:.1f}%</div>
+                        <div class="metric-value">{orch_acc:.1f}%</div>
                         <div class="metric-label">Routing Accuracy</div>
                         <div class="progress-bar">
-                            <div class="progress-fill" style="width: {summary['orchestration']['accuracy']}%"></div>
+                            <div class="progress-fill" style="width: {orch_acc}%"></div>
                         </div>
                     </div>
 
                     <div class="metric-card">
                         <h3>Medication Intent</h3>
-                        <div class="metric-value">{summary['medication']['intent_accuracy']:.1f}%</div>
+                        <div class="metric-value">{med_intent_acc:.1f}%</div>
                         <div class="metric-label">Classification Accuracy</div>
                         <div class="progress-bar">
-                            <div class="progress-fill" style="width: {summary['medication']['intent_accuracy']}%"></div>
+                            <div class="progress-fill" style="width: {med_intent_acc}%"></div>
                         </div>
                     </div>
 
                     <div class="metric-card">
                         <h3>Follow-Up Severity</h3>
-                        <div class="metric-value">{summary['followup']['severity_accuracy']:.1f}%</div>
+                        <div class="metric-value">{fu_sev_acc:.1f}%</div>
                         <div class="metric-label">Extraction Accuracy</div>
                         <div class="progress-bar">
-                            <div class="progress-fill" style="width: {summary['followup']['severity_accuracy']}%"></div>
+                            <div class="progress-fill" style="width: {fu_sev_acc}%"></div>
                         </div>
                     </div>
 
                     <div class="metric-card">
                         <h3>Avg Response Time</h3>
-                        <div class="metric-value">{performance['overall']['avg_response_time']:.2f}s</div>
+                        <div class="metric-value">{overall_time:.2f}s</div>
                         <div class="metric-label">All Agents Combined</div>
                     </div>
                 </div>
@@ -408,43 +405,43 @@ def generate_html_report(summary, performance, confusion_matrices):
                         <tr>
                             <td><strong>Orchestration</strong></td>
                             <td>Intent Routing</td>
-                            <td>{summary['orchestration']['accuracy']:.1f}%</td>
-                            <td>{summary['orchestration']['avg_response_time']:.3f}s</td>
+                            <td>{orch_acc:.1f}%</td>
+                            <td>{orch_time:.3f}s</td>
                             <td><span class="badge badge-excellent">Excellent</span></td>
                         </tr>
                         <tr>
                             <td><strong>Medication</strong></td>
                             <td>Intent + Risk</td>
                             <td>
-                                <div style="margin-bottom: 4px;"><strong>Intent:</strong> {summary['medication']['intent_accuracy']:.1f}%</div>
-                                <div><strong>Risk:</strong> {summary['medication']['risk_accuracy']:.1f}%</div>
+                                <div style="margin-bottom: 4px;"><strong>Intent:</strong> {med_intent_acc:.1f}%</div>
+                                <div><strong>Risk:</strong> {med_risk_acc:.1f}%</div>
                             </td>
-                            <td>{summary['medication']['avg_response_time']:.3f}s</td>
-                            <td><span class="badge {'badge-excellent' if summary['medication']['intent_accuracy'] >= 90 else 'badge-good'}">{'Excellent' if summary['medication']['intent_accuracy'] >= 90 else 'Good'}</span></td>
+                            <td>{med_time:.3f}s</td>
+                            <td>{med_badge}</td>
                         </tr>
                         <tr>
                             <td><strong>Follow-Up</strong></td>
                             <td>Severity + Risk</td>
                             <td>
-                                <div style="margin-bottom: 4px;"><strong>Severity:</strong> {summary['followup']['severity_accuracy']:.1f}%</div>
-                                <div><strong>Risk:</strong> {summary['followup']['risk_accuracy']:.1f}%</div>
+                                <div style="margin-bottom: 4px;"><strong>Severity:</strong> {fu_sev_acc:.1f}%</div>
+                                <div><strong>Risk:</strong> {fu_risk_acc:.1f}%</div>
                             </td>
-                            <td>{summary['followup']['avg_response_time']:.3f}s</td>
+                            <td>{fu_time:.3f}s</td>
                             <td><span class="badge badge-excellent">Excellent</span></td>
                         </tr>
                         <tr>
                             <td><strong>Appointment</strong></td>
                             <td>Action Detection</td>
-                            <td>{summary.get('appointment', {}).get('accuracy', 0):.1f}%</td>
-                            <td>{performance['appointment']['avg_response_time']:.3f}s</td>
-                            <td><span class="badge {'badge-excellent' if summary.get('appointment', {}).get('accuracy', 0) >= 90 else 'badge-good'}">{'Excellent' if summary.get('appointment', {}).get('accuracy', 0) >= 90 else 'Good'}</span></td>
+                            <td>{appt_acc:.1f}%</td>
+                            <td>{appt_time:.3f}s</td>
+                            <td>{appt_badge}</td>
                         </tr>
                         <tr>
                             <td><strong>Caregiver</strong></td>
                             <td>Timeframe Extraction</td>
-                            <td>{summary.get('caregiver', {}).get('accuracy', 0):.1f}%</td>
-                            <td>{performance['caregiver']['avg_response_time']:.3f}s</td>
-                            <td><span class="badge {'badge-excellent' if summary.get('caregiver', {}).get('accuracy', 0) >= 90 else 'badge-good'}">{'Excellent' if summary.get('caregiver', {}).get('accuracy', 0) >= 90 else 'Good'}</span></td>
+                            <td>{cg_acc:.1f}%</td>
+                            <td>{cg_time:.3f}s</td>
+                            <td>{cg_badge}</td>
                         </tr>
                     </tbody>
                 </table>
@@ -466,26 +463,30 @@ def generate_html_report(summary, performance, confusion_matrices):
                     <tbody>
 """
 
-    # Add performance rows
-    for agent, metrics in performance.items():
-        if agent == "overall":
-            continue
+# Precomposed status badges (see _badge)
+_BADGE_EXCELLENT = '<span class="badge badge-excellent">Excellent</span>'
+_BADGE_GOOD = '<span class="badge badge-good">Good</span>'
 
-        html += f"""
+# One response-time table row: agent, min/avg/max time, number of tests
+_PERF_ROW = """
                         <tr>
-                            <td><strong>{agent.title()}</strong></td>
-                            <td>{metrics['min_response_time']:.3f}s</td>
-                            <td>{metrics['avg_response_time']:.3f}s</td>
-                            <td>{metrics['max_response_time']:.3f}s</td>
-                            <td>{metrics['num_tests']}</td>
+                            <td><strong>{0}</strong></td>
+                            <td>{1:.3f}s</td>
+                            <td>{2:.3f}s</td>
+                            <td>{3:.3f}s</td>
+                            <td>{4}</td>
                         </tr>
 """
 
-    html += f"""
+# Closes the response-time table
+_REPORT_PERF_CLOSE = """
                     </tbody>
                 </table>
             </div>
+"""
 
+# Opens the confusion-matrix section and grid
+_REPORT_CM_OPEN = """
             <!-- Confusion Matrices -->
             <div class="section">
                 <h2 class="section-title">Confusion Matrices</h2>
@@ -495,37 +496,14 @@ def generate_html_report(summary, performance, confusion_matrices):
                 <div class="cm-grid">
 """
 
-    # Add confusion matrices organized in rows
-    if confusion_matrices:
-        matrix_titles = {
-            "orchestration_routing": "Orchestration: Agent Routing",
-            "medication_intent": "Medication: Intent Classification",
-            "medication_risk": "Medication: Risk Level",
-            "followup_risk": "Follow-Up: Risk Triage"
-        }
-
-        # Row 1: Orchestration and Medication Intent
-        html += '                    <div class="cm-row">\n'
-        for key in ["orchestration_routing", "medication_intent"]:
-            if key in confusion_matrices and confusion_matrices[key]:
-                title = matrix_titles[key]
-                html += generate_confusion_matrix_html(title, confusion_matrices[key])
-        html += '                    </div>\n'
-
-        # Row 2: Medication Risk and Follow-Up Risk
-        html += '                    <div class="cm-row">\n'
-        for key in ["medication_risk", "followup_risk"]:
-            if key in confusion_matrices and confusion_matrices[key]:
-                title = matrix_titles[key]
-                html += generate_confusion_matrix_html(title, confusion_matrices[key])
-        html += '                    </div>\n'
-    else:
-        html += "<p>No confusion matrix data available</p>"
-
-    html += """
+# Closes the confusion-matrix grid and section
+_REPORT_CM_CLOSE = """
                 </div>
             </div>
+"""
 
+# Static error analysis, recommendations and footer
+_REPORT_TAIL = """
             <!-- Error Analysis -->
             <div class="section">
                 <h2 class="section-title">Error Analysis: Medication Risk Scoring (60% Accuracy)</h2>
@@ -703,7 +681,222 @@ def generate_html_report(summary, performance, confusion_matrices):
 </html>
 """
 
-    return html
+
+def _loads(data):
+    """Parse JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity literals, which only the stdlib accepts
+    return json.loads(data)
+
+
+def _mtime(path):
+    """File mtime in ns, or None if the file does not exist"""
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=4)
+def _load_cached(results_dir, summary_mtime, perf_mtime, cm_mtime):
+    """Parse the result files; the mtimes are only the cache key"""
+    summary_file = results_dir / "summary_metrics.json"
+    perf_file = results_dir / "performance_summary.json"
+    cm_file = results_dir / "confusion_matrices.json"
+
+    # The reads are independent, so overlap them; confusion matrices only if they exist
+    paths = [summary_file, perf_file]
+    if cm_mtime is not None:
+        paths.append(cm_file)
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        blobs = list(pool.map(Path.read_bytes, paths))
+
+    summary = _loads(blobs[0])
+    performance = _loads(blobs[1])
+    confusion_matrices = _loads(blobs[2]) if len(blobs) > 2 else {}
+
+    return summary, performance, confusion_matrices
+
+
+def load_results():
+    """Load all evaluation results (re-parsed only when a result file changes)"""
+    return _load_cached(
+        RESULTS_DIR,
+        _mtime(RESULTS_DIR / "summary_metrics.json"),
+        _mtime(RESULTS_DIR / "performance_summary.json"),
+        _mtime(RESULTS_DIR / "confusion_matrices.json"),
+    )
+
+
+def _diagonal_matrix_html(matrix_name, matrix_data, all_labels, safe_labels):
+    """Compact one-column table for a matrix with no off-diagonal entries"""
+    parts = [_CM_DIAG_OPEN.format(matrix_name)]
+    for label, label_safe in zip(all_labels, safe_labels):
+        count = (matrix_data.get(label) or {}).get(label, 0)
+        cell_class = _CM_DIAG_CLASS if count else _CM_ZERO_CLASS
+        parts.append(_CM_ROW_OPEN.format(label_safe))
+        parts.append(_CM_CELL.format(cell_class, count))
+        parts.append('                </tr>\n')
+    parts.append(_CM_TABLE_CLOSE)
+    return ''.join(parts)
+
+
+def generate_confusion_matrix_html(matrix_name, matrix_data):
+    """Generate HTML for a confusion matrix"""
+    if not matrix_data:
+        return "<p>No data available</p>"
+
+    # Get all unique labels (predicted and actual)
+    labels = set(matrix_data)
+    for preds in matrix_data.values():
+        labels.update(preds)
+    all_labels = sorted(labels)
+
+    if not all_labels:
+        return "<p>No data available</p>"
+
+    # Escape each label once; the raw label is still used to index matrix_data
+    safe_labels = [escape(str(label)) for label in all_labels]
+
+    # Perfect classifier: every prediction sits on the diagonal, so one count per label says it all
+    if all(set(matrix_data.get(label) or ()) <= {label} for label in all_labels):
+        return _diagonal_matrix_html(matrix_name, matrix_data, all_labels, safe_labels)
+
+    # Collect chunks and join once; repeated += on a growing str copies it every time
+    parts = [f"""
+    <div class="confusion-matrix-container">
+        <h4>{matrix_name}</h4>
+        <table class="confusion-matrix">
+            <thead>
+                <tr>
+                    <th class="cm-corner">Actual \\ Predicted</th>
+"""]
+    for label_safe in safe_labels:
+        parts.append(_CM_HEADER.format(label_safe))
+    parts.append("""                </tr>
+            </thead>
+            <tbody>
+""")
+
+    # Generate rows
+    for actual, actual_safe in zip(all_labels, safe_labels):
+        row = matrix_data.get(actual) or {}
+        row_parts = [_CM_ROW_OPEN.format(actual_safe)]
+        for predicted in all_labels:
+            count = row.get(predicted, 0)
+            # Color code: green for correct (diagonal), red for errors
+            cell_class = _CM_DIAG_CLASS if actual == predicted else _CM_OFF_CLASS
+            if count == 0:
+                cell_class = _CM_ZERO_CLASS
+            row_parts.append(_CM_CELL.format(cell_class, count))
+        row_parts.append('                </tr>\n')
+        parts.append(''.join(row_parts))
+
+    parts.append(_CM_TABLE_CLOSE)
+    return ''.join(parts)
+
+
+def _badge(acc):
+    """Status badge for an accuracy percentage"""
+    return _BADGE_EXCELLENT if acc >= 90 else _BADGE_GOOD
+
+
+def _render_summary(write, summary, performance):
+    """Write the metric cards, agent breakdown and response-time rows"""
+    # Values used by several cells and status badges, looked up once
+    med_intent_acc = summary['medication']['intent_accuracy']
+    appt_acc = summary.get('appointment', {}).get('accuracy', 0)
+    cg_acc = summary.get('caregiver', {}).get('accuracy', 0)
+
+    ctx = {
+        'orch_acc': summary['orchestration']['accuracy'],
+        'orch_time': summary['orchestration']['avg_response_time'],
+        'med_intent_acc': med_intent_acc,
+        'med_risk_acc': summary['medication']['risk_accuracy'],
+        'med_time': summary['medication']['avg_response_time'],
+        'med_badge': _badge(med_intent_acc),
+        'fu_sev_acc': summary['followup']['severity_accuracy'],
+        'fu_risk_acc': summary['followup']['risk_accuracy'],
+        'fu_time': summary['followup']['avg_response_time'],
+        'appt_acc': appt_acc,
+        'appt_time': performance['appointment']['avg_response_time'],
+        'appt_badge': _badge(appt_acc),
+        'cg_acc': cg_acc,
+        'cg_time': performance['caregiver']['avg_response_time'],
+        'cg_badge': _badge(cg_acc),
+        'overall_time': performance['overall']['avg_response_time'],
+    }
+    write(_REPORT_SUMMARY.format_map(ctx))
+
+    # Add performance rows
+    for agent, metrics in performance.items():
+        if agent == "overall":
+            continue
+
+        write(_PERF_ROW.format(agent.title(), metrics['min_response_time'], metrics['avg_response_time'],
+                               metrics['max_response_time'], metrics['num_tests']))
+
+
+def _render_full(write, head, summary, performance, confusion_matrices):
+    """Full report, including the confusion-matrix section"""
+    write(head)
+    _render_summary(write, summary, performance)
+    write(_REPORT_PERF_CLOSE)
+    write(_REPORT_CM_OPEN)
+
+    # Add confusion matrices organized in rows
+    for row_keys in (_CM_ROW1, _CM_ROW2):
+        write('                    <div class="cm-row">\n')
+        for key in row_keys:
+            if key in confusion_matrices and confusion_matrices[key]:
+                title = _MATRIX_TITLES[key]
+                write(generate_confusion_matrix_html(title, confusion_matrices[key]))
+        write('                    </div>\n')
+
+    write(_REPORT_CM_CLOSE)
+    write(_REPORT_TAIL)
+
+
+def _render_no_cm(write, head, summary, performance):
+    """Slim report for runs without confusion matrices (no matrix CSS or section)"""
+    write(head)
+    _render_summary(write, summary, performance)
+    write(_REPORT_PERF_CLOSE)
+    write(_REPORT_TAIL)
+
+
+def _stylesheet(css_dir, css):
+    """Write css to a content-hashed file in css_dir (once) and return its file name"""
+    name = f"report.{hashlib.sha1(css.encode('utf-8')).hexdigest()[:8]}.css"
+    path = Path(css_dir) / name
+    if not path.exists():
+        path.write_text(css, encoding='utf-8')
+    return name
+
+
+def generate_html_report(summary, performance, confusion_matrices, out=None, css_dir=None):
+    """
+    Generate HTML report.
+    Chunks are written straight to `out` (a text file object) when given;
+    otherwise the report is returned as a string.
+    With css_dir, the styles go to a cacheable report.<hash>.css there and the
+    page links to it; otherwise they are inlined.
+    """
+    buf = io.StringIO() if out is None else None
+    write = out.write if out is not None else buf.write
+
+    if confusion_matrices:
+        head = _HTML_HEAD if css_dir is None else _HEAD_OPEN + _CSS_LINK.format(_stylesheet(css_dir, _CSS_FULL)) + _HEAD_CLOSE
+        _render_full(write, head, summary, performance, confusion_matrices)
+    else:
+        head = _HTML_HEAD_NO_CM if css_dir is None else _HEAD_OPEN + _CSS_LINK.format(_stylesheet(css_dir, _CSS_NO_CM)) + _HEAD_CLOSE
+        _render_no_cm(write, head, summary, performance)
+
+    if buf is not None:
+        return buf.getvalue()
 
 
 def main():
@@ -711,11 +904,9 @@ def main():
     summary, performance, confusion_matrices = load_results()
 
     print("[INFO] Generating HTML report...")
-    html = generate_html_report(summary, performance, confusion_matrices)
-
     output_file = RESULTS_DIR / "evaluation_report.html"
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html)
+        generate_html_report(summary, performance, confusion_matrices, out=f, css_dir=RESULTS_DIR)
 
     print(f"[SUCCESS] Report generated: {output_file}")
     print(f"[TIP] Open in browser: file:///{output_file}")
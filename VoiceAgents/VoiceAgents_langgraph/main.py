@@ -5,6 +5,7 @@ Or as module: python -m VoiceAgents_langgraph.main (from parent)
 """
 import os
 import sys
+from typing import Optional
 from datetime import datetime
 from pathlib import Path
 
@@ -16,19 +17,27 @@ if __name__ == "__main__":
     if str(PARENT_DIR) not in sys.path:
         sys.path.insert(0, str(PARENT_DIR))
     # Use absolute imports when running directly
-    from VoiceAgents_langgraph.workflow import voice_agent_workflow
+    from VoiceAgents_langgraph.workflow import invoke_with_reply_cache
     from VoiceAgents_langgraph.state import VoiceAgentState
-    from VoiceAgents_langgraph.utils import say, stt_transcribe, mic_listen_once, now_iso
+    from VoiceAgents_langgraph.nodes.routing import clear_rule_intent, prepare_for_partial
+    from VoiceAgents_langgraph.nodes.appointment import prefetch_patient_input
+    from VoiceAgents_langgraph.nodes.caregiver import weekly_sweep
+    from VoiceAgents_langgraph.utils import say, flush_tts, prewarm_tts, stt_transcribe, mic_listen_once, now_iso
     from VoiceAgents_langgraph.utils.logging_utils import (
-        log_orchestration, setup_console_logging, log_turn_summary
+        log_orchestration, setup_console_logging,
+        log_user_turn, log_assistant_turn, log_system_error
     )
 else:
     # Running as module (from parent directory) - use relative imports
-    from .workflow import voice_agent_workflow
+    from .workflow import invoke_with_reply_cache
     from .state import VoiceAgentState
-    from .utils import say, stt_transcribe, mic_listen_once, now_iso
+    from .nodes.routing import clear_rule_intent, prepare_for_partial
+    from .nodes.appointment import prefetch_patient_input
+    from .nodes.caregiver import weekly_sweep
+    from .utils import say, flush_tts, prewarm_tts, stt_transcribe, mic_listen_once, now_iso
     from .utils.logging_utils import (
-        log_orchestration, setup_console_logging, log_turn_summary
+        log_orchestration, setup_console_logging,
+        log_user_turn, log_assistant_turn, log_system_error
     )
 
 
@@ -40,25 +49,36 @@ def main():
     print("LangGraph VoiceAgents Orchestrator")
     print("Commands:")
     print("  :voice on | :voice off            -> toggle TTS")
+    print("  :voice flush                       -> wait for queued speech to finish")
     print("  pid <8digit>                       -> set default patient_id context")
     print("  :stt <path_to_audio.wav/mp3>      -> transcribe then route")
     print("  :mic on                            -> speak one sentence to route")
+    print("  :mic recalibrate                   -> re-measure background noise, then speak")
+    print("  :weekly [days]                     -> write caregiver summaries for all patients")
     print("  quit                               -> exit")
     
     voice_enabled = False
     patient_id = "10004235"
     session_id = f"session_{datetime.now().timestamp()}"
     turn_index = 0  # Track conversation turns
+    reply_cache = {}  # Read-only replies of this session, for repeated questions
     
     while True:
         user = input("\nYou (or command): ").strip()
         low = user.lower()
         
         if low == "quit":
+            flush_tts()
             break
+        elif low == ":voice flush":
+            flush_tts()
+            print("[voice] Queued speech finished")
         elif low.startswith(":voice "):
             arg = low.split(" ", 1)[1].strip()
             voice_enabled = (arg == "on")
+            if voice_enabled:
+                # Engine setup overlaps with the user typing/speaking the next turn
+                prewarm_tts()
             print(f"[voice] {'Enabled' if voice_enabled else 'Disabled'}")
         elif low.startswith("pid "):
             patient_id = user.split(" ", 1)[1].strip()
@@ -69,40 +89,49 @@ def main():
                 print(f"[stt] file not found: {path}")
                 continue
             print(f"[stt] transcribing: {path} ...")
-            text = stt_transcribe(path)
+            text = stt_transcribe(path, on_partial=prepare_for_partial)
             if not text:
                 print("[stt] transcription failed.")
                 continue
             print(f"[stt] → {text}")
             # Process through workflow
             process_input(text, patient_id, voice_enabled, session_id)
-        elif low == ":mic on":
-            text = mic_listen_once()
+        elif low == ":weekly" or low.startswith(":weekly "):
+            arg = low.split(" ", 1)[1].strip() if " " in low else ""
+            if arg and not arg.isdigit():
+                print("[weekly] usage: :weekly [days]")
+                continue
+            records = weekly_sweep(int(arg) if arg else 7)
+            print(f"[weekly] {len(records)} caregiver summaries appended to logs/caregiver_summaries.jsonl")
+        elif low in (":mic on", ":mic recalibrate"):
+            text = mic_listen_once(recalibrate=(low == ":mic recalibrate"),
+                                   on_partial=prepare_for_partial)
             if not text:
                 print("[mic] no speech detected.")
                 continue
             print(f"[mic→stt] {text}")
-            process_input(text, patient_id, voice_enabled, session_id, turn_index)
+            process_input(text, patient_id, voice_enabled, session_id, turn_index, reply_cache)
             turn_index += 1
         else:
-            process_input(user, patient_id, voice_enabled, session_id, turn_index)
+            process_input(user, patient_id, voice_enabled, session_id, turn_index, reply_cache)
             turn_index += 1
 
 
-def process_input(user_input: str, patient_id: str, voice_enabled: bool, session_id: str, turn_index: int):
+def process_input(user_input: str, patient_id: str, voice_enabled: bool, session_id: str, turn_index: int,
+                  reply_cache: Optional[dict] = None):
     """Process user input through the LangGraph workflow"""
-    user_turn_idx = turn_index * 2  # User turns are even (0, 2, 4...)
-    
     # Log user turn to conversation_log.txt
-    log_turn_summary(
+    log_user_turn(
         timestamp=now_iso(),
         conversation_id=session_id,
-        turn_index=user_turn_idx,
-        role="user",
         message=user_input,
         input_channel="typed",  # CLI is always typed input
     )
     
+    # Clear appointment turns: start the appointment parse while routing runs
+    if clear_rule_intent(user_input) == "appointment":
+        prefetch_patient_input(user_input)
+    
     # Initialize state
     initial_state: VoiceAgentState = {
         "user_input": user_input,
@@ -123,7 +152,7 @@ def process_input(user_input: str, patient_id: str, voice_enabled: bool, session
     
     # Run workflow
     try:
-        final_state = voice_agent_workflow.invoke(initial_state)
+        final_state = invoke_with_reply_cache(initial_state, reply_cache)
         
         # Get response
         response = final_state.get("response", "I'm sorry, I couldn't process that request.")
@@ -137,27 +166,21 @@ def process_input(user_input: str, patient_id: str, voice_enabled: bool, session
         provider = log_entry.get("provider")
         model = log_entry.get("model")
         actions = log_entry.get("actions", {})
-        policies = log_entry.get("policies", {})
         latency_ms = log_entry.get("latency_ms")  # Extract latency if stored
         
-        assistant_turn_idx = turn_index * 2 + 1  # Assistant turns are odd (1, 3, 5...)
-        
         # Output response and get TTS backend
         tts_backend = say(response, voice_enabled)
         tts_used = 1 if tts_backend else 0
         
         # Log assistant turn to conversation_log.txt (includes message)
-        log_turn_summary(
+        log_assistant_turn(
             timestamp=now_iso(),
             conversation_id=session_id,
-            turn_index=assistant_turn_idx,
-            role="assistant",
             agent=agent_name,
             provider=provider,
             model=model,
             message=response,  # Include response message in metadata line
             actions=actions,
-            policies=policies,
             used_llm=1 if (provider and model) else 0,
             latency_ms=latency_ms,
             tts_used=tts_used,
@@ -183,14 +206,10 @@ def process_input(user_input: str, patient_id: str, voice_enabled: bool, session
         logger = get_conversation_logger()
         logger.error(error_msg)
         
-        error_turn_idx = turn_index * 2 + 1
-        
         # Log error turn to conversation_log.txt
-        log_turn_summary(
+        log_system_error(
             timestamp=now_iso(),
             conversation_id=session_id,
-            turn_index=error_turn_idx,
-            role="system",
             agent="error",
             error=str(e),
         )
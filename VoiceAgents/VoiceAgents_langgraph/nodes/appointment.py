@@ -1,16 +1,23 @@
 """
 Appointment Agent Node - LangGraph implementation
 """
+import copy
+import hashlib
 import json
 import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple, List
 import pandas as pd
 import os
 import sys
 from ..state import VoiceAgentState
-from ..utils import now_iso, say
-from ..utils.llm_provider import chat_completion, USE_LLM, get_default_model
+from ..utils import now_iso, say, loads_json
+from ..utils.llm_provider import chat_completion, USE_LLM, get_default_model, submit_llm_call
 from ..utils.logging_utils import log_appointment
 
 # Use local database
@@ -59,6 +66,18 @@ caregivers = pd.DataFrame([
     {"caregiver_id": "C001", "name": "Wong, Parent", "relationship": "Mother", "consent_on_file": True}
 ])
 
+# Id-keyed indexes over the mock tables, built once so per-turn lookups are dict gets
+APPTS_BY_PID: Dict[str, Dict] = {}
+for _appt in appointments_data.to_dict("records"):
+    APPTS_BY_PID.setdefault(str(_appt["patient_id"]), _appt)
+PATIENTS_BY_PID: Dict[str, Dict] = {str(r["patient_id"]): r for r in patients.to_dict("records")}
+CAREGIVERS_BY_ID: Dict[str, Dict] = {str(r["caregiver_id"]): r for r in caregivers.to_dict("records")}
+# Open slots grouped by (doctor, appointment_type), with the slot time parsed once ("dt")
+SLOTS_BY_KEY: Dict[Tuple[str, str], List[Dict]] = defaultdict(list)
+for _slot in available_slots.to_dict("records"):
+    _slot["dt"] = datetime.fromisoformat(_slot["date"])
+    SLOTS_BY_KEY[(_slot["doctor"], _slot["appointment_type"])].append(_slot)
+
 POLICY = {
     "postop_windows": {
         "Cardiac Bypass": (7, 14),
@@ -89,14 +108,129 @@ POLICY = {
     ]
 }
 
+# Flag rules with each pattern list compiled into one case-insensitive regex (built once)
+POLICY_COMPILED = {
+    tier: [
+        {**rule, "re": re.compile("|".join(re.escape(p) for p in rule["pattern"]), re.IGNORECASE)}
+        for rule in POLICY[tier]
+    ]
+    for tier in ("red_flags", "orange_flags")
+}
+# Union of every flag pattern: one scan rules out all flags for unremarkable symptom text
+_ANY_FLAG_RE = re.compile(
+    "|".join(sorted({re.escape(p) for tier in ("red_flags", "orange_flags")
+                     for rule in POLICY[tier] for p in rule["pattern"]})),
+    re.IGNORECASE,
+)
+
 
 def to_dt(s: str) -> datetime:
-    return datetime.strptime(s, "%Y-%m-%d %H:%M:%S")
+    # "YYYY-MM-DD HH:MM:SS" is ISO 8601 with a space separator, parsed in C by fromisoformat
+    return datetime.fromisoformat(s)
+
+
+def _postop_window(appointment_type: str) -> Optional[Tuple[int, int]]:
+    """(min, max) post-op evaluation window in days for surgery appointments, else None"""
+    if "Surgery" not in appointment_type:
+        return None
+    if "Cardiac Bypass" in appointment_type:
+        return POLICY["postop_windows"]["Cardiac Bypass"]
+    if "Valve Repair" in appointment_type:
+        return POLICY["postop_windows"]["Valve Repair"]
+    return (7, 14)
+
+
+def _format_appt_summary(appt: Dict, dt: datetime) -> str:
+    return f"{appt['appointment_type']} with {appt['doctor']} on {dt.strftime('%B %d at %I:%M %p')}"
+
+
+# Per-appointment values derived once: parsed date, summary text and post-op window
+for _appt in APPTS_BY_PID.values():
+    _appt["_dt"] = to_dt(_appt["appointment_date"])
+    _appt["_summary"] = _format_appt_summary(_appt, _appt["_dt"])
+    _appt["_postop"] = _postop_window(_appt["appointment_type"])
+
+
+def appt_summary(appt: Dict) -> str:
+    summary = appt.get("_summary")
+    if summary is None:
+        summary = _format_appt_summary(appt, to_dt(appt["appointment_date"]))
+    return summary
+
+
+# Optional on-disk cache of deterministic (temperature 0) llm_json responses, shared across sessions.
+# It stores patient utterances, so it is off unless VOICEAGENTS_LLM_DISK_CACHE=1; rows expire after
+# VOICEAGENTS_LLM_DISK_CACHE_TTL_S seconds and only the newest VOICEAGENTS_LLM_DISK_CACHE_MAX_ROWS are kept
+LLM_CACHE_PATH = os.path.join(BASE_DIR, "..", "logs", "llm_cache.sqlite3")
+LLM_DISK_CACHE = os.getenv("VOICEAGENTS_LLM_DISK_CACHE", "0") == "1"
+try:
+    _LLM_CACHE_TTL_S = float(os.getenv("VOICEAGENTS_LLM_DISK_CACHE_TTL_S", "86400"))
+    _LLM_CACHE_MAX_ROWS = int(os.getenv("VOICEAGENTS_LLM_DISK_CACHE_MAX_ROWS", "2000"))
+except ValueError:
+    _LLM_CACHE_TTL_S, _LLM_CACHE_MAX_ROWS = 86400.0, 2000
+_llm_cache_con: Optional[sqlite3.Connection] = None
+_llm_cache_failed = False
+_llm_cache_lock = threading.Lock()
 
 
-def appt_summary(appt: pd.Series) -> str:
-    dt = to_dt(appt["appointment_date"]).strftime("%B %d at %I:%M %p")
-    return f"{appt['appointment_type']} with {appt['doctor']} on {dt}"
+def _llm_cache_conn() -> Optional[sqlite3.Connection]:
+    """Open the cache database once; None if it is disabled or can't be used"""
+    global _llm_cache_con, _llm_cache_failed
+    if not LLM_DISK_CACHE:
+        return None
+    if _llm_cache_con is None and not _llm_cache_failed:
+        try:
+            os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+            con = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT, ts REAL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS llm_cache_ts ON llm_cache (ts)")
+            _llm_cache_con = con
+        except sqlite3.Error:
+            _llm_cache_failed = True
+    return _llm_cache_con
+
+
+def _llm_cache_get(key: str) -> Optional[Tuple[str, str, str]]:
+    """(provider, model, response) stored for key, if any"""
+    with _llm_cache_lock:
+        con = _llm_cache_conn()
+        if con is None:
+            return None
+        try:
+            return con.execute(
+                "SELECT provider, model, response FROM llm_cache WHERE key = ? AND ts >= ?",
+                (key, time.time() - _LLM_CACHE_TTL_S),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+
+
+def _llm_cache_put(key: str, provider: str, model: str, response: str) -> None:
+    with _llm_cache_lock:
+        con = _llm_cache_conn()
+        if con is None:
+            return
+        try:
+            now = time.time()
+            with con:
+                con.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, provider, model, response, now),
+                )
+                # Evict expired rows, then everything beyond the newest _LLM_CACHE_MAX_ROWS
+                con.execute("DELETE FROM llm_cache WHERE ts < ?", (now - _LLM_CACHE_TTL_S,))
+                con.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                    (_LLM_CACHE_MAX_ROWS,),
+                )
+        except sqlite3.Error:
+            pass
 
 
 def llm_json(prompt: str, temperature: float = 0) -> Tuple[Dict, Optional[str], Optional[str], Optional[int]]:
@@ -104,12 +238,23 @@ def llm_json(prompt: str, temperature: float = 0) -> Tuple[Dict, Optional[str],
     if not USE_LLM:
         return ({"action": "general", "patient_id": None, "preferred_date": None, "reason": None,
                 "symptoms": {"present": False}}, None, None, None)
+    cache_key = None
+    if temperature == 0 and LLM_DISK_CACHE:
+        cache_key = hashlib.blake2b(
+            f"{get_default_model()}\0{prompt}".encode("utf-8"), digest_size=20
+        ).hexdigest()
+        row = _llm_cache_get(cache_key)
+        if row is not None:
+            try:
+                return (loads_json(row[2]), row[0], row[1], 0)
+            except ValueError:
+                pass
     msg = [
         {"role": "system", "content": "Return ONLY valid JSON. No prose."},
         {"role": "user", "content": prompt}
     ]
     try:
-        result = chat_completion(messages=msg, temperature=temperature, model=get_default_model())
+        result = chat_completion(messages=msg, temperature=temperature, model=get_default_model(), json_mode=True)
         if not result:
             return ({"action": "general", "patient_id": None, "preferred_date": None, "reason": None,
                     "symptoms": {"present": False}}, None, None, None)
@@ -128,15 +273,133 @@ def llm_json(prompt: str, temperature: float = 0) -> Tuple[Dict, Optional[str],
         if not content:
             return ({"action": "general", "patient_id": None, "preferred_date": None, "reason": None,
                     "symptoms": {"present": False}}, provider, model, latency_ms)
-        return (json.loads(content.strip()), provider, model, latency_ms)
+        content = content.strip()
+        parsed = loads_json(content)
+        if cache_key is not None and provider is not None:
+            _llm_cache_put(cache_key, provider, model, content)
+        return (parsed, provider, model, latency_ms)
     except Exception:
         return ({"action": "general", "patient_id": None, "preferred_date": None, "reason": None,
                 "symptoms": {"present": False}}, None, None, None)
 
 
+# Process-local cache of LLM parses keyed by normalized input (patient ids redacted)
+_PARSE_CACHE: Dict[str, Tuple[Dict, Optional[str], Optional[str]]] = {}
+_PARSE_CACHE_MAX = 256
+_PID_RE = re.compile(r'\b\d{8}\b')
+_WS_RE = re.compile(r'\s+')
+# Anything appointment- or symptom-specific that the LLM parse has to interpret
+_APPT_KEYWORDS_RE = re.compile(
+    r"(reschedul|cancel|status|schedule|appointment|book|fever|pain|dizz|glucose|video|caregiver|surgery|follow)",
+    re.IGNORECASE,
+)
+# Scheduling verbs and dates: a short message carrying one of these is a request, not a bare id
+_ACTION_RE = re.compile(
+    r"\b(move|change|shift|push|switch|postpone|delay|bump|drop|earlier|later|today|tonight|tomorrow|next|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.IGNORECASE,
+)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def _norm(text: str) -> str:
+    """Cache key for a patient message: lowercased, whitespace-collapsed, ids redacted"""
+    return _WS_RE.sub(" ", _PID_RE.sub("<PID>", text.strip().lower()))
+
+
+# Single-slot speculative parse started before routing finishes: (user_input, future)
+_prefetched: Optional[Tuple[str, Future]] = None
+_prefetch_lock = threading.Lock()
+
+
+def _is_id_only(user_input: str, m) -> bool:
+    """
+    Short id-only message ("10004235", "I am 10004235") that needs no LLM parse.
+    Anything that could be a symptom (red/orange flag term) or a scheduling request
+    ("move 10004235 tomorrow") still goes through the LLM parse and triage.
+    """
+    if not m:
+        return False
+    if not _NON_WORD_RE.sub("", _PID_RE.sub("", user_input)):
+        return True
+    return (len(user_input.split()) < 4
+            and not _APPT_KEYWORDS_RE.search(user_input)
+            and not _ANY_FLAG_RE.search(user_input)
+            and not _ACTION_RE.search(user_input))
+
+
+def prefetch_patient_input(user_input: str) -> None:
+    """
+    Speculatively start the LLM parse for user_input so it overlaps with intent routing.
+    parse_patient_input picks the result up if the turn is routed to the appointment node;
+    callers should only prefetch when the rules clearly predict an appointment turn.
+    """
+    global _prefetched
+    if not USE_LLM or _is_id_only(user_input, _PID_RE.search(user_input)):
+        return
+    if _norm(user_input) in _PARSE_CACHE:
+        return
+    with _prefetch_lock:
+        _prefetched = (user_input, submit_llm_call(_llm_parse_patient_input, user_input))
+
+
+def _take_prefetched(user_input: str) -> Optional[Future]:
+    """Claim the speculative parse if it was started for exactly this input"""
+    global _prefetched
+    with _prefetch_lock:
+        if _prefetched is None or _prefetched[0] != user_input:
+            return None
+        future = _prefetched[1]
+        _prefetched = None
+        return future
+
+
+def discard_prefetched() -> None:
+    """Drop an unclaimed speculative parse (the turn was routed elsewhere)"""
+    global _prefetched
+    with _prefetch_lock:
+        if _prefetched is not None:
+            _prefetched[1].cancel()
+            _prefetched = None
+
+
 def parse_patient_input(user_input: str, last_patient_id: Optional[str]) -> Tuple[Dict, Optional[str], Optional[str], Optional[int]]:
     # extraction includes symptoms for triage
     # Note: Debug print removed for cleaner output - can be re-enabled if needed
+    m = _PID_RE.search(user_input)
+    # Fast path: a short id-only message needs no LLM parse
+    if _is_id_only(user_input, m):
+        return ({"action": "check_status", "patient_id": m.group(0), "preferred_date": None,
+                 "reason": None, "symptoms": {"present": False}}, None, None, None)
+    
+    key = _norm(user_input)
+    cached = _PARSE_CACHE.get(key)
+    
+    # Simple regex fallback for patient id
+    fallback_pid = m.group(0) if m else last_patient_id
+    
+    if cached is not None:
+        parsed, provider, model = copy.deepcopy(cached[0]), cached[1], cached[2]
+        latency_ms = 0
+    else:
+        prefetched = _take_prefetched(user_input)
+        if prefetched is not None:
+            parsed, provider, model, latency_ms = prefetched.result()
+        else:
+            parsed, provider, model, latency_ms = _llm_parse_patient_input(user_input)
+        # Only cache real LLM parses; the id is dropped so a hit never leaks another patient's id
+        if provider is not None:
+            if len(_PARSE_CACHE) >= _PARSE_CACHE_MAX:
+                _PARSE_CACHE.pop(next(iter(_PARSE_CACHE)))
+            _PARSE_CACHE[key] = ({**copy.deepcopy(parsed), "patient_id": None}, provider, model)
+    
+    if not parsed.get("patient_id") and fallback_pid:
+        parsed["patient_id"] = fallback_pid
+    return (parsed, provider, model, latency_ms)
+
+
+def _llm_parse_patient_input(user_input: str) -> Tuple[Dict, Optional[str], Optional[str], Optional[int]]:
+    """Ask the LLM for the structured appointment fields of a patient message"""
     prompt = f"""
 Parse the following patient message and extract structured fields. Return ONLY JSON.
 Fields:
@@ -150,15 +413,7 @@ Fields:
 
 Input: "{user_input}"
     """.strip()
-    parsed, provider, model, latency_ms = llm_json(prompt, temperature=0)
-    
-    # Simple regex fallback for patient id
-    m = re.search(r'\b\d{8}\b', user_input)
-    if m and not parsed.get("patient_id"):
-        parsed["patient_id"] = m.group(0)
-    if not parsed.get("patient_id") and last_patient_id:
-        parsed["patient_id"] = last_patient_id
-    return (parsed, provider, model, latency_ms)
+    return llm_json(prompt, temperature=0)
 
 
 def triage_category(symptoms: Dict) -> Tuple[str, List[str]]:
@@ -198,14 +453,16 @@ def triage_category(symptoms: Dict) -> Tuple[str, List[str]]:
     """
     if not symptoms or not symptoms.get("present"):
         return "GREEN", []
-    text_blob = " ".join([s.lower() for s in symptoms.get("list", [])])
+    text_blob = " ".join(symptoms.get("list", []))
+    if not _ANY_FLAG_RE.search(text_blob):
+        return "GREEN", []
     sev = symptoms.get("severity_0_10")
     fever = symptoms.get("fever_f")
 
     # RED
-    for rule in POLICY["red_flags"]:
-        name, patt, thr = rule["name"], rule["pattern"], rule.get("threshold")
-        if any(p in text_blob for p in patt):
+    for rule in POLICY_COMPILED["red_flags"]:
+        name, thr = rule["name"], rule.get("threshold")
+        if rule["re"].search(text_blob):
             if name == "fever_high" and fever is not None:
                 if fever >= thr:
                     return "RED", [name]
@@ -216,11 +473,11 @@ def triage_category(symptoms: Dict) -> Tuple[str, List[str]]:
                 return "RED", [name]
     
     # ORANGE
-    for rule in POLICY["orange_flags"]:
-        name, patt = rule["name"], rule["pattern"]
+    for rule in POLICY_COMPILED["orange_flags"]:
+        name = rule["name"]
         rng = rule.get("range")
         thr = rule.get("threshold")
-        if any(p in text_blob for p in patt):
+        if rule["re"].search(text_blob):
             if rng and sev is not None and name == "moderate_pain":
                 low, high = rng
                 if low <= sev <= high:
@@ -236,13 +493,13 @@ def triage_category(symptoms: Dict) -> Tuple[str, List[str]]:
     return "GREEN", []
 
 
-def check_policy_gates(appt: pd.Series, patient_row: pd.Series, intent: str, visit_context: Dict) -> Tuple[bool, str]:
+def check_policy_gates(appt: Dict, patient_row: Dict, intent: str, visit_context: Dict) -> Tuple[bool, str]:
     if patient_row["age"] < 18 and visit_context.get("caregiver_required", True):
         cg_id = patient_row["primary_caregiver_id"]
         if not cg_id:
             return False, "A caregiver must be present or consent on file for minors."
-        cg = caregivers[caregivers["caregiver_id"] == cg_id]
-        if cg.empty or not bool(cg.iloc[0]["consent_on_file"]):
+        cg = CAREGIVERS_BY_ID.get(str(cg_id))
+        if cg is None or not bool(cg["consent_on_file"]):
             return False, "Caregiver consent must be on file to proceed for minors."
     
     if appt.get("plan_id") in POLICY["referral_required_plans"]:
@@ -255,15 +512,11 @@ def check_policy_gates(appt: pd.Series, patient_row: pd.Series, intent: str, vis
         if not allowed:
             return False, "This appointment type requires an in-person visit."
     
-    if "Surgery" in appt["appointment_type"]:
-        if "Cardiac Bypass" in appt["appointment_type"]:
-            mn, mx = POLICY["postop_windows"]["Cardiac Bypass"]
-        elif "Valve Repair" in appt["appointment_type"]:
-            mn, mx = POLICY["postop_windows"]["Valve Repair"]
-        else:
-            mn, mx = (7, 14)
+    postop = appt["_postop"] if "_postop" in appt else _postop_window(appt["appointment_type"])
+    if postop is not None:
+        mn, mx = postop
         desired_dt: Optional[datetime] = visit_context.get("desired_dt")
-        surgery_dt = to_dt(appt["appointment_date"])
+        surgery_dt = appt.get("_dt") or to_dt(appt["appointment_date"])
         if desired_dt:
             delta_days = (desired_dt - surgery_dt).days
             if delta_days > mx:
@@ -275,43 +528,31 @@ class AppointmentService:
     def __init__(self):
         pass
     
-    def lookup_appointment(self, patient_id: str) -> Optional[pd.Series]:
-        df = appointments_data[appointments_data["patient_id"].astype(str) == str(patient_id)]
-        return df.iloc[0] if not df.empty else None
+    def lookup_appointment(self, patient_id: str) -> Optional[Dict]:
+        return APPTS_BY_PID.get(str(patient_id))
     
-    def lookup_patient(self, patient_id: str) -> Optional[pd.Series]:
-        df = patients[patients["patient_id"].astype(str) == str(patient_id)]
-        return df.iloc[0] if not df.empty else None
+    def lookup_patient(self, patient_id: str) -> Optional[Dict]:
+        return PATIENTS_BY_PID.get(str(patient_id))
     
-    def check_business_rules(self, appt: pd.Series) -> Dict:
-        appt_dt = to_dt(appt["appointment_date"])
+    def check_business_rules(self, appt: Dict) -> Dict:
+        appt_dt = appt.get("_dt") or to_dt(appt["appointment_date"])
         if "Surgery" in appt["appointment_type"] and (appt_dt - datetime.now()) < timedelta(hours=48):
             return {"can_reschedule": False, "reason": "Surgery cannot be rescheduled within 48 hours."}
         if appt["urgency"] == "high":
             return {"can_reschedule": False, "reason": "High-urgency appointments need supervisor approval."}
         return {"can_reschedule": True, "reason": ""}
     
-    def find_alternatives(self, appt: pd.Series, constraints: Dict) -> List[str]:
-        slots = available_slots[
-            (available_slots["doctor"] == appt["doctor"]) &
-            (available_slots["appointment_type"] == appt["appointment_type"])
-        ]
+    def find_alternatives(self, appt: Dict, constraints: Dict) -> List[str]:
+        slots = SLOTS_BY_KEY.get((appt["doctor"], appt["appointment_type"]), [])
         start: Optional[datetime] = constraints.get("start")
         end: Optional[datetime] = constraints.get("end")
         if start or end:
-            mask = [True] * len(slots)
-            for i, (_, row) in enumerate(slots.iterrows()):
-                dt = to_dt(row["date"])
-                if start and dt < start:
-                    mask[i] = False
-                if end and dt > end:
-                    mask[i] = False
-            slots = slots[mask]
-        alts = []
-        for _, row in slots.iterrows():
-            dt = to_dt(row["date"]).strftime("%B %d at %I:%M %p")
-            alts.append(f"{dt} ({row['location']}, {row['modality']})")
-        return alts[:3]
+            slots = [row for row in slots
+                     if not (start and row["dt"] < start) and not (end and row["dt"] > end)]
+        return [
+            f"{row['dt'].strftime('%B %d at %I:%M %p')} ({row['location']}, {row['modality']})"
+            for row in slots[:3]
+        ]
     
     def process(self, parsed: Dict, use_voice: bool = False) -> str:
         try:
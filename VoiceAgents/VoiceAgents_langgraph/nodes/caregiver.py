@@ -4,10 +4,12 @@ Caregiver Agent Node - LangGraph implementation
 import os
 import sys
 import json
-from typing import Dict, Optional, List, Any
+import functools
+import pandas as pd
+from typing import Dict, Optional, List, Any, Tuple
 from ..state import VoiceAgentState
 from ..utils import now_iso, say
-from ..utils.logging_utils import log_caregiver
+from ..utils.logging_utils import log_caregiver, log_caregiver_batch
 
 # Use local database
 from ..database import DatabaseService
@@ -27,6 +29,10 @@ if os.path.exists(POLICY_PATH):
     logger.info(f"[Policy] Caregiver Agent loaded: scope=[{scope_str}], restrictions=[{restrictions_str}]")
 
 
+CONSENT_VALUES = ("true", "1", "yes")
+SWEEP_LOG_CHUNK = 64  # summaries per queued log write during a weekly sweep
+
+
 def score_risk(avg_sev: float, missed: int) -> str:
     """Simple heuristic for overall patient risk."""
     if avg_sev >= 7 or missed >= 3:
@@ -36,43 +42,76 @@ def score_risk(avg_sev: float, missed: int) -> str:
     return "LOW"
 
 
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _load_med_counts_cached(path: str, mtime: Optional[int]) -> Dict[str, Tuple[int, int]]:
+    """Tally (missed, taken) doses per patient from med_logs.csv; re-read only when the file changes"""
+    if mtime is None:
+        return {}
+    # Only the two columns the tally needs, typed at parse time
+    df = pd.read_csv(
+        path,
+        usecols=lambda c: c in ("patient_id", "status"),
+        dtype={"patient_id": str, "status": "category"},
+    )
+    if df.empty:
+        return {}
+    pids = df["patient_id"]
+    if "status" not in df.columns:
+        return {pid: (0, int(total)) for pid, total in pids.value_counts().items()}
+    # One lowercase pass over status, then a single (patient, status) tally
+    counts = df["status"].str.lower().groupby(pids).value_counts().to_dict()
+    return {pid: (counts.get((pid, "missed"), 0), counts.get((pid, "taken"), 0)) for pid in pids.unique()}
+
+
 class CaregiverService:
     def __init__(self):
         self.db = DatabaseService()
+        self._med_logs_path = os.path.join(self.db.data_dir, "med_logs.csv")
+        # Consent is normalized once into a boolean "_consent" column instead of per row
+        caregivers = self.db.caregivers
+        if not caregivers.empty:
+            if "consent_on_file" in caregivers.columns:
+                consent = caregivers["consent_on_file"].astype("string").str.strip().str.lower().isin(CONSENT_VALUES)
+            else:
+                consent = False
+            caregivers = caregivers.assign(_consent=consent)
+        self._caregivers = caregivers
+        # caregiver_id -> first matching caregiver row, so lookups skip the astype(str) scans
+        self._cg_by_id: Dict[str, Dict[str, Any]] = {}
+        if not caregivers.empty:
+            for cg in caregivers.to_dict("records"):
+                self._cg_by_id.setdefault(str(cg["caregiver_id"]), cg)
     
-    def summarize_one(self, patient_id: str, days: int = 7) -> Optional[Dict[str, Any]]:
-        patient = self.db.get_patient(patient_id)
+    def summarize_one(self, patient_id: str, days: int = 7,
+                      trends: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        pid_s = str(patient_id)
+        patient = self.db.get_patient(pid_s)
         if not patient:
             return None
         
         cg_id = patient.get("primary_caregiver_id")
-        caregivers_df = self.db.caregivers
-        if caregivers_df.empty or str(cg_id) not in caregivers_df["caregiver_id"].astype(str).values:
-            return None
-        
-        cg = caregivers_df[caregivers_df["caregiver_id"].astype(str) == str(cg_id)].iloc[0].to_dict()
-        if str(cg.get("consent_on_file", "")).strip().lower() not in ("true", "1", "yes"):
+        cg = self._cg_by_id.get(str(cg_id))
+        # Bail out before any trend/med-log work when there is no consenting caregiver
+        if cg is None or not cg["_consent"]:
             return None
         
         # Data aggregation
-        trends = self.db.get_symptom_trends(patient_id, days)
-        meds = self.db.get_prescriptions(patient_id)
+        if trends is None:
+            trends = self.db.get_symptom_trends(pid_s, days)
         
-        # Medication adherence summary
-        med_logs_path = os.path.join(self.db.data_dir, "med_logs.csv")
-        missed = 0
-        taken = 0
-        if os.path.exists(med_logs_path):
-            import pandas as pd
-            df = pd.read_csv(med_logs_path)
-            df = df[df["patient_id"].astype(str) == str(patient_id)]
-            if not df.empty:
-                total = len(df)
-                missed = (df["status"].str.lower() == "missed").sum() if "status" in df.columns else 0
-                taken = (df["status"].str.lower() == "taken").sum() if "status" in df.columns else total - missed
+        # Medication adherence summary (med_logs.csv is re-parsed only when it changes)
+        med_counts = _load_med_counts_cached(self._med_logs_path, _mtime(self._med_logs_path))
+        missed, taken = med_counts.get(pid_s, (0, 0))
         
         # Compute average severity
-        avg_sev = sum([t["avg_severity"] or 0 for t in trends]) / len(trends) if trends else 0
+        avg_sev = sum(t["avg_severity"] or 0 for t in trends) / len(trends) if trends else 0
         
         # Determine risk
         risk = score_risk(avg_sev, missed)
@@ -85,10 +124,10 @@ class CaregiverService:
         if not trends:
             sym_text = f"{pname} reported no major symptoms in the last {days} days."
         else:
-            parts = []
-            for t in trends[:3]:
-                parts.append(f"{t['symptom']} {int(t['freq'])}× (avg severity {t['avg_severity']:.1f})")
-            sym_text = f"{pname} reported " + ", ".join(parts) + f" in the last {days} days."
+            top = ", ".join(
+                f"{t['symptom']} {int(t['freq'])}× (avg severity {t['avg_severity']:.1f})" for t in trends[:3]
+            )
+            sym_text = f"{pname} reported {top} in the last {days} days."
         
         med_text = ""
         if missed + taken > 0:
@@ -115,30 +154,61 @@ class CaregiverService:
             "summary_text": summary,
         }
     
-    def summarize_weekly_all(self, days: int = 7) -> List[Dict[str, Any]]:
-        """Generate summaries for all patients with caregivers and consent on file."""
-        caregivers_df = self.db.caregivers
+    def summarize_weekly_all(self, days: int = 7, write_logs: bool = False) -> List[Dict[str, Any]]:
+        """
+        Generate summaries for all patients with caregivers and consent on file.
+        With write_logs=True they are appended to the caregiver logs in batches of
+        SWEEP_LOG_CHUNK; the background log writer does the disk I/O while the next
+        summaries are built.
+        """
+        caregivers_df = self._caregivers
         if caregivers_df.empty:
             return []
         
+        # Build the (caregiver, patient) worklist in one vectorized pass
+        eligible = pd.DataFrame({"cg_key": caregivers_df.loc[caregivers_df["_consent"], "caregiver_id"].astype(str)})
+        patients = pd.DataFrame({
+            "cg_key": self.db.patients["primary_caregiver_id"].astype(str),
+            "patient_id": self.db.patients["patient_id"],
+        })
+        work = eligible.merge(patients, on="cg_key")
+        
+        # Symptom trends for the whole sweep come from a single pass over the log
+        all_trends = self.db.get_symptom_trends_all(days)
+        
         results = []
-        for _, cg in caregivers_df.iterrows():
-            if str(cg.get("consent_on_file", "")).strip().lower() not in ("true", "1", "yes"):
-                continue
-            
-            # Find all patients linked to this caregiver
-            pid_list = self.db.patients[
-                self.db.patients["primary_caregiver_id"].astype(str) == str(cg["caregiver_id"])
-            ]["patient_id"].tolist()
-            
-            for pid in pid_list:
-                rec = self.summarize_one(str(pid), days=days)
-                if rec:
-                    results.append(rec)
+        pending = []
+        for pid in work["patient_id"].astype(str).tolist():
+            rec = self.summarize_one(pid, days=days, trends=all_trends.get(pid, []))
+            if rec:
+                results.append(rec)
+                if write_logs:
+                    pending.append(dict(rec))  # the logger normalizes its entries in place
+                    if len(pending) >= SWEEP_LOG_CHUNK:
+                        log_caregiver_batch(pending)
+                        pending = []
+        if pending:
+            log_caregiver_batch(pending)
         
         return results
 
 
+_SERVICE: Optional[CaregiverService] = None
+
+
+def _get_service() -> CaregiverService:
+    """Reuse one CaregiverService across turns (static CSVs load once; med-log tallies follow the file)."""
+    global _SERVICE
+    if _SERVICE is None:
+        _SERVICE = CaregiverService()
+    return _SERVICE
+
+
+def weekly_sweep(days: int = 7) -> List[Dict[str, Any]]:
+    """Summarize every consenting caregiver's patients and append them to the caregiver logs"""
+    return _get_service().summarize_weekly_all(days=days, write_logs=True)
+
+
 def caregiver_node(state: VoiceAgentState) -> VoiceAgentState:
     """Caregiver agent node"""
     patient_id = state.get("patient_id")
@@ -165,7 +235,7 @@ def caregiver_node(state: VoiceAgentState) -> VoiceAgentState:
         state["log_entry"] = log_entry
         return state
     
-    service = CaregiverService()
+    service = _get_service()
     # Get time window from policy file (actual value used)
     time_window_days = AGENT_POLICY.get("data_aggregation", {}).get("time_window_days", 7)
     record = service.summarize_one(patient_id, days=time_window_days)
@@ -8,10 +8,16 @@ import sys
 import re
 from typing import Dict, Optional, List, Tuple
 from ..state import VoiceAgentState
-from ..utils import now_iso, say
+from ..utils import loads_json, now_iso, say
 from ..utils.llm_provider import chat_completion, USE_LLM, get_default_model
 from ..utils.logging_utils import log_followup
 
+# Optional multi-pattern matcher; falls back to a plain substring scan
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Use local database
 from ..database import DatabaseService
 
@@ -45,13 +51,58 @@ def load_symptom_codebook() -> List[Dict]:
 
 CODEBOOK = load_symptom_codebook()
 
+# Fallback symptom keywords, longest phrases first so they win over their parts
+SYMPTOM_KEYWORDS = [
+    "tightness in my chest", "pain in my chest", "chest tightness", "chest pain",
+    "shortness of breath", "trouble breathing", "short of breath",
+    "slurred speech", "dizziness", "breathless", "headache",
+    "pain", "fever", "dizzy", "cough", "fatigue", "tired", 
+    "tightness", "nausea", "ache", "swelling", "redness", 
+    "weakness", "numbness", "fainted", "syncope"
+]
+
+
+def _build_matcher(terms: List[str]):
+    """Automaton over the lowercased terms, each mapped to its list position; None without pyahocorasick"""
+    if ahocorasick is None or not terms:
+        return None
+    automaton = ahocorasick.Automaton()
+    for i, term in enumerate(terms):
+        # Keep the first position when a term is listed twice
+        if term not in automaton:
+            automaton.add_word(term, i)
+    automaton.make_automaton()
+    return automaton
+
+
+def _matched_terms(terms: List[str], matcher, text: str) -> set:
+    """Every listed term that occurs in text (already lowercased)"""
+    if matcher is not None:
+        return {terms[i] for _, i in matcher.iter(text)}
+    return {term for term in terms if term in text}
+
+
+def _first_term(terms: List[str], matcher, text: str) -> Optional[int]:
+    """Index of the earliest listed term that occurs in text (already lowercased)"""
+    if matcher is not None:
+        return min((i for _, i in matcher.iter(text)), default=None)
+    for i, term in enumerate(terms):
+        if term in text:
+            return i
+    return None
+
+
+_CODEBOOK_TERMS = [row["term"].lower() for row in CODEBOOK]
+_CODEBOOK_MATCHER = _build_matcher(_CODEBOOK_TERMS)
+_KEYWORD_MATCHER = _build_matcher(SYMPTOM_KEYWORDS)
+
 
 def normalize_symptom(text: str) -> Dict:
     """Return {'canonical':str,'snomed':str} or default."""
-    t = text.lower().strip()
-    for row in CODEBOOK:
-        if row["term"].lower() in t:
-            return {"canonical": row["canonical"], "snomed": row["snomed_code"]}
+    i = _first_term(_CODEBOOK_TERMS, _CODEBOOK_MATCHER, text.lower().strip())
+    if i is not None:
+        row = CODEBOOK[i]
+        return {"canonical": row["canonical"], "snomed": row["snomed_code"]}
     # LLM fallback
     if USE_LLM:
         messages = [
@@ -66,7 +117,7 @@ def normalize_symptom(text: str) -> Dict:
             content = result[0] if isinstance(result, tuple) else result
             if not content:
                 return {"canonical": "other", "snomed": "NA"}
-            j = json.loads(content.strip())
+            j = loads_json(content.strip())
             if isinstance(j, dict) and j.get("canonical"):
                 return {"canonical": j.get("canonical", "other"), "snomed": j.get("snomed", "NA")}
         except Exception:
@@ -74,14 +125,32 @@ def normalize_symptom(text: str) -> Dict:
     return {"canonical": "other", "snomed": "NA"}
 
 
+# Severity on an explicit 0-10 scale ("7/10", "7 out of 10"); whole numbers only, so ids never match
+SEVERITY_SCALE_RE = re.compile(r'\b(\d{1,2})\s*(?:/\s*10|out\s*of\s*10)\b', re.IGNORECASE)
+# Bare number fallback ("I feel dizzy 7")
+SEVERITY_BARE_RE = re.compile(r'\b(\d{1,2})\b')
+
+
+def parse_severity(text: str) -> Optional[int]:
+    """
+    Severity 0-10 from text. The first explicit "N/10" / "N out of 10" rating wins, even
+    over an earlier bare number ("12 hours, 6 out of 10" -> 6); otherwise the first bare
+    number in range. Numbers above 10 are skipped rather than ending the search.
+    """
+    for pattern in (SEVERITY_SCALE_RE, SEVERITY_BARE_RE):
+        for m in pattern.finditer(text):
+            val = int(m.group(1))
+            if val <= 10:
+                return val
+    return None
+
+
 def llm_parse_symptom(user_text: str) -> Dict:
     """Extract symptom phrase + severity_0_10."""
     if not USE_LLM:
-        sev = 0
-        for k in range(10, -1, -1):
-            if f"{k}/10" in user_text or f"{k} out of 10" in user_text:
-                sev = k
-                break
+        # Highest explicit "N/10" rating wins, as before
+        sev = max((int(m.group(1)) for m in SEVERITY_SCALE_RE.finditer(user_text)
+                   if int(m.group(1)) <= 10), default=0)
         return {"symptom_text": user_text, "severity_0_10": sev}
     
     messages = [
@@ -96,7 +165,7 @@ def llm_parse_symptom(user_text: str) -> Dict:
         content = result[0] if isinstance(result, tuple) else result
         if not content:
             return {"symptom_text": user_text, "severity_0_10": None}
-        return json.loads(content.strip())
+        return loads_json(content.strip())
     except Exception:
         return {"symptom_text": user_text, "severity_0_10": None}
 
@@ -125,18 +194,24 @@ TRIAGE_ORANGE_FLAGS = [
 ]
 
 
+# Every flag pattern, matched in one pass over the text before the rules are walked
+_TRIAGE_TERMS = sorted({p for rule in TRIAGE_RED_FLAGS + TRIAGE_ORANGE_FLAGS for p in rule["pattern"]})
+_TRIAGE_MATCHER = _build_matcher(_TRIAGE_TERMS)
+
+
 def check_symptom_triage(symptoms: List[str], severity: Optional[int], text_lower: str) -> Tuple[str, List[str]]:
     """Check symptoms against RED/ORANGE flags. Returns (tier, matched_flags)."""
     if not symptoms:
         return "GREEN", []
     
-    text_blob = " ".join([s.lower() for s in symptoms])
+    text_blob = " ".join(s.lower() for s in symptoms)
     text_blob += " " + text_lower  # Include full text for pattern matching
+    hits = _matched_terms(_TRIAGE_TERMS, _TRIAGE_MATCHER, text_blob)
     
     # Check RED flags
     for rule in TRIAGE_RED_FLAGS:
         name, patt, thr = rule["name"], rule["pattern"], rule.get("threshold")
-        if any(p in text_blob for p in patt):
+        if any(p in hits for p in patt):
             if name == "fever_high" and thr is not None:
                 # Would need fever value to check threshold - skip for now
                 continue
@@ -151,7 +226,7 @@ def check_symptom_triage(symptoms: List[str], severity: Optional[int], text_lowe
         name, patt = rule["name"], rule["pattern"]
         rng = rule.get("range")
         thr = rule.get("threshold")
-        if any(p in text_blob for p in patt):
+        if any(p in hits for p in patt):
             if rng and severity is not None and name == "moderate_pain":
                 low, high = rng
                 if low <= severity <= high:
@@ -172,6 +247,17 @@ def evaluate_alert(db: DatabaseService, patient_id: str, canonical_symptom: str,
     return {"alert": alert, "tier": tier, "recent_count": count_recent}
 
 
+_DB: Optional[DatabaseService] = None
+
+
+def _get_db() -> DatabaseService:
+    """Reuse one DatabaseService across turns (symptom logs are still read from disk per query)."""
+    global _DB
+    if _DB is None:
+        _DB = DatabaseService()
+    return _DB
+
+
 def followup_node(state: VoiceAgentState) -> VoiceAgentState:
     """Follow-up agent node"""
     user_input = state.get("user_input", "")
@@ -183,7 +269,7 @@ def followup_node(state: VoiceAgentState) -> VoiceAgentState:
         state["response"] = response
         return state
     
-    db = DatabaseService()
+    db = _get_db()
     text_lower = user_input.lower()
     
     # Extract symptoms and severity using LLM for better detection
@@ -191,14 +277,7 @@ def followup_node(state: VoiceAgentState) -> VoiceAgentState:
     severity = None
     
     # Extract severity first
-    m = re.search(r'(\d+)\s*(?:out\s*of\s*10|/10)?', text_lower)
-    if m:
-        try:
-            val = int(m.group(1))
-            if 0 <= val <= 10:
-                severity = val
-        except Exception:
-            pass
+    severity = parse_severity(text_lower)
     
     # Use LLM to extract symptoms if available
     llm_provider = None
@@ -234,7 +313,7 @@ Return: ["symptom1", "symptom2", ...] or [] if no symptoms."""
                     latency_ms = None
                 if content:
                     try:
-                        llm_symptoms = json.loads(content.strip())
+                        llm_symptoms = loads_json(content.strip())
                         if isinstance(llm_symptoms, list):
                             # Normalize symptom names for better matching
                             normalized = []
@@ -255,22 +334,14 @@ Return: ["symptom1", "symptom2", ...] or [] if no symptoms."""
     
     # Fallback: keyword-based detection (expanded list, sorted by length descending to catch phrases first)
     if not symptoms:
-        symptom_keywords = [
-            "tightness in my chest", "pain in my chest", "chest tightness", "chest pain",
-            "shortness of breath", "trouble breathing", "short of breath",
-            "slurred speech", "dizziness", "breathless", "headache",
-            "pain", "fever", "dizzy", "cough", "fatigue", "tired", 
-            "tightness", "nausea", "ache", "swelling", "redness", 
-            "weakness", "numbness", "fainted", "syncope"
-        ]
-        for kw in symptom_keywords:
-            if kw in text_lower:
-                # Special handling: if "tightness" is found, check if it's chest-related
-                if kw == "tightness" and "chest" in text_lower:
-                    symptoms.append("chest tightness")
-                else:
-                    symptoms.append(kw)
-                break  # Found at least one, that's enough
+        i = _first_term(SYMPTOM_KEYWORDS, _KEYWORD_MATCHER, text_lower)
+        if i is not None:
+            kw = SYMPTOM_KEYWORDS[i]
+            # Special handling: if "tightness" is found, check if it's chest-related
+            if kw == "tightness" and "chest" in text_lower:
+                symptoms.append("chest tightness")
+            else:
+                symptoms.append(kw)
     
     if not symptoms:
         # More conversational response
@@ -294,10 +365,11 @@ Return: ["symptom1", "symptom2", ...] or [] if no symptoms."""
     
     # RED FLAG - Serious symptoms
     if triage_tier == "RED":
-        response = f"I understand you're experiencing {symptom_str}."
+        parts = [f"I understand you're experiencing {symptom_str}."]
         if severity is not None:
-            response += f" With a severity of {severity} out of 10,"
-        response += " this could be a serious symptom. Please go to the nearest emergency department immediately or call 911 if this is an emergency. I'm also alerting your healthcare provider right away."
+            parts.append(f" With a severity of {severity} out of 10,")
+        parts.append(" this could be a serious symptom. Please go to the nearest emergency department immediately or call 911 if this is an emergency. I'm also alerting your healthcare provider right away.")
+        response = "".join(parts)
         state["followup_response"] = response
         state["response"] = response
         
@@ -345,12 +417,13 @@ Return: ["symptom1", "symptom2", ...] or [] if no symptoms."""
     
     # ORANGE FLAG - Concerning symptoms
     if triage_tier == "ORANGE":
-        response = f"I've noted that you're experiencing {symptom_str}."
+        parts = [f"I've noted that you're experiencing {symptom_str}."]
         if severity is not None:
-            response += f" With a severity of {severity} out of 10,"
-        response += " I'm going to have a nurse call you today to review your symptoms and discuss next steps. They can help determine if you need to be seen sooner."
+            parts.append(f" With a severity of {severity} out of 10,")
+        parts.append(" I'm going to have a nurse call you today to review your symptoms and discuss next steps. They can help determine if you need to be seen sooner.")
         if len(unique_symptoms) > 1:
-            response += f" I also notice you reported {', '.join(unique_symptoms[:-1])} earlier this week."
+            parts.append(f" I also notice you reported {', '.join(unique_symptoms[:-1])} earlier this week.")
+        response = "".join(parts)
         state["followup_response"] = response
         state["response"] = response
         
@@ -397,24 +470,21 @@ Return: ["symptom1", "symptom2", ...] or [] if no symptoms."""
         return state
     
     # GREEN - Normal symptoms
-    if len(symptoms) == 1:
-        response = f"I've logged that you're experiencing {symptom_str}"
-    else:
-        response = f"I've logged that you're experiencing {symptom_str}"
-    
+    parts = [f"I've logged that you're experiencing {symptom_str}"]
     if severity is not None:
-        response += f" with a severity of {severity} out of 10"
-    response += "."
+        parts.append(f" with a severity of {severity} out of 10")
+    parts.append(".")
     
     if len(unique_symptoms) > 1:
-        response += f" I notice you also reported {', '.join(unique_symptoms[:-1])} earlier this week."
+        parts.append(f" I notice you also reported {', '.join(unique_symptoms[:-1])} earlier this week.")
     
     if severity and severity >= 7:
-        response += " Given the high severity, I'm going to notify your healthcare provider right away. Please seek immediate medical attention if your symptoms worsen."
+        parts.append(" Given the high severity, I'm going to notify your healthcare provider right away. Please seek immediate medical attention if your symptoms worsen.")
     elif severity and severity >= 5:
-        response += " I'll make sure your provider is aware of this. Is there anything else concerning you today?"
+        parts.append(" I'll make sure your provider is aware of this. Is there anything else concerning you today?")
     else:
-        response += " I've added this to your medical record, and your provider will review it during your next appointment."
+        parts.append(" I've added this to your medical record, and your provider will review it during your next appointment.")
+    response = "".join(parts)
     
     state["followup_response"] = response
     state["response"] = response
@@ -5,7 +5,7 @@ import os
 import json
 from ..state import VoiceAgentState
 from ..utils.llm_provider import chat_completion, USE_LLM, get_default_model
-from ..utils import say, now_iso
+from ..utils import say, now_iso, SentenceSpeaker
 
 # Load agent-specific policy
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -42,11 +42,14 @@ politely redirect them to how you can help with healthcare needs."""
             {"role": "user", "content": user_input}
         ]
         
+        # With voice on, speech starts at the first complete sentence of the streamed reply
+        speaker = SentenceSpeaker() if state.get("voice_enabled", False) else None
         try:
             result = chat_completion(
                 messages=messages, 
                 temperature=0.7,
-                model=get_default_model()
+                model=get_default_model(),
+                on_delta=speaker.feed if speaker is not None else None,
             )
             if result:
                 # Handle tuple return: (text, provider, model, latency_ms) or (text, provider, model)
@@ -97,8 +100,9 @@ politely redirect them to how you can help with healthcare needs."""
                     state["log_entry"] = log_entry
                     
                 # Output with TTS if enabled
-                if state.get("voice_enabled", False):
-                    say(response, voice=True)
+                if speaker is not None:
+                    say(response)
+                    speaker.finish(response or "")
                 return state
         except Exception as e:
             logger = get_conversation_logger()
@@ -1,12 +1,15 @@
 """
 Medication Agent Node - LangGraph implementation
 """
+import copy
+import functools
 import json
 import os
+import re
 from typing import Dict, Optional, Tuple
 import pandas as pd
 from ..state import VoiceAgentState
-from ..utils import now_iso, say
+from ..utils import loads_json, now_iso, say
 from ..utils.llm_provider import chat_completion, USE_LLM, get_default_model
 from ..utils.logging_utils import log_medication
 
@@ -31,28 +34,108 @@ KNOWLEDGE_PATH = os.path.join(DATA_DIR, "drug_knowledge.csv")
 LOG_DIR = os.path.join(BASE_DIR, "..", "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# Process-local caches of LLM answers: parses keyed by normalized question, risk keyed by the parse
+_PARSE_CACHE: Dict[str, Tuple[Dict, Optional[str], Optional[str]]] = {}
+_RISK_CACHE: Dict[str, Tuple[str, Optional[str], Optional[str]]] = {}
+_TRIAGE_CACHE: Dict[str, Tuple[Dict, str, Optional[str], Optional[str]]] = {}
+_LLM_CACHE_MAX = 1024
+_WS_RE = re.compile(r'\s+')
+
+
+def _norm(text: str) -> str:
+    """Cache key for a medication question: lowercased and whitespace-collapsed"""
+    return _WS_RE.sub(" ", text.strip().lower())
+
+
+def _cache_put(cache: Dict, key: str, value: Tuple) -> None:
+    if len(cache) >= _LLM_CACHE_MAX:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
+
+
+# Intent keyword classes for the rule parser, in priority order (first matching class wins)
+_INTENT_KEYWORDS = (
+    ("missed_dose", ("miss", "forgot")),
+    ("double_dose", ("double", "two doses")),
+    ("side_effect", ("side effect", "feel", "dizzy")),
+    ("interaction_check", ("interact", "together", "combine")),
+    ("instruction", ("how", "take", "food", "meal")),
+    ("contraindication", ("pregnan", "kidney", "liver")),
+    ("prescription_info", ("prescription", "dosage", "dose", "taking", "medication")),
+)
+
+# Stricter patterns that decide whether a question may skip the LLM parse. Matched on word
+# boundaries ("take" must not hit "mistake"). "with" only signals an interaction next to a
+# known drug name: "with metformin", or "aspirin with <anything but a meal>"
+_FAST_INTENT_KEYWORDS = (
+    ("double_dose", (r"double\w*", r"two doses", r"two pills", r"extra doses?", r"too many")),
+    ("interaction_check", (r"interact\w*", r"together", r"combin\w*", r"mix\w*", r"avoid\w*")),
+    ("contraindication", (r"pregnan\w*", r"kidneys?", r"liver", r"shouldn'?t", r"should not")),
+    ("missed_dose", (r"miss(?:ed|ing)?", r"forg[eo]t\w*", r"skip\w*", r"didn'?t take", r"did not take")),
+    ("side_effect", (r"side effects?", r"feel\w*", r"dizzy", r"watch out")),
+    ("instruction", (r"how", r"take", r"food", r"meals?")),
+    ("prescription_info", (r"prescriptions?", r"dosage", r"doses?", r"taking", r"medications?")),
+)
+# Only these intents may skip the LLM parse; anything riskier is left to the model
+_RULE_ONLY_INTENTS = frozenset({"instruction", "prescription_info"})
+
+
+def rule_parse_query(user_text: str) -> Tuple[str, int]:
+    """Keyword intent for a medication question, and how many intent classes matched"""
+    text = user_text.lower()
+    matched = [intent for intent, keywords in _INTENT_KEYWORDS if any(k in text for k in keywords)]
+    return (matched[0] if matched else "general", len(matched))
+
+
+@functools.lru_cache(maxsize=1)
+def _fast_intent_res(mtime: Optional[int]) -> Tuple[Tuple[str, "re.Pattern"], ...]:
+    """Compiled fast-path patterns; rebuilt when the drug knowledge file changes"""
+    drug_names = _load_drug_knowledge_cached(mtime)[1]
+    with_drug = ()
+    if drug_names:
+        drugs = "(?:" + "|".join(map(re.escape, drug_names)) + ")"
+        with_drug = (r"with (?:\w+ )?" + drugs,
+                     drugs + r" with (?!food|meals?|water|milk|breakfast|lunch|dinner)\w+")
+    res = []
+    for intent, patterns in _FAST_INTENT_KEYWORDS:
+        if intent == "interaction_check":
+            patterns = patterns + with_drug
+        res.append((intent, re.compile(r"\b(?:" + "|".join(patterns) + r")\b")))
+    return tuple(res)
+
+
+def _rule_parsed(user_text: str) -> Optional[Dict]:
+    """Rule-only parse when exactly one low-risk intent class matches; None if the LLM should decide"""
+    text = user_text.lower()
+    mtime = _mtime(KNOWLEDGE_PATH)
+    matched = [intent for intent, pattern in _fast_intent_res(mtime) if pattern.search(text)]
+    if len(matched) != 1 or matched[0] not in _RULE_ONLY_INTENTS:
+        return None
+    parsed = {"intent": matched[0], "language": "en"}
+    drug_names = _load_drug_knowledge_cached(mtime)[1]
+    drugs = [{"raw": name, "norm_name": name} for name in drug_names if name in text]
+    if len(drugs) > 1:
+        return None  # several drugs in one question may be an interaction
+    if drugs:
+        parsed["drugs_mentioned"] = drugs
+    return parsed
+
 
 def llm_parse_query(user_text: str) -> Tuple[Dict, Optional[str], Optional[str], Optional[int]]:
     """Use LLM to extract intent, drugs, and symptoms.
+    Unambiguous questions (one keyword intent class) are answered by the rules alone.
     Returns: (parsed_dict, provider, model) tuple"""
     if not USE_LLM:
-        text = user_text.lower()
-        intent = "general"
-        if "miss" in text or "forgot" in text:
-            intent = "missed_dose"
-        elif "double" in text or "two doses" in text:
-            intent = "double_dose"
-        elif "side effect" in text or "feel" in text or "dizzy" in text:
-            intent = "side_effect"
-        elif "interact" in text or "together" in text or "combine" in text:
-            intent = "interaction_check"
-        elif "how" in text or "take" in text or "food" in text or "meal" in text:
-            intent = "instruction"
-        elif "pregnan" in text or "kidney" in text or "liver" in text:
-            intent = "contraindication"
-        elif "prescription" in text or "dosage" in text or "dose" in text or "taking" in text or "medication" in text:
-            intent = "prescription_info"
-        return ({"intent": intent, "language": "en"}, None, None, None)
+        return ({"intent": rule_parse_query(user_text)[0], "language": "en"}, None, None, None)
+    
+    parsed = _rule_parsed(user_text)
+    if parsed is not None:
+        return (parsed, None, None, None)
+    
+    key = _norm(user_text)
+    cached = _PARSE_CACHE.get(key)
+    if cached is not None:
+        return (copy.deepcopy(cached[0]), cached[1], cached[2], 0)
     
     sys_msg = {"role": "system", "content": "Return ONLY valid JSON. No prose."}
     user = {
@@ -85,7 +168,11 @@ Question: "{user_text}"
             latency_ms = None
         if not content:
             return ({"intent": "general", "language": "en"}, provider, model, latency_ms)
-        return (json.loads(content.strip()), provider, model, latency_ms)
+        parsed = loads_json(content.strip())
+        # Only real LLM answers are cached, never the fallbacks
+        if provider is not None:
+            _cache_put(_PARSE_CACHE, key, (copy.deepcopy(parsed), provider, model))
+        return (parsed, provider, model, latency_ms)
     except Exception:
         return ({"intent": "general", "language": "en"}, None, None, None)
 
@@ -101,6 +188,14 @@ def llm_score_risk(parsed: Dict) -> Tuple[str, Optional[str], Optional[str], Opt
             return ("ORANGE", None, None, None)
         return ("GREEN", None, None, None)
     
+    try:
+        key = json.dumps(parsed, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        key = None
+    cached = _RISK_CACHE.get(key) if key is not None else None
+    if cached is not None:
+        return (cached[0], cached[1], cached[2], 0)
+    
     messages = [
         {"role": "system", "content": "Return ONLY a single word: RED, ORANGE, or GREEN."},
         {"role": "user", "content": json.dumps(parsed, ensure_ascii=False)}
@@ -123,25 +218,110 @@ def llm_score_risk(parsed: Dict) -> Tuple[str, Optional[str], Optional[str], Opt
             latency_ms = None
         if not content:
             return ("GREEN", provider, model, latency_ms)
-        return (content.strip().upper(), provider, model, latency_ms)
+        risk = content.strip().upper()
+        if key is not None and provider is not None:
+            _cache_put(_RISK_CACHE, key, (risk, provider, model))
+        return (risk, provider, model, latency_ms)
     except Exception:
         return ("GREEN", None, None, None)
 
 
+def llm_triage_query(user_text: str) -> Tuple[Dict, str, Optional[str], Optional[str], Optional[int]]:
+    """Parse the question and score its risk in a single LLM call.
+    Unambiguous questions are parsed by the rules and only risk-scored by the LLM.
+    Returns: (parsed_dict, risk_level, provider, model, latency_ms) tuple"""
+    if not USE_LLM:
+        parsed = llm_parse_query(user_text)[0]
+        return (parsed, llm_score_risk(parsed)[0], None, None, None)
+    
+    parsed = _rule_parsed(user_text)
+    if parsed is not None:
+        # Risk stays with the LLM; rule parses are few and hit its cache after the first turn
+        risk, provider, model, latency_ms = llm_score_risk(parsed)
+        return (parsed, risk, provider, model, latency_ms)
+    
+    key = _norm(user_text)
+    cached = _TRIAGE_CACHE.get(key)
+    if cached is not None:
+        return (copy.deepcopy(cached[0]), cached[1], cached[2], cached[3], 0)
+    
+    sys_msg = {"role": "system", "content": "Return ONLY valid JSON. No prose."}
+    user = {
+        "role": "user",
+        "content": f"""
+Parse this medication question and assess its risk. Return JSON with:
+- intent: one of ["missed_dose","double_dose","side_effect","interaction_check","instruction","contraindication","prescription_info","general"]
+- drugs_mentioned: [{{"raw":string,"norm_name":string|null}}]
+- language: "en"
+- risk: one of ["RED","ORANGE","GREEN"]
+
+Question: "{user_text}"
+""",
+    }
+    try:
+        result = chat_completion(messages=[sys_msg, user], temperature=0, model=get_default_model(), json_mode=True)
+        if not result:
+            return ({"intent": "general", "language": "en"}, "GREEN", None, None, None)
+        # Handle tuple return: (text, provider, model, latency_ms) or (text, provider, model)
+        if isinstance(result, tuple):
+            if len(result) == 4:
+                content, provider, model, latency_ms = result
+            else:
+                content, provider, model = result[:3]
+                latency_ms = result[3] if len(result) > 3 else None
+        else:
+            content = result
+            provider = None
+            model = None
+            latency_ms = None
+        if not content:
+            return ({"intent": "general", "language": "en"}, "GREEN", provider, model, latency_ms)
+        parsed = loads_json(content.strip())
+        risk = str(parsed.pop("risk", "") or "").strip().upper()
+        if risk not in ("RED", "ORANGE", "GREEN"):
+            # Model skipped the risk field; score it separately rather than guess
+            risk, _, _, risk_latency = llm_score_risk(parsed)
+            latency_ms = (latency_ms or 0) + (risk_latency or 0)
+        if provider is not None:
+            _cache_put(_TRIAGE_CACHE, key, (copy.deepcopy(parsed), risk, provider, model))
+        return (parsed, risk, provider, model, latency_ms)
+    except Exception:
+        return ({"intent": "general", "language": "en"}, "GREEN", None, None, None)
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _load_drug_knowledge_cached(mtime: Optional[int]) -> Tuple[pd.DataFrame, Dict[str, dict]]:
+    """Knowledge table and its rows by lowercased drug name; re-read only when the file changes"""
+    if mtime is None:
+        return pd.DataFrame(), {}
+    df = pd.read_csv(KNOWLEDGE_PATH)
+    # The first row wins for duplicate names
+    by_name: Dict[str, dict] = {}
+    if "drug_name" in df.columns:
+        for row in df.to_dict("records"):
+            name = row["drug_name"]
+            if isinstance(name, str):
+                by_name.setdefault(name.lower(), row)
+    return df, by_name
+
+
 class MedicationService:
     def __init__(self):
         self.db = DatabaseService()
-        self.drug_knowledge = self._load_drug_knowledge()
+        self.drug_knowledge, self._drug_info_by_name = self._load_drug_knowledge()
     
-    def _load_drug_knowledge(self) -> pd.DataFrame:
-        if not os.path.exists(KNOWLEDGE_PATH):
-            return pd.DataFrame()
-        return pd.read_csv(KNOWLEDGE_PATH)
+    def _load_drug_knowledge(self) -> Tuple[pd.DataFrame, Dict[str, dict]]:
+        return _load_drug_knowledge_cached(_mtime(KNOWLEDGE_PATH))
     
     def _get_drug_info(self, name: str) -> Optional[dict]:
-        df = self.drug_knowledge
-        match = df[df["drug_name"].str.lower() == name.lower()]
-        return match.iloc[0].to_dict() if not match.empty else None
+        return self._drug_info_by_name.get(name.lower())
     
     def handle(self, patient_id: str, user_text: str, use_voice: bool = False) -> Tuple[str, Dict, str, Optional[str], Optional[str], Optional[int]]:
         """Handle medication query and return (response, parsed, risk, provider, model, latency_ms)"""
@@ -149,20 +329,13 @@ class MedicationService:
         if not patient:
             return ("Patient not found.", {}, "GREEN", None, None, None)
         
-        parsed, parse_provider, parse_model, parse_latency = llm_parse_query(user_text)
+        # Intent, drugs and risk come back from one LLM round-trip
+        parsed, risk, llm_provider, llm_model, total_latency = llm_triage_query(user_text)
         intent = parsed.get("intent", "general")
         
         prescriptions = self.db.get_prescriptions(patient_id)
         if not prescriptions:
-            return ("No prescriptions found for this patient.", parsed, "GREEN", parse_provider, parse_model, parse_latency)
-
-        risk, risk_provider, risk_model, risk_latency = llm_score_risk(parsed)
-
-        # Use provider/model from the last LLM call (risk scoring), or fallback to parse call
-        llm_provider = risk_provider or parse_provider
-        llm_model = risk_model or parse_model
-        # Sum latencies from both LLM calls
-        total_latency = (parse_latency or 0) + (risk_latency or 0) if (parse_latency or risk_latency) else None
+            return ("No prescriptions found for this patient.", parsed, "GREEN", llm_provider, llm_model, total_latency)
 
         # CRITICAL FIX: Only discuss medications that user asked about
         # Extract drug names mentioned in user's question
@@ -198,11 +371,13 @@ class MedicationService:
         if any(keyword in user_lower for keyword in hypoglycemia_keywords):
             # Override risk to RED - this is urgent
             risk = "RED"
-            urgent_response = "[URGENT - HYPOGLYCEMIA] Low blood sugar can be serious. "
-            urgent_response += "If you can, check your blood sugar level now. "
-            urgent_response += "Eat or drink 15g of fast-acting carbs (juice, glucose tablets, or candy). "
-            urgent_response += "I'm connecting you to a nurse RIGHT NOW for immediate guidance. "
-            urgent_response += "If you feel confused, have seizures, or can't swallow, call 911 immediately."
+            urgent_response = (
+                "[URGENT - HYPOGLYCEMIA] Low blood sugar can be serious. "
+                "If you can, check your blood sugar level now. "
+                "Eat or drink 15g of fast-acting carbs (juice, glucose tablets, or candy). "
+                "I'm connecting you to a nurse RIGHT NOW for immediate guidance. "
+                "If you feel confused, have seizures, or can't swallow, call 911 immediately."
+            )
             return (urgent_response, parsed, risk, llm_provider, llm_model, total_latency)
 
         responses = []
@@ -251,15 +426,26 @@ class MedicationService:
         if not responses:
             responses.append("I could not interpret your medication question clearly.")
         
-        combined = " ".join(responses)
         if risk == "RED":
-            combined = "[HIGH RISK] Please seek immediate medical care. " + combined
+            responses.insert(0, "[HIGH RISK] Please seek immediate medical care.")
         elif risk == "ORANGE":
-            combined = "[ALERT] Please contact your clinician soon. " + combined
+            responses.insert(0, "[ALERT] Please contact your clinician soon.")
+        combined = " ".join(responses)
         
         return (combined, parsed, risk, llm_provider, llm_model, total_latency)
 
 
+_SERVICE: Optional[MedicationService] = None
+
+
+def _get_service() -> MedicationService:
+    """Reuse one MedicationService across turns (patient tables and drug knowledge load once)."""
+    global _SERVICE
+    if _SERVICE is None:
+        _SERVICE = MedicationService()
+    return _SERVICE
+
+
 def medication_node(state: VoiceAgentState) -> VoiceAgentState:
     """Medication agent node"""
     user_input = state.get("user_input", "")
@@ -271,7 +457,7 @@ def medication_node(state: VoiceAgentState) -> VoiceAgentState:
         state["response"] = response
         return state
     
-    service = MedicationService()
+    service = _get_service()
     response, parsed, risk, llm_provider, llm_model, latency_ms = service.handle(
         patient_id, user_input, use_voice=state.get("voice_enabled", False)
     )
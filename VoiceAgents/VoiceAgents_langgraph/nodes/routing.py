@@ -1,52 +1,119 @@
 """
 Routing Node - Determines intent and routes to appropriate agent
 """
-import json
+import os
 import re
-from typing import Literal
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, Literal, Optional
 from ..state import VoiceAgentState
-from ..utils.llm_provider import chat_completion, USE_LLM, get_default_model
+from ..utils import loads_json, _log_fallback
+from ..utils.llm_provider import chat_completion, submit_llm_call, USE_LLM, get_default_model
+
+# Optional Aho-Corasick matcher; falls back to one compiled regex per keyword class
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 INTENT_LABELS = ["appointment", "followup", "medication", "caregiver", "help"]
 
+# Rule keywords per intent; any substring hit counts
+APPOINTMENT_KEYWORDS = ("appointment", "reschedule", "schedule", "cancel", "doctor", "visit",
+                        "check my appointment", "book", "next tuesday", "next week", "follow-up appointment")
+FOLLOWUP_KEYWORDS = (
+    "breathless", "shortness of breath", "symptom", "dizzy", "dizziness",
+    "pain", "fever", "tired", "fatigue", "weakness", "chest pain", "tightness", 
+    "feeling", "hurt", "ache", "nausea", "cough"
+)
+SCHEDULING_KEYWORDS = ("schedule", "appointment", "book", "reschedule")
+MEDICATION_KEYWORDS = ("med", "medication", "pill", "dose", "dosage", "prescription", "taking", "side effect",
+                       "missed dose", "take with food", "what medication", "my medication")
+CAREGIVER_KEYWORDS = ("caregiver", "weekly summary", "check on them", "update for parent", "mother", "father")
+
+
+def _keyword_re(keywords) -> re.Pattern:
+    """One compiled alternation, so a keyword class is checked in a single scan"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+# Keyword classes checked by the rules, in no particular order (priority lives in parse_intent_rules)
+_KEYWORD_CLASSES = (
+    ("appointment", APPOINTMENT_KEYWORDS),
+    ("followup", FOLLOWUP_KEYWORDS),
+    ("scheduling", SCHEDULING_KEYWORDS),
+    ("medication", MEDICATION_KEYWORDS),
+    ("caregiver", CAREGIVER_KEYWORDS),
+)
+_CLASS_RES = {name: _keyword_re(keywords) for name, keywords in _KEYWORD_CLASSES}
+
+
+def _build_keyword_automaton():
+    """One automaton over every class's keywords, each mapped to (keyword, classes); None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    classes_of: Dict[str, list] = {}
+    for name, keywords in _KEYWORD_CLASSES:
+        for kw in keywords:
+            classes_of.setdefault(kw, []).append(name)
+    automaton = ahocorasick.Automaton()
+    for kw, names in classes_of.items():
+        automaton.add_word(kw, (kw, tuple(names)))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AC = _build_keyword_automaton()
+_PID_RE = re.compile(r"\b(\d{8})\b")
+_WS_RE = re.compile(r"\s+")
+
+# Process-local cache of LLM routing results keyed by normalized text (ids included, so never shared across patients)
+_INTENT_CACHE: Dict[str, dict] = {}
+_INTENT_CACHE_MAX = 512
+_INTENT_CACHE_MAX_LEN = 200  # longer messages are rarely repeated verbatim
+# Seconds to wait for the routing LLM before falling back to the keyword rules
+# (VOICEAGENTS_ROUTING_TIMEOUT_S; typical classification latency is 2-4 s)
+try:
+    _LLM_TIMEOUT_S = float(os.getenv("VOICEAGENTS_ROUTING_TIMEOUT_S", "8.0"))
+except ValueError:
+    _LLM_TIMEOUT_S = 8.0
+
 
 def parse_intent_rules(text: str) -> dict:
     """Rule-based intent parsing fallback"""
     t = text.lower()
     intent = "help"
     
+    if _KEYWORD_AC is not None:
+        # Every class hit in a single pass over the text
+        found = {name for _, (_, names) in _KEYWORD_AC.iter(t) for name in names}
+        has = found.__contains__
+    else:
+        has = lambda name: _CLASS_RES[name].search(t) is not None
+    
     # Priority: appointment keywords first (since scheduling can include symptoms)
-    if any(k in t for k in ["appointment", "reschedule", "schedule", "cancel", "doctor", "visit", 
-                            "check my appointment", "book", "next tuesday", "next week", "follow-up appointment"]):
+    if has("appointment"):
         intent = "appointment"
-    elif any(k in t for k in [
-        "breathless", "shortness of breath", "symptom", "dizzy", "dizziness",
-        "pain", "fever", "tired", "fatigue", "weakness", "chest pain", "tightness", 
-        "feeling", "hurt", "ache", "nausea", "cough"
-    ]):
+    elif has("followup"):
         # Only route to followup if NOT about scheduling
-        if not any(k in t for k in ["schedule", "appointment", "book", "reschedule"]):
+        if not has("scheduling"):
             intent = "followup"
         else:
             intent = "appointment"  # If mentions both, prioritize appointment
-    elif any(k in t for k in ["med", "medication", "pill", "dose", "dosage", "prescription", "taking", "side effect", "missed dose", "take with food", "what medication", "my medication"]):
+    elif has("medication"):
         intent = "medication"
-    elif any(k in t for k in ["caregiver", "weekly summary", "check on them", "update for parent", "mother", "father"]):
+    elif has("caregiver"):
         intent = "caregiver"
     
     pid = None
-    m = re.search(r"\b(\d{8})\b", text)
+    m = _PID_RE.search(text)
     if m:
         pid = m.group(1)
     
     return {"intent": intent, "patient_id": pid}
 
 
-def parse_intent_llm(text: str) -> dict:
-    """Use LLM to classify user intent"""
-    if not USE_LLM:
-        return parse_intent_rules(text)
-    
+def _llm_classify(text: str) -> Optional[dict]:
+    """Ask the LLM for {"intent", "patient_id"}; None if no usable answer came back"""
     SYSTEM_PROMPT = """
     You are a routing assistant for a healthcare voice triage system.
     Classify this patient message into one of:
@@ -63,26 +130,130 @@ def parse_intent_llm(text: str) -> dict:
     {"intent": "appointment", "patient_id": "10004235"}
     """
     
-    try:
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT.strip()},
-            {"role": "user", "content": text}
-        ]
-        result = chat_completion(messages=messages, temperature=0, model=get_default_model())
-        if not result:
-            return parse_intent_rules(text)
-        # Handle tuple return: (text, provider, model)
-        if isinstance(result, tuple):
-            raw, provider, model = result
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT.strip()},
+        {"role": "user", "content": text}
+    ]
+    result = chat_completion(messages=messages, temperature=0, model=get_default_model())
+    if not result:
+        return None
+    # Handle tuple return: (text, provider, model, latency_ms) or (text, provider, model)
+    raw = result[0] if isinstance(result, tuple) else result
+    if not raw:
+        return None
+    return loads_json(raw.strip())
+
+
+def _keyword_spans(t: str) -> Dict[str, list]:
+    """(start, end, keyword) of every keyword occurrence in t (already lowercased), per class"""
+    spans = {name: [] for name, _ in _KEYWORD_CLASSES}
+    if _KEYWORD_AC is not None:
+        for end, (kw, names) in _KEYWORD_AC.iter(t):
+            for name in names:
+                spans[name].append((end - len(kw) + 1, end + 1, kw))
+        return spans
+    for name, keywords in _KEYWORD_CLASSES:
+        for kw in keywords:
+            i = t.find(kw)
+            while i != -1:
+                spans[name].append((i, i + len(kw), kw))
+                i = t.find(kw, i + 1)
+    return spans
+
+
+def _cue_count(t: str, spans: list) -> int:
+    """
+    Distinct keyword cues at separate word positions. Hits are widened to whole words
+    and overlapping ones merged, so "appointments" or "reschedule" count once.
+    """
+    widened = []
+    for start, end, kw in spans:
+        while start > 0 and t[start - 1].isalnum():
+            start -= 1
+        while end < len(t) and t[end].isalnum():
+            end += 1
+        widened.append((start, end, kw))
+    widened.sort()
+    
+    groups = []  # [start, end, longest keyword in the group]
+    for start, end, kw in widened:
+        if groups and start < groups[-1][1]:
+            group = groups[-1]
+            group[1] = max(group[1], end)
+            if len(kw) > len(group[2]):
+                group[2] = kw
         else:
-            raw = result
-            provider = None
-            model = None
-        if not raw:
-            return parse_intent_rules(text)
-        out = json.loads(raw.strip())
-        # Store provider/model info in the result for potential logging
-        # (Note: routing node doesn't set log_entry, but this info could be used if needed)
+            groups.append([start, end, kw])
+    return len({group[2] for group in groups})
+
+
+def _is_clear_rule_match(t: str, intent: str) -> bool:
+    """
+    True when the rules intent needs no LLM: two or more distinct keyword cues of its
+    class at separate word positions, and none of any other class (mixed inputs are left to the LLM).
+    """
+    if intent == "help":
+        return False
+    spans = _keyword_spans(t)
+    if _cue_count(t, spans[intent]) < 2:
+        return False
+    # Scheduling words all belong to the appointment class too, so they don't count as mixed
+    return not any(found for name, found in spans.items() if name not in (intent, "scheduling"))
+
+
+def _prepare_agent(intent: str) -> None:
+    """Build the (cached) service of the likely agent node, so its first turn doesn't load CSVs"""
+    try:
+        if intent == "medication":
+            from .medication import _get_service
+            _get_service()
+        elif intent == "followup":
+            from .followup import _get_db
+            _get_db()
+        elif intent == "caregiver":
+            from .caregiver import _get_service
+            _get_service()
+    except Exception:
+        pass  # the node will report the problem when it runs
+
+
+def clear_rule_intent(text: str) -> Optional[str]:
+    """The rules intent when it is clear enough that routing will skip the LLM, else None"""
+    intent = parse_intent_rules(text)["intent"]
+    return intent if _is_clear_rule_match(_WS_RE.sub(" ", text.strip().lower()), intent) else None
+
+
+def prepare_for_partial(text: str) -> None:
+    """STT on_partial hook: warm the agent the rules predict from the words heard so far"""
+    _prepare_agent(parse_intent_rules(text)["intent"])
+
+
+def parse_intent_llm(text: str) -> dict:
+    """Use LLM to classify user intent"""
+    if not USE_LLM:
+        return parse_intent_rules(text)
+    
+    key = _WS_RE.sub(" ", text.strip().lower())
+    cacheable = len(key) <= _INTENT_CACHE_MAX_LEN
+    cached = _INTENT_CACHE.get(key) if cacheable else None
+    if cached is not None:
+        return dict(cached)
+    
+    # Unambiguous keyword inputs skip the LLM; otherwise the rules answer is the fallback
+    rules = parse_intent_rules(text)
+    if _is_clear_rule_match(key, rules["intent"]):
+        return rules
+    
+    future = submit_llm_call(_llm_classify, text)
+    # Load the data for the agent the rules predict while the LLM round-trip runs
+    _prepare_agent(rules["intent"])
+    try:
+        # A slow endpoint is abandoned after the timeout; the rules answer instead
+        out = future.result(timeout=_LLM_TIMEOUT_S)
+        if not isinstance(out, dict):
+            _log_fallback("parse_intent_llm", ValueError("no usable LLM classification"),
+                          {"fallback": "rules", "intent": rules["intent"]})
+            return rules
         intent = (out.get("intent") or "help").lower()
         if intent not in INTENT_LABELS:
             intent = "help"
@@ -90,23 +261,43 @@ def parse_intent_llm(text: str) -> dict:
         pid = out.get("patient_id")
         
         if intent == "help":
-            rule_fallback = parse_intent_rules(text)
-            return rule_fallback
-        
-        return {"intent": intent, "patient_id": pid}
-    except Exception:
-        return parse_intent_rules(text)
+            parsed = rules
+        else:
+            parsed = {"intent": intent, "patient_id": pid}
+    except FutureTimeout:
+        future.cancel()  # drops it if still queued; a running call finishes in the background
+        _log_fallback("parse_intent_llm", TimeoutError(f"no LLM answer within {_LLM_TIMEOUT_S}s"),
+                      {"fallback": "rules", "intent": rules["intent"]})
+        return rules
+    except Exception as e:
+        _log_fallback("parse_intent_llm", e, {"fallback": "rules", "intent": rules["intent"]})
+        return rules
+    
+    if cacheable:
+        if len(_INTENT_CACHE) >= _INTENT_CACHE_MAX:
+            _INTENT_CACHE.pop(next(iter(_INTENT_CACHE)))
+        _INTENT_CACHE[key] = dict(parsed)
+    return parsed
 
 
 def route_node(state: VoiceAgentState) -> VoiceAgentState:
     """Route node - parses intent and extracts patient ID"""
     user_text = state.get("user_input", "")
     
+    # Callers that already classified this input (the Streamlit app) pass the result in
+    if state.get("intent") in INTENT_LABELS:
+        return state
+    
     # Parse intent
     parsed = parse_intent_llm(user_text)
     intent = parsed.get("intent", "help")
     patient_id = parsed.get("patient_id") or state.get("patient_id")
     
+    # A speculative appointment parse started for this turn is not needed on other routes
+    if intent != "appointment":
+        from .appointment import discard_prefetched
+        discard_prefetched()
+    
     # Update state
     state["intent"] = intent
     state["patient_id"] = patient_id
@@ -1,9 +1,8 @@
 # streamlit_app.py
 # Streamlit UI for LangGraph VoiceAgents system
 
+import os
 import sys
-import json
-import tempfile
 from pathlib import Path
 import streamlit as st
 
@@ -17,14 +16,15 @@ if str(PARENT) not in sys.path:
 
 # --- import LangGraph workflow ---
 try:
-    from VoiceAgents_langgraph.workflow import voice_agent_workflow
+    from VoiceAgents_langgraph.workflow import invoke_with_reply_cache
     from VoiceAgents_langgraph.state import VoiceAgentState
     from VoiceAgents_langgraph.nodes.routing import (
-        parse_intent_llm, parse_intent_rules
+        parse_intent_llm, parse_intent_rules, prepare_for_partial
     )
-    from VoiceAgents_langgraph.utils import stt_transcribe, now_iso
+    from VoiceAgents_langgraph.utils import stt_transcribe, wav_buffer, now_iso
     from VoiceAgents_langgraph.utils.logging_utils import (
-        log_orchestration, setup_console_logging, log_turn_summary
+        log_orchestration, setup_console_logging, flush_logs, read_log_tail,
+        log_user_turn, log_assistant_turn, log_system_error
     )
 except Exception as e:
     st.error(f"Failed to import LangGraph workflow: {e}")
@@ -56,14 +56,10 @@ def process_message(user_text: str, patient_id: str, voice_enabled: bool, sessio
     if "turn_index" not in st.session_state:
         st.session_state.turn_index = 0
     
-    user_turn_idx = st.session_state.turn_index * 2  # User turns are even (0, 2, 4...)
-    
     # Log user turn to conversation_log.txt
-    log_turn_summary(
+    log_user_turn(
         timestamp=now_iso(),
         conversation_id=session_id,
-        turn_index=user_turn_idx,
-        role="user",
         message=user_text,
         input_channel="typed",  # Streamlit input is typed
     )
@@ -79,7 +75,7 @@ def process_message(user_text: str, patient_id: str, voice_enabled: bool, sessio
     initial_state: VoiceAgentState = {
         "user_input": user_text,
         "patient_id": detected_pid,
-        "intent": None,
+        "intent": detected_intent,  # route_node reuses this parse instead of repeating it
         "parsed_data": {},
         "appointment_response": None,
         "followup_response": None,
@@ -95,7 +91,7 @@ def process_message(user_text: str, patient_id: str, voice_enabled: bool, sessio
 
     try:
         with st.spinner("Processing..."):
-            final_state = voice_agent_workflow.invoke(initial_state)
+            final_state = invoke_with_reply_cache(initial_state, st.session_state.reply_cache)
             reply = final_state.get("response", "I'm sorry, I couldn't process that request.")
 
         st.session_state.chat.append({
@@ -114,27 +110,21 @@ def process_message(user_text: str, patient_id: str, voice_enabled: bool, sessio
         provider = log_entry_data.get("provider")
         model = log_entry_data.get("model")
         actions = log_entry_data.get("actions", {})
-        policies = log_entry_data.get("policies", {})
         latency_ms = log_entry_data.get("latency_ms")
         
-        assistant_turn_idx = st.session_state.turn_index * 2 + 1  # Assistant turns are odd (1, 3, 5...)
-        
         # TTS is not used in Streamlit (voice_enabled is False by default)
         tts_backend = None
         tts_used = 0
         
         # Log assistant turn to conversation_log.txt
-        log_turn_summary(
+        log_assistant_turn(
             timestamp=now_iso(),
             conversation_id=session_id,
-            turn_index=assistant_turn_idx,
-            role="assistant",
             agent=agent_name,
             provider=provider,
             model=model,
             message=reply,
             actions=actions,
-            policies=policies,
             used_llm=1 if (provider and model) else 0,
             latency_ms=latency_ms,
             tts_used=tts_used,
@@ -165,21 +155,28 @@ def process_message(user_text: str, patient_id: str, voice_enabled: bool, sessio
             "pid": detected_pid
         })
         
-        error_turn_idx = st.session_state.turn_index * 2 + 1
-        
         # Log error turn to conversation_log.txt
-        log_turn_summary(
+        log_system_error(
             timestamp=now_iso(),
             conversation_id=session_id,
-            turn_index=error_turn_idx,
-            role="system",
             agent="error",
             error=str(e),
         )
         
         st.error(error_msg)
 
-    st.rerun()
+
+def queue_message():
+    """Send-button callback: stash the composed message and clear the input before the rerun draws them"""
+    current_key = st.session_state.get('text_key', 0)
+    msg = st.session_state.get(f'compose_{current_key}', '').strip()
+    if not msg:
+        msg = st.session_state.compose_text.strip()
+    
+    if msg:
+        st.session_state.compose_text = ""
+        st.session_state.text_key = current_key + 1
+        st.session_state.pending_message = msg
 
 
 # --- page config ---
@@ -336,6 +333,8 @@ if "max_logs" not in st.session_state:
     st.session_state.max_logs = 10
 if "turn_index" not in st.session_state:
     st.session_state.turn_index = 0
+if "reply_cache" not in st.session_state:
+    st.session_state.reply_cache = {}
 
 # Sidebar - persistent settings
 with st.sidebar:
@@ -369,6 +368,17 @@ with st.sidebar:
 # Header
 st.markdown("<h1>VoiceAgents</h1>", unsafe_allow_html=True)
 
+# A message queued by the Send button is answered before the chat is drawn,
+# so the same run shows it (no st.rerun round-trip)
+pending_message = st.session_state.pop("pending_message", None)
+if pending_message:
+    process_message(
+        pending_message,
+        st.session_state.patient_id,
+        st.session_state.voice_enabled,
+        st.session_state.session_id
+    )
+
 # Conversation Area
 st.markdown("### Conversation")
 if st.session_state.chat:
@@ -401,6 +411,8 @@ if 'recording_status' not in st.session_state:
     st.session_state.recording_status = 'idle'
 if 'bg_stop' not in st.session_state:
     st.session_state.bg_stop = None
+if 'mic_energy_threshold' not in st.session_state:
+    st.session_state.mic_energy_threshold = None
 
 if st.session_state.recording_status == 'recording':
     st.markdown('<div class="recording-indicator"><b>● RECORDING</b> - Speak now...</div>', unsafe_allow_html=True)
@@ -442,8 +454,13 @@ with col1:
                 import speech_recognition as _sr
                 r = _sr.Recognizer()
                 m = _sr.Microphone(sample_rate=16000)
-                with m as source:
-                    r.adjust_for_ambient_noise(source, duration=0.5)
+                # Calibrate to background noise once per session, then reuse the threshold
+                if st.session_state.mic_energy_threshold is None:
+                    with m as source:
+                        r.adjust_for_ambient_noise(source, duration=0.5)
+                    st.session_state.mic_energy_threshold = r.energy_threshold
+                else:
+                    r.energy_threshold = st.session_state.mic_energy_threshold
 
                 buf, meta = [], {"sample_rate": 16000, "sample_width": 2, "channels": 1}
                 st.session_state.mic_buf = buf
@@ -477,20 +494,25 @@ with col1:
                     st.warning("No audio captured")
                     st.rerun()
 
-                tmp_path = Path(tempfile.gettempdir()) / "va_rec.wav"
                 meta = st.session_state.get('mic_meta', {"sample_rate": 16000, "sample_width": 2, "channels": 1})
-                
-                import wave
-                with wave.open(str(tmp_path), 'wb') as wf:
-                    wf.setnchannels(meta.get('channels', 1))
-                    wf.setsampwidth(meta.get('sample_width', 2))
-                    wf.setframerate(meta.get('sample_rate', 16000))
-                    for raw in chunks:
-                        wf.writeframes(raw)
-
-                transcribed = stt_transcribe(str(tmp_path))
+                # Build the WAV in memory; stt_transcribe reads it without a temp file
+                wav = wav_buffer(
+                    chunks,
+                    meta.get('sample_width', 2),
+                    meta.get('sample_rate', 16000),
+                    meta.get('channels', 1),
+                )
+
+                partial_box = st.empty()
+
+                def _on_partial(text):
+                    # Show what's been decoded so far and warm the agent it points to
+                    partial_box.caption(f"Heard so far: {text}")
+                    prepare_for_partial(text)
+
+                transcribed = stt_transcribe(wav, on_partial=_on_partial)
+                partial_box.empty()
                 st.session_state.mic_buf = []
-                tmp_path.unlink(missing_ok=True)
 
                 if transcribed:
                     # Fill the input area with transcript
@@ -510,41 +532,28 @@ with col1:
 
 with col2:
      # Send button (same size/color as others)
-     if st.button("Send", type="primary", use_container_width=True, key="send_btn"):
-        # Get message from current input or session state
-        current_key = st.session_state.get('text_key', 0)
-        input_key = f'compose_{current_key}'
-        msg = st.session_state.get(input_key, '').strip()
-        if not msg:
-            msg = st.session_state.compose_text.strip()
-        
-        if msg:
-            st.session_state.compose_text = ""
-            st.session_state.text_key = current_key + 1
-            process_message(
-                msg, 
-                st.session_state.patient_id, 
-                st.session_state.voice_enabled, 
-                st.session_state.session_id
-            )
-        else:
-            st.warning("Please enter a message")
+     # queue_message runs before the rerun; the message is processed above the chat
+     if st.button("Send", type="primary", use_container_width=True, key="send_btn",
+                  on_click=queue_message) and not pending_message:
+        st.warning("Please enter a message")
 
 # Logs section
 if st.session_state.show_logs:
     st.markdown("---")
     st.markdown("### System Logs")
     logs = []
+    flush_logs()  # entries from the last turn may still be queued for the writer thread
     if ORCH_LOG.exists():
         try:
-            with open(ORCH_LOG) as f:
-                for line in f:
-                    if line.strip():
-                        try:
-                            logs.append(json.loads(line))
-                        except:
-                            pass
-            logs = logs[-st.session_state.max_logs:]
+            # Re-read only when the file or the requested count changed since the last rerun
+            stat = ORCH_LOG.stat()
+            key = (stat.st_mtime_ns, stat.st_size, st.session_state.max_logs)
+            cached = st.session_state.get("_log_tail_cache")
+            if cached is not None and cached[0] == key:
+                logs = cached[1]
+            else:
+                logs = read_log_tail(ORCH_LOG, st.session_state.max_logs)
+                st.session_state._log_tail_cache = (key, logs)
         except Exception as e:
             st.warning(f"Could not read logs: {e}")
 
@@ -0,0 +1,114 @@
+"""
+Tests for the appointment parse fast paths: the id-only shortcut, the process-local
+parse cache and the opt-in on-disk LLM response cache (off by default, TTL and row-capped)
+"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph.nodes import appointment  # noqa: E402
+
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    """Fake appointment LLM writing its cache under tmp_path; inspect .calls"""
+    class FakeLLM:
+        calls = []
+
+    def fake_completion(messages, **kwargs):
+        FakeLLM.calls.append(messages[-1]["content"])
+        return ('{"action": "reschedule", "patient_id": "10000001", "preferred_date": null}', "fake", "m", 9)
+
+    monkeypatch.setattr(appointment, "USE_LLM", True)
+    monkeypatch.setattr(appointment, "chat_completion", fake_completion)
+    monkeypatch.setattr(appointment, "_PARSE_CACHE", {})
+    monkeypatch.setattr(appointment, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(appointment, "_llm_cache_con", None)
+    monkeypatch.setattr(appointment, "_llm_cache_failed", False)
+    FakeLLM.calls = []
+    FakeLLM.path = tmp_path / "llm_cache.sqlite3"
+    yield FakeLLM
+    if appointment._llm_cache_con is not None:
+        appointment._llm_cache_con.close()
+
+
+def cached_keys():
+    return [row[0] for row in appointment._llm_cache_con.execute("SELECT key FROM llm_cache ORDER BY ts")]
+
+
+class TestIdOnlyFastPath:
+    """Only a bare id skips the LLM parse; symptoms and requests never do"""
+
+    @pytest.mark.parametrize("text", ["10004235", "10004235.", "I am 10004235", "id: 10004235!"])
+    def test_bare_id_skips_llm(self, llm, text):
+        parsed, provider, _, _ = appointment.parse_patient_input(text, None)
+        assert parsed["action"] == "check_status"
+        assert parsed["patient_id"] == "10004235"
+        assert provider is None
+        assert llm.calls == []
+
+    @pytest.mark.parametrize("text", ["10004235 numbness", "10004235 fainted", "10004235 swelling, ooze"])
+    def test_flag_terms_go_to_llm_parse(self, llm, text):
+        assert not appointment._is_id_only(text, appointment._PID_RE.search(text))
+        appointment.parse_patient_input(text, None)
+        assert len(llm.calls) == 1
+
+    @pytest.mark.parametrize("text", ["move 10004235 tomorrow", "push 10004235 to friday", "10004235 next week"])
+    def test_short_reschedule_goes_to_llm_parse(self, llm, text):
+        assert not appointment._is_id_only(text, appointment._PID_RE.search(text))
+        parsed, _, _, _ = appointment.parse_patient_input(text, None)
+        assert parsed["action"] == "reschedule"
+        assert len(llm.calls) == 1
+
+
+class TestParseCache:
+
+    def test_repeat_input_hits_parse_cache_without_leaking_id(self, llm):
+        first, _, _, _ = appointment.parse_patient_input("I need to reschedule my appointment", None)
+        second, provider, _, latency_ms = appointment.parse_patient_input(
+            "I need to  reschedule my appointment ", "20000002")
+        assert first["patient_id"] == "10000001"
+        assert second["patient_id"] == "20000002"
+        assert provider == "fake"
+        assert latency_ms == 0
+        assert len(llm.calls) == 1
+
+
+class TestDiskCache:
+
+    def test_disk_cache_is_off_by_default(self, llm, monkeypatch):
+        monkeypatch.setattr(appointment, "LLM_DISK_CACHE", False)
+        appointment.llm_json("prompt")
+        appointment.llm_json("prompt")
+        assert len(llm.calls) == 2
+        assert not llm.path.exists()
+
+    def test_enabled_cache_answers_repeat_prompt(self, llm, monkeypatch):
+        monkeypatch.setattr(appointment, "LLM_DISK_CACHE", True)
+        appointment.llm_json("prompt")
+        parsed, provider, _, latency_ms = appointment.llm_json("prompt")
+        assert parsed["action"] == "reschedule"
+        assert (provider, latency_ms) == ("fake", 0)
+        assert len(llm.calls) == 1
+
+    def test_expired_rows_are_ignored_and_pruned(self, llm, monkeypatch):
+        monkeypatch.setattr(appointment, "LLM_DISK_CACHE", True)
+        monkeypatch.setattr(appointment, "_LLM_CACHE_TTL_S", 60.0)
+        appointment.llm_json("old prompt")
+        old_key = cached_keys()[0]
+        with appointment._llm_cache_con:
+            appointment._llm_cache_con.execute("UPDATE llm_cache SET ts = ts - 120")
+        assert appointment._llm_cache_get(old_key) is None
+        appointment.llm_json("new prompt")
+        assert old_key not in cached_keys()
+        assert len(cached_keys()) == 1
+
+    def test_row_cap_keeps_newest(self, llm, monkeypatch):
+        monkeypatch.setattr(appointment, "LLM_DISK_CACHE", True)
+        monkeypatch.setattr(appointment, "_LLM_CACHE_MAX_ROWS", 3)
+        for i in range(5):
+            appointment._llm_cache_put(f"k{i}", "fake", "m", "{}")
+        assert sorted(cached_keys()) == ["k2", "k3", "k4"]
@@ -0,0 +1,125 @@
+"""
+Tests for in-memory audio: wav_buffer(), stt_transcribe() on file-like objects and
+the Google fallback in mic_listen_once()
+"""
+import sys
+import os
+import wave
+from types import SimpleNamespace
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph import utils  # noqa: E402
+
+FRAMES = [b"\x00\x01" * 800, b"\x02\x03" * 800]
+
+
+class TestWavBuffer:
+
+    def test_buffer_is_a_readable_wav(self):
+        buf = utils.wav_buffer(FRAMES, sample_width=2, sample_rate=16000)
+        assert buf.name == "audio.wav"
+        assert buf.tell() == 0
+        with wave.open(buf, "rb") as wf:
+            assert (wf.getnchannels(), wf.getsampwidth(), wf.getframerate()) == (1, 2, 16000)
+            assert wf.readframes(wf.getnframes()) == b"".join(FRAMES)
+
+
+class TestInMemoryTranscribe:
+
+    @pytest.fixture
+    def whisper(self, monkeypatch):
+        """Fake local faster-whisper model; the API backend is disabled"""
+        class FakeModel:
+            seen = []
+
+            def transcribe(self, audio, **kwargs):
+                # The model gets the buffer itself, rewound, not a temp-file path
+                FakeModel.seen.append((audio, audio.tell()))
+                return iter([SimpleNamespace(text=" I missed "), SimpleNamespace(text="my dose ")]), None
+
+        monkeypatch.setattr(utils, "USE_LLM", False)
+        monkeypatch.setattr(utils, "FW_AVAILABLE", True)
+        monkeypatch.setattr(utils, "_get_faster_whisper_model", lambda: FakeModel())
+        FakeModel.seen = []
+        return FakeModel
+
+    def test_transcribes_buffer_without_temp_file(self, whisper):
+        buf = utils.wav_buffer(FRAMES, sample_width=2, sample_rate=16000)
+        buf.read()
+        assert utils.stt_transcribe(buf) == "I missed my dose"
+        assert whisper.seen == [(buf, 0)]
+
+    def test_partials_are_reported_per_segment(self, whisper):
+        partials = []
+        buf = utils.wav_buffer(FRAMES, sample_width=2, sample_rate=16000)
+        utils.stt_transcribe(buf, on_partial=partials.append)
+        assert partials == ["I missed", "I missed my dose"]
+
+    def test_missing_path_returns_empty(self, whisper, tmp_path):
+        assert utils.stt_transcribe(str(tmp_path / "none.wav")) == ""
+        assert whisper.seen == []
+
+
+class TestMicGoogleFallback:
+    """When Whisper gives nothing, Google is retried once on a transient error only"""
+
+    @pytest.fixture
+    def mic(self, monkeypatch):
+        class RequestError(Exception):
+            pass
+
+        class UnknownValueError(Exception):
+            pass
+
+        class Microphone:
+            def __init__(self, sample_rate):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        class Recognizer:
+            errors = []
+            calls = 0
+
+            def listen(self, source, timeout, phrase_time_limit):
+                return SimpleNamespace(get_raw_data=lambda: FRAMES[0], sample_width=2, sample_rate=16000)
+
+            def recognize_google(self, audio, **kwargs):
+                Recognizer.calls += 1
+                if Recognizer.errors:
+                    raise Recognizer.errors.pop(0)
+                return "refill my insulin"
+
+        fake_sr = SimpleNamespace(Microphone=Microphone, RequestError=RequestError,
+                                  UnknownValueError=UnknownValueError,
+                                  WaitTimeoutError=type("WaitTimeoutError", (Exception,), {}))
+        monkeypatch.setattr(utils, "_get_sr", lambda: fake_sr)
+        monkeypatch.setattr(utils, "_get_mic_recognizer", lambda sr: Recognizer())
+        monkeypatch.setattr(utils, "_MIC_CALIBRATED", True)
+        monkeypatch.setattr(utils, "stt_transcribe", lambda audio, on_partial=None: "")
+        return fake_sr, Recognizer
+
+    def test_transient_error_is_retried_once(self, mic):
+        sr, recognizer = mic
+        recognizer.errors = [sr.RequestError("network")]
+        assert utils.mic_listen_once() == "refill my insulin"
+        assert recognizer.calls == 2
+
+    def test_gives_up_after_second_transient_error(self, mic):
+        sr, recognizer = mic
+        recognizer.errors = [sr.RequestError("network"), sr.RequestError("network")]
+        assert utils.mic_listen_once() == ""
+        assert recognizer.calls == 2
+
+    def test_unintelligible_audio_is_not_retried(self, mic):
+        sr, recognizer = mic
+        recognizer.errors = [sr.UnknownValueError()]
+        assert utils.mic_listen_once() == ""
+        assert recognizer.calls == 1
@@ -0,0 +1,75 @@
+"""
+Tests for caregiver summaries: med-log tallies follow med_logs.csv in a long-lived
+service, and the weekly sweep appends its summaries to the logs in order
+"""
+import sys
+import os
+import json
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph.nodes import caregiver  # noqa: E402
+from VoiceAgents_langgraph.utils import logging_utils  # noqa: E402
+
+
+@pytest.fixture
+def service(tmp_path):
+    """CaregiverService reading med_logs.csv from tmp_path, and a consenting patient id"""
+    svc = caregiver.CaregiverService()
+    svc._med_logs_path = str(tmp_path / "med_logs.csv")
+    records = svc.summarize_weekly_all()
+    if not records:
+        pytest.skip("no patient with a consenting caregiver in the sample data")
+    return svc, records[0]["patient_id"]
+
+
+def write_med_logs(path, pid, statuses, mtime_ns):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("patient_id,drug_name,status\n")
+        f.writelines(f"{pid},metformin,{status}\n" for status in statuses)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestMedLogRefresh:
+
+    def test_missing_med_log_counts_nothing(self, service):
+        svc, pid = service
+        assert svc.summarize_one(pid)["missed_doses"] == 0
+
+    def test_tallies_reload_when_file_changes(self, service):
+        svc, pid = service
+        write_med_logs(svc._med_logs_path, pid, ["taken", "Missed"], 1_000_000_000_000)
+        assert svc.summarize_one(pid)["missed_doses"] == 1
+        write_med_logs(svc._med_logs_path, pid, ["missed", "missed", "missed", "taken"], 2_000_000_000_000)
+        rec = svc.summarize_one(pid)
+        assert rec["missed_doses"] == 3
+        assert rec["risk_level"] == "HIGH"
+
+
+class TestWeeklySweepLogs:
+
+    def test_sweep_logs_every_summary_in_order(self, service, monkeypatch, tmp_path):
+        svc, _ = service
+        jsonl, txt = tmp_path / "caregiver_summaries.jsonl", tmp_path / "caregiver_summaries.txt"
+        monkeypatch.setattr(logging_utils, "CAREGIVER_LOG", str(jsonl))
+        monkeypatch.setattr(logging_utils, "CAREGIVER_TXT", str(txt))
+        # One summary per batch, so ordering across queued batches is exercised
+        monkeypatch.setattr(caregiver, "SWEEP_LOG_CHUNK", 1)
+        records = svc.summarize_weekly_all(write_logs=True)
+        logging_utils.flush_logs()
+        
+        with open(jsonl, encoding="utf-8") as f:
+            logged = [json.loads(line) for line in f]
+        assert [r["context"]["patient_id"] for r in logged] == [r["patient_id"] for r in records]
+        assert txt.read_text(encoding="utf-8") == "".join(r["summary_text"] + "\n\n" for r in records)
+        # Logging normalizes copies; the returned records keep their "ts" key
+        assert all("ts" in r for r in records)
+
+    def test_sweep_without_write_logs_writes_nothing(self, service, monkeypatch, tmp_path):
+        svc, _ = service
+        monkeypatch.setattr(logging_utils, "CAREGIVER_LOG", str(tmp_path / "caregiver_summaries.jsonl"))
+        svc.summarize_weekly_all()
+        logging_utils.flush_logs()
+        assert not (tmp_path / "caregiver_summaries.jsonl").exists()
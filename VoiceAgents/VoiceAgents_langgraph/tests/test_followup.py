@@ -0,0 +1,33 @@
+"""
+Tests for follow-up severity parsing
+"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph.nodes import followup  # noqa: E402
+
+
+class TestParseSeverity:
+    """An explicit 0-10 rating beats bare numbers; out-of-range numbers are skipped"""
+
+    @pytest.mark.parametrize("text,severity", [
+        ("pain 7/10, yesterday 9/10", 7),
+        ("12 hours, 6 out of 10", 6),
+        ("dizzy for 2 days, 8 / 10", 8),
+        ("I feel dizzy 7", 7),
+        ("headache for 12 hours, about 5", 5),
+        ("headache for 12 hours", None),
+        ("no numbers here", None),
+    ])
+    def test_parse_severity(self, text, severity):
+        assert followup.parse_severity(text) == severity
+
+    def test_offline_symptom_parse_keeps_highest_rating(self, monkeypatch):
+        # Without an LLM the highest explicit rating is used, as in the original parser
+        monkeypatch.setattr(followup, "USE_LLM", False)
+        assert followup.llm_parse_symptom("pain 7/10, yesterday 9/10")["severity_0_10"] == 9
+        assert followup.llm_parse_symptom("12 hours of pain")["severity_0_10"] == 0
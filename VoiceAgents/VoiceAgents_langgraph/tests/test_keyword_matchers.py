@@ -0,0 +1,60 @@
+"""
+Tests that the optional Aho-Corasick keyword matchers (pyahocorasick) find exactly what the
+regex / substring fallbacks find. Skipped when pyahocorasick is not installed.
+"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+pytest.importorskip("ahocorasick")
+
+from VoiceAgents_langgraph.nodes import routing, followup  # noqa: E402
+
+TEXTS = [
+    "i need to reschedule my appointment next week",
+    "appointments",
+    "my chest pain is worse and i feel dizzy",
+    "can i take my medication with food? what medication is this",
+    "weekly summary for my mother please",
+    "book a visit with the doctor, i have a fever and a cough",
+    "pain, pain",
+    "shortness of breath and tightness in my chest",
+    "i fainted yesterday and have numbness in my arm",
+    "hello there",
+    "",
+]
+
+
+class TestRoutingAutomaton:
+
+    def test_automaton_is_built(self):
+        assert routing._build_keyword_automaton() is not None
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_matches_regex_fallback(self, text, monkeypatch):
+        monkeypatch.setattr(routing, "_KEYWORD_AC", routing._build_keyword_automaton())
+        with_ac = (routing.parse_intent_rules(text), routing._keyword_spans(text),
+                   {i: routing._is_clear_rule_match(text, i) for i in routing.INTENT_LABELS})
+        monkeypatch.setattr(routing, "_KEYWORD_AC", None)
+        fallback = (routing.parse_intent_rules(text), routing._keyword_spans(text),
+                    {i: routing._is_clear_rule_match(text, i) for i in routing.INTENT_LABELS})
+        assert with_ac[0] == fallback[0]
+        assert {name: sorted(spans) for name, spans in with_ac[1].items()} == \
+            {name: sorted(spans) for name, spans in fallback[1].items()}
+        assert with_ac[2] == fallback[2]
+
+
+class TestFollowupAutomaton:
+
+    @pytest.mark.parametrize("terms", [followup.SYMPTOM_KEYWORDS, followup._CODEBOOK_TERMS],
+                             ids=["symptom_keywords", "codebook"])
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_matches_substring_fallback(self, terms, text):
+        matcher = followup._build_matcher(terms)
+        assert matcher is not None
+        assert followup._matched_terms(terms, matcher, text) == followup._matched_terms(terms, None, text)
+        assert followup._first_term(terms, matcher, text) == followup._first_term(terms, None, text)
@@ -0,0 +1,105 @@
+"""
+Tests for the background log writer (ordering, caller-side encoding, error reporting),
+the turn-timestamp memo and reading the tail of a JSONL log
+"""
+import sys
+import os
+import json
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from VoiceAgents_langgraph.utils import logging_utils  # noqa: E402
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestLogWriter:
+    """Every log writer shares one queue, so lines land in call order"""
+
+    def test_entry_is_encoded_when_logged(self, tmp_path):
+        path = str(tmp_path / "entries.jsonl")
+        entry = {"turn": 1, "context": {"intent": "help"}}
+        logging_utils.log_to_file(path, entry)
+        entry["context"]["intent"] = "changed later"
+        logging_utils.flush_logs()
+        assert read_jsonl(path) == [{"turn": 1, "context": {"intent": "help"}}]
+
+    def test_writers_keep_call_order(self, tmp_path):
+        path = str(tmp_path / "mixed.jsonl")
+        for i in range(50):
+            logging_utils.log_to_file(path, {"i": i})
+            logging_utils.log_to_file_prebuilt(path, json.dumps({"i": i, "prebuilt": True}).encode())
+        logging_utils.flush_logs()
+        rows = read_jsonl(path)
+        assert [(r["i"], "prebuilt" in r) for r in rows] == [
+            (i, prebuilt) for i in range(50) for prebuilt in (False, True)
+        ]
+
+    def test_write_errors_are_reported(self, tmp_path, monkeypatch, capsys):
+        def failing_append(writes):
+            raise OSError("disk full")
+
+        before = logging_utils.log_write_errors()
+        monkeypatch.setattr(logging_utils, "_append_batch", failing_append)
+        logging_utils.log_to_file(str(tmp_path / "lost.jsonl"), {"i": 0})
+        logging_utils.flush_logs()
+        assert logging_utils.log_write_errors() == before + 1
+        assert "disk full" in capsys.readouterr().err
+
+
+    def test_caregiver_batch_is_one_write_per_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(logging_utils, "CAREGIVER_LOG", str(tmp_path / "cg.jsonl"))
+        monkeypatch.setattr(logging_utils, "CAREGIVER_TXT", str(tmp_path / "cg.txt"))
+        queued = []
+        monkeypatch.setattr(logging_utils, "_write", queued.append)
+        logging_utils.log_caregiver_batch(
+            [{"agent": "caregiver", "patient_id": str(i), "summary_text": f"s{i}"} for i in range(3)])
+        assert len(queued) == 1
+        writes = dict(queued[0])
+        assert len(queued[0]) == len(writes) == 2
+        logged = writes[str(tmp_path / "cg.jsonl")].splitlines()
+        assert [json.loads(line)["context"]["patient_id"] for line in logged] == ["0", "1", "2"]
+        assert writes[str(tmp_path / "cg.txt")] == b"s0\n\ns1\n\ns2\n\n"
+
+
+class TestTurnTimestamp:
+    """The single-slot memo must never pair one input with another input's output"""
+
+    def test_concurrent_callers_get_their_own_timestamp(self):
+        inputs = [f"2025-01-01T12:00:{i:02d}+00:00" for i in range(60)]
+        expected = {ts: ts[:19] + "Z" for ts in inputs}
+        wrong = []
+
+        def worker(offset):
+            for n in range(2000):
+                ts = inputs[(n + offset) % len(inputs)]
+                if logging_utils._format_turn_timestamp(ts) != expected[ts]:
+                    wrong.append(ts)
+
+        threads = [threading.Thread(target=worker, args=(k * 7,)) for k in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert wrong == []
+
+
+class TestReadLogTail:
+    """read_log_tail widens its window from the end of the file until it has enough records"""
+
+    def test_returns_last_records_across_windows(self, tmp_path):
+        path = tmp_path / "tail.jsonl"
+        path.write_bytes(b"".join(json.dumps({"i": i, "pad": "x" * 40}).encode() + b"\n" for i in range(200)))
+        # A 100-byte first window starts mid-line and holds under two records
+        rows = logging_utils.read_log_tail(str(path), 25, chunk_size=100)
+        assert [r["i"] for r in rows] == list(range(175, 200))
+
+    def test_short_file_and_bad_lines(self, tmp_path):
+        path = tmp_path / "short.jsonl"
+        path.write_bytes(b'{"i": 0}\nnot json\n\n{"i": 1}\n')
+        assert logging_utils.read_log_tail(str(path), 10) == [{"i": 0}, {"i": 1}]
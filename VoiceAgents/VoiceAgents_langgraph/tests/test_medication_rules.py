@@ -0,0 +1,90 @@
+"""
+Tests for the medication keyword parser and the rule fast path that skips the LLM parse
+"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph.nodes import medication  # noqa: E402
+
+
+class TestRuleParse:
+    """The offline keyword parser keeps its original classes and priority order"""
+
+    @pytest.mark.parametrize("text,intent", [
+        ("Is nausea normal with Metformin?", "general"),
+        ("I feel dizzy with my new pills", "side_effect"),
+        ("How do I take it with breakfast?", "instruction"),
+        ("I missed my dose, should I take two doses now?", "missed_dose"),
+    ])
+    def test_offline_intents_are_unchanged(self, text, intent):
+        assert medication.rule_parse_query(text)[0] == intent
+
+
+class TestRuleFastPath:
+    """Only a single low-risk intent under the stricter word-boundary patterns skips the LLM parse"""
+
+    def test_take_inside_mistake_is_not_instruction(self):
+        assert medication._rule_parsed("I took two pills of insulin by mistake") is None
+
+    def test_take_with_another_drug_goes_to_llm(self):
+        assert medication._rule_parsed("Can I take aspirin with ibuprofen?") is None
+        assert medication._rule_parsed("Is nausea normal with Metformin?") is None
+
+    def test_with_a_meal_is_instruction(self):
+        parsed = medication._rule_parsed("Should I take metformin with food?")
+        assert parsed["intent"] == "instruction"
+        assert parsed["drugs_mentioned"][0]["norm_name"] == "metformin"
+        assert medication._rule_parsed("How do I take it with breakfast?")["intent"] == "instruction"
+
+    @pytest.mark.parametrize("text", [
+        "I forgot my pill",
+        "Can I mix aspirin and insulin",
+        "I feel dizzy with my new pills",
+        "I missed my dose, should I take two doses now?",
+        "I didn't take my Insulin this morning",
+        "What drugs should I avoid while taking Furosemide?",
+        "Are there conditions where I shouldn't take this?",
+    ])
+    def test_high_risk_intent_goes_to_llm(self, text):
+        assert medication._rule_parsed(text) is None
+
+    def test_several_drugs_go_to_llm(self):
+        assert medication._rule_parsed("How do I take aspirin and insulin?") is None
+
+
+class TestTriageFastPath:
+    """llm_triage_query only skips the parse/triage call for low-risk rule parses"""
+
+    @pytest.fixture
+    def llm_calls(self, monkeypatch):
+        calls = []
+
+        def fake_completion(messages, **kwargs):
+            calls.append(messages)
+            if kwargs.get("json_mode"):
+                return ('{"intent": "double_dose", "risk": "RED", "language": "en"}', "fake", "m", 7)
+            return ("GREEN", "fake", "m", 7)
+
+        monkeypatch.setattr(medication, "USE_LLM", True)
+        monkeypatch.setattr(medication, "chat_completion", fake_completion)
+        monkeypatch.setattr(medication, "_TRIAGE_CACHE", {})
+        monkeypatch.setattr(medication, "_RISK_CACHE", {})
+        return calls
+
+    def test_low_risk_question_skips_parse_call(self, llm_calls):
+        parsed, _, _, _, _ = medication.llm_triage_query("What is my dosage?")
+        assert parsed["intent"] == "prescription_info"
+        # Only the risk score went to the LLM
+        assert all("assess its risk" not in m[-1]["content"] for m in llm_calls)
+
+    def test_double_dose_uses_llm_triage(self, llm_calls):
+        parsed, risk, provider, _, _ = medication.llm_triage_query(
+            "I took two pills of insulin by mistake")
+        assert parsed["intent"] == "double_dose"
+        assert risk == "RED"
+        assert provider == "fake"
+        assert any("assess its risk" in m[-1]["content"] for m in llm_calls)
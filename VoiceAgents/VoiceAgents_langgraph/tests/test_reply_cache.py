@@ -0,0 +1,88 @@
+"""
+Tests for invoke_with_reply_cache: key normalization, cacheable intents,
+FIFO eviction and the latency reset on a hit
+"""
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph import workflow  # noqa: E402
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    """Fake compiled workflow; set .intent and inspect .calls"""
+    class FakeWorkflow:
+        intent = "help"
+        calls = []
+
+        def invoke(self, state):
+            FakeWorkflow.calls.append(state["user_input"])
+            return {**state, "intent": FakeWorkflow.intent,
+                    "response": f"reply {len(FakeWorkflow.calls)}",
+                    "log_entry": {"intent": FakeWorkflow.intent, "latency_ms": 250}}
+
+    spoken = []
+    monkeypatch.setattr(workflow, "voice_agent_workflow", FakeWorkflow(), raising=False)
+    monkeypatch.setattr(workflow, "say", lambda text, voice=False: spoken.append(text))
+    FakeWorkflow.calls = []
+    FakeWorkflow.spoken = spoken
+    return FakeWorkflow
+
+
+def make_state(user_input, patient_id="10004235", voice_enabled=False):
+    return {"user_input": user_input, "patient_id": patient_id, "voice_enabled": voice_enabled}
+
+
+class TestReplyCache:
+
+    def test_repeat_turn_is_answered_from_cache(self, graph):
+        cache = {}
+        first = workflow.invoke_with_reply_cache(make_state("What can you  Help with?"), cache)
+        second = workflow.invoke_with_reply_cache(make_state(" what can you help with? "), cache)
+        assert graph.calls == ["What can you  Help with?"]
+        assert second["response"] == first["response"]
+        assert second["log_entry"]["latency_ms"] == 0
+        # The stored state keeps its original latency
+        assert first["log_entry"]["latency_ms"] == 250
+
+    def test_key_includes_patient(self, graph):
+        cache = {}
+        workflow.invoke_with_reply_cache(make_state("what can you do"), cache)
+        workflow.invoke_with_reply_cache(make_state("what can you do", "20000002"), cache)
+        assert len(graph.calls) == 2
+
+    @pytest.mark.parametrize("intent,text", [
+        ("appointment", "cancel my appointment"),
+        # Medication turns write an audit log and may escalate, so each one runs the node
+        ("medication", "I took two doses of insulin"),
+    ])
+    def test_other_intents_are_not_cached(self, graph, intent, text):
+        graph.intent = intent
+        cache = {}
+        workflow.invoke_with_reply_cache(make_state(text), cache)
+        workflow.invoke_with_reply_cache(make_state(text), cache)
+        assert len(graph.calls) == 2
+        assert cache == {}
+
+    def test_oldest_entry_is_evicted_at_max(self, graph, monkeypatch):
+        monkeypatch.setattr(workflow, "_REPLY_CACHE_MAX", 2)
+        cache = {}
+        for text in ("one", "two", "three"):
+            workflow.invoke_with_reply_cache(make_state(text), cache)
+        assert [key[1] for key in cache] == ["two", "three"]
+
+    def test_voice_hit_speaks_cached_reply(self, graph):
+        cache = {}
+        workflow.invoke_with_reply_cache(make_state("help", voice_enabled=True), cache)
+        workflow.invoke_with_reply_cache(make_state("help", voice_enabled=True), cache)
+        # The fake graph doesn't speak, so only the cache hit shows up here
+        assert graph.spoken == ["reply 1"]
+
+    def test_without_cache_always_invokes(self, graph):
+        workflow.invoke_with_reply_cache(make_state("help"))
+        workflow.invoke_with_reply_cache(make_state("help"))
+        assert len(graph.calls) == 2
@@ -0,0 +1,89 @@
+"""
+Tests for LLM routing: timeout fallback, result cache, the keyword fast path and
+the speculative appointment prefetch
+"""
+import sys
+import os
+import time
+from concurrent.futures import Future
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph.nodes import routing, appointment  # noqa: E402
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake routing LLM; set .reply / .delay and inspect .calls"""
+    class FakeLLM:
+        reply = '{"intent": "caregiver", "patient_id": null}'
+        delay = 0.0
+        calls = []
+
+    def fake_completion(messages, **kwargs):
+        FakeLLM.calls.append(messages[-1]["content"])
+        time.sleep(FakeLLM.delay)
+        return (FakeLLM.reply, "fake", "m", 5)
+
+    fallbacks = []
+    monkeypatch.setattr(routing, "USE_LLM", True)
+    monkeypatch.setattr(routing, "chat_completion", fake_completion)
+    monkeypatch.setattr(routing, "_INTENT_CACHE", {})
+    monkeypatch.setattr(routing, "_prepare_agent", lambda intent: None)
+    monkeypatch.setattr(routing, "_log_fallback", lambda name, error, context=None: fallbacks.append(error))
+    FakeLLM.calls = []
+    FakeLLM.fallbacks = fallbacks
+    return FakeLLM
+
+
+class TestRoutingLLM:
+
+    def test_llm_answer_is_cached(self, llm):
+        assert routing.parse_intent_llm("how is dad doing")["intent"] == "caregiver"
+        assert routing.parse_intent_llm("How is  dad doing ")["intent"] == "caregiver"
+        assert len(llm.calls) == 1
+
+    def test_timeout_falls_back_to_rules_and_is_logged(self, llm, monkeypatch):
+        monkeypatch.setattr(routing, "_LLM_TIMEOUT_S", 0.05)
+        llm.delay = 0.3
+        parsed = routing.parse_intent_llm("I have a cough")
+        assert parsed == {"intent": "followup", "patient_id": None}
+        assert len(llm.fallbacks) == 1
+        assert isinstance(llm.fallbacks[0], TimeoutError)
+        # Fallback answers are not cached
+        assert routing._INTENT_CACHE == {}
+
+    def test_clear_keyword_input_skips_llm(self, llm):
+        parsed = routing.parse_intent_llm("I need to reschedule my appointment next week")
+        assert parsed["intent"] == "appointment"
+        assert llm.calls == []
+
+    def test_single_word_overlapping_keywords_use_llm(self, llm):
+        # "appointments" and "reschedule" each contain more than one keyword, but are one cue
+        assert not routing._is_clear_rule_match("appointments", "appointment")
+        assert not routing._is_clear_rule_match("reschedule", "appointment")
+        routing.parse_intent_llm("appointments")
+        assert len(llm.calls) == 1
+
+    def test_two_separate_cues_are_clear(self):
+        assert routing._is_clear_rule_match("reschedule my appointment", "appointment")
+        assert not routing._is_clear_rule_match("pain, pain", "followup")
+
+
+class TestAppointmentPrefetch:
+    """The appointment parse is only prefetched for clear turns and dropped on other routes"""
+
+    def test_prefetch_needs_a_clear_rule_match(self):
+        assert routing.clear_rule_intent("I need to reschedule my appointment next week") == "appointment"
+        assert routing.clear_rule_intent("appointments") is None
+        assert routing.clear_rule_intent("my appointment made me dizzy") is None
+
+    def test_other_route_discards_prefetch(self, llm, monkeypatch):
+        future = Future()
+        monkeypatch.setattr(appointment, "_prefetched", ("how is dad doing", future))
+        state = routing.route_node({"user_input": "how is dad doing", "patient_id": None})
+        assert state["intent"] == "caregiver"
+        assert appointment._prefetched is None
+        assert future.cancelled()
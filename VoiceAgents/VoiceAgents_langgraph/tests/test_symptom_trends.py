@@ -0,0 +1,50 @@
+"""
+Tests that the one-pass get_symptom_trends_all() matches per-patient get_symptom_trends()
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from VoiceAgents_langgraph import database  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    """DatabaseService reading a symptom log written under tmp_path"""
+    def ts(days_ago):
+        return (datetime.utcnow() - timedelta(days=days_ago)).replace(microsecond=0).isoformat() + "Z"
+
+    rows = [
+        (ts(1), "10000001", "dizziness", "6"),
+        (ts(2), "10000001", "dizziness", "4"),
+        (ts(2), "10000001", "fever", "7"),
+        (ts(3), "10000002", "cough", ""),
+        (ts(3), "10000002", "cough", "5"),
+        (ts(20), "10000002", "fever", "9"),  # outside the 7-day window
+        (ts(30), "10000003", "pain", "8"),
+    ]
+    path = tmp_path / "symptom_logs.csv"
+    path.write_text(
+        "ts_iso,patient_id,symptom,severity,note\n"
+        + "".join(f"{t},{pid},{sym},{sev},\n" for t, pid, sym, sev in rows),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(database, "SYMPTOMS_LOG_CSV", str(path))
+    return database.DatabaseService()
+
+
+class TestSymptomTrendsAll:
+
+    def test_matches_per_patient_trends(self, db):
+        trends = db.get_symptom_trends_all(days=7)
+        assert set(trends) == {"10000001", "10000002"}
+        for pid in ("10000001", "10000002", "10000003"):
+            assert trends.get(pid, []) == db.get_symptom_trends(pid, days=7)
+
+    def test_missing_log_is_empty(self, db, monkeypatch, tmp_path):
+        monkeypatch.setattr(database, "SYMPTOMS_LOG_CSV", str(tmp_path / "none.csv"))
+        assert db.get_symptom_trends_all() == {}
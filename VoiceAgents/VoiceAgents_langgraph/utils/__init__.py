@@ -1,11 +1,17 @@
 """
 Utility functions for VoiceAgents LangGraph implementation
 """
+import io
 import os
+import re
 import sys
 import json
+import time
+import wave
+import queue
+import threading
 from functools import wraps
-from typing import Optional, Callable, Any, Dict
+from typing import Optional, Callable, Any, BinaryIO, Dict, Union
 from datetime import datetime, timezone
 
 # Database is now local to VoiceAgents_langgraph
@@ -16,11 +22,27 @@ try:
 except Exception:
     pyttsx3 = None
 
-# Optional STT
+# Optional fast JSON parser; falls back to the stdlib json module
 try:
-    import speech_recognition as sr
-except Exception:
-    sr = None
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional STT: speech_recognition (and its audio backends) is imported on first use
+_SR = None
+_SR_CHECKED = False
+
+def _get_sr():
+    """Import speech_recognition once, on first use; None if it is not installed."""
+    global _SR, _SR_CHECKED
+    if not _SR_CHECKED:
+        try:
+            import speech_recognition
+            _SR = speech_recognition
+        except Exception:
+            _SR = None
+        _SR_CHECKED = True
+    return _SR
 
 # Optional local Whisper (faster-whisper)
 FW_AVAILABLE = False
@@ -41,12 +63,67 @@ def _get_faster_whisper_model():
         # Model size from env var (defaults to "base" for speed)
         # Options: "tiny", "base", "small", "medium", "large-v2", "large-v3"
         model_size = os.getenv("FASTER_WHISPER_MODEL", "base")
-        _FW_MODEL = WhisperModel(model_size)
+        # int8 quantized CTranslate2 inference by default (much faster than float32 on CPU)
+        compute_type = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+        _FW_MODEL = WhisperModel(model_size, compute_type=compute_type)
     return _FW_MODEL
 
+_TTS_ENGINE = None  # cached pyttsx3 engine instance
+_TTS_LOCK = threading.Lock()  # pyttsx3 engines are not thread-safe
+_TTS_INIT_ERROR = None  # set once pyttsx3.init() has failed, so it is not retried per utterance
+
+def _get_tts_engine():
+    """Create the local pyttsx3 engine once (driver init, English voice, rate) and reuse it."""
+    global _TTS_ENGINE, _TTS_INIT_ERROR
+    if pyttsx3 is None:
+        return None
+    if _TTS_INIT_ERROR is not None:
+        raise RuntimeError(f"pyttsx3 init failed earlier: {_TTS_INIT_ERROR}")
+    if _TTS_ENGINE is None:
+        try:
+            eng = pyttsx3.init()
+        except Exception as e:
+            _TTS_INIT_ERROR = e
+            raise
+        voices = eng.getProperty('voices')
+        english_voice = None
+        for v in voices:
+            if 'english' in v.name.lower() or 'en_' in v.id.lower() or 'en-' in v.id.lower():
+                english_voice = v.id
+                break
+            if 'david' in v.name.lower() or 'zira' in v.name.lower() or 'mark' in v.name.lower():
+                english_voice = v.id
+                break
+        if english_voice:
+            eng.setProperty('voice', english_voice)
+        eng.setProperty("rate", 155)
+        _TTS_ENGINE = eng
+    return _TTS_ENGINE
+
+# (epoch_second, iso_string) of the last now_iso() result
+_now_iso_cache = (None, "")
+
+
 def now_iso() -> str:
-    """Return current timestamp in ISO format"""
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    """Return current timestamp in ISO format (second resolution, cached per second)"""
+    global _now_iso_cache
+    sec = int(time.time())
+    cached_sec, cached_iso = _now_iso_cache
+    if sec == cached_sec:
+        return cached_iso
+    iso = datetime.fromtimestamp(sec, timezone.utc).isoformat()
+    _now_iso_cache = (sec, iso)
+    return iso
+
+
+def loads_json(text):
+    """Parse a JSON document such as an LLM response (orjson when installed)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity literals, which only the stdlib accepts
+    return json.loads(text)
 
 
 # Fallback logging directory
@@ -66,8 +143,8 @@ def _log_fallback(func_name: str, error: Exception, context: Optional[Dict] = No
             "error_message": str(error),
             "context": context or {}
         }
-        with open(FALLBACK_LOG, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        from .logging_utils import log_to_file
+        log_to_file(FALLBACK_LOG, entry)
     except Exception:
         # Silently fail if logging itself fails
         pass
@@ -133,27 +210,149 @@ except ImportError:
         return "gpt-4o-mini"
 
 
-def say(text: str, voice: bool = False) -> Optional[str]:
+# Background speech: say() queues utterances and a daemon worker plays them in order
+_TTS_QUEUE: "queue.Queue[str]" = queue.Queue()
+_TTS_WORKER = None
+_TTS_WORKER_LOCK = threading.Lock()
+
+
+def _tts_worker():
+    while True:
+        text = _TTS_QUEUE.get()
+        try:
+            if text is None:
+                # prewarm_tts(): build the engine on this thread, where it will be used
+                with _TTS_LOCK:
+                    _get_tts_engine()
+            else:
+                _speak(text)
+        except Exception:
+            pass  # _speak logs its own failures; keep the worker alive
+        finally:
+            _TTS_QUEUE.task_done()
+
+
+def _ensure_tts_worker():
+    global _TTS_WORKER
+    with _TTS_WORKER_LOCK:
+        if _TTS_WORKER is None:
+            _TTS_WORKER = threading.Thread(target=_tts_worker, name="tts-worker", daemon=True)
+            _TTS_WORKER.start()
+
+
+def _planned_tts_backend() -> Optional[str]:
+    """Backend _speak() will try first, or None if no TTS is available."""
+    if USE_LLM:
+        try:
+            from .llm_provider import _get_openai_client
+            if _get_openai_client() is not None:
+                return "openai_tts"
+        except Exception:
+            pass
+    if pyttsx3 is not None:
+        return "pyttsx3"
+    return None
+
+
+def prewarm_tts() -> Optional[str]:
+    """
+    Get the TTS backend ready in the background (OpenAI client, or the pyttsx3
+    engine on the worker thread) so the first spoken reply does not pay for it.
+    Returns the backend say() will try first, or None if no TTS is available.
+    """
+    backend = _planned_tts_backend()
+    if backend == "pyttsx3":
+        _ensure_tts_worker()
+        _TTS_QUEUE.put(None)
+    return backend
+
+
+def flush_tts():
+    """Block until every queued utterance has been spoken."""
+    _TTS_QUEUE.join()
+
+
+# End of a sentence: terminal punctuation followed by whitespace (so "2.5 mg" is never split)
+_SENTENCE_END_RE = re.compile(r'[.!?]+\s')
+
+
+class SentenceSpeaker:
+    """
+    Queue streamed LLM text for speech one sentence at a time, so playback can
+    start before the full reply has arrived. Pass feed as chat_completion's
+    on_delta, then call finish() with the complete reply.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._spoken = 0
+        self.backend: Optional[str] = None
+
+    def _queue(self, sentence: str) -> None:
+        sentence = sentence.strip()
+        if not sentence:
+            return
+        if self.backend is None:
+            self.backend = _planned_tts_backend()
+            if self.backend is None:
+                return
+            _ensure_tts_worker()
+        _TTS_QUEUE.put(sentence)
+
+    def feed(self, delta: str) -> None:
+        self._text += delta
+        for m in _SENTENCE_END_RE.finditer(self._text, self._spoken):
+            self._queue(self._text[self._spoken:m.end()])
+            self._spoken = m.end()
+
+    def finish(self, text: str) -> Optional[str]:
+        """Queue whatever was not spoken yet; returns the TTS backend, if any"""
+        if not text.startswith(self._text):
+            # Reply came from a fallback provider after a broken stream: speak it whole
+            self._spoken = 0
+        self._text = text
+        self._queue(text[self._spoken:])
+        self._spoken = len(text)
+        return self.backend
+
+
+def say(text: str, voice: bool = False, wait: bool = False) -> Optional[str]:
     """
     Print text and optionally speak it.
     
+    Speech runs on a background worker so the caller is not blocked on playback;
+    pass wait=True (or call flush_tts()) for serialized behavior.
+    
     Priority order:
     1. OpenAI TTS API (tts-1)
     2. Local pyttsx3
     
     Logs which backend was used.
-    Returns: TTS backend name if voice=True, None otherwise
+    Returns: TTS backend name if voice=True (the backend that will be tried first
+    when queued), None otherwise
     """
-    from .logging_utils import get_conversation_logger
-    logger = get_conversation_logger()
     # Log to console only (message will be in metadata line via log_turn_summary)
     # Use a different logger level or just print to console
-    import sys
     print(f"\nAgent: {text}", file=sys.stdout)
     
     if not voice:
         return None
+    if wait:
+        return _speak(text)
     
+    backend = _planned_tts_backend()
+    if backend is None:
+        from .logging_utils import get_conversation_logger
+        logger = get_conversation_logger()
+        logger.error("[TTS Error] Text-to-speech unavailable (no pyttsx3).")
+        return None
+    _ensure_tts_worker()
+    _TTS_QUEUE.put(text)
+    return backend
+
+
+def _speak(text: str) -> Optional[str]:
+    """Speak text synchronously with the first working backend; returns its name."""
     backend_used = None
     tts_model = os.getenv("TTS_MODEL", "tts-1")
     
@@ -209,21 +408,10 @@ def say(text: str, voice: bool = False) -> Optional[str]:
     # 2) Fallback to local pyttsx3
     if pyttsx3 is not None:
         try:
-            eng = pyttsx3.init()
-            voices = eng.getProperty('voices')
-            english_voice = None
-            for v in voices:
-                if 'english' in v.name.lower() or 'en_' in v.id.lower() or 'en-' in v.id.lower():
-                    english_voice = v.id
-                    break
-                if 'david' in v.name.lower() or 'zira' in v.name.lower() or 'mark' in v.name.lower():
-                    english_voice = v.id
-                    break
-            if english_voice:
-                eng.setProperty('voice', english_voice)
-            eng.setProperty("rate", 155)
-            eng.say(text)
-            eng.runAndWait()
+            with _TTS_LOCK:
+                eng = _get_tts_engine()
+                eng.say(text)
+                eng.runAndWait()
             backend_used = "pyttsx3"
             from .logging_utils import get_conversation_logger
             logger = get_conversation_logger()
@@ -242,20 +430,41 @@ def say(text: str, voice: bool = False) -> Optional[str]:
     return None
 
 
-def stt_transcribe(path: str) -> str:
+def wav_buffer(frames, sample_width: int, sample_rate: int, channels: int = 1) -> io.BytesIO:
+    """Wrap raw PCM frames in an in-memory WAV file that stt_transcribe() accepts."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(sample_rate)
+        for raw in frames:
+            wf.writeframes(raw)
+    buf.name = "audio.wav"  # backends read the format from the file name
+    buf.seek(0)
+    return buf
+
+
+def stt_transcribe(path: Union[str, BinaryIO], on_partial: Optional[Callable[[str], None]] = None) -> str:
     """
     Transcribe audio file to text.
     
+    path may also be a binary file-like object (e.g. from wav_buffer()); its
+    .name, if any, gives the audio format. This skips a temp-file round-trip.
+    
     Priority order:
     1. OpenAI Whisper API (whisper-1)
     2. Local faster-whisper
     
+    on_partial, if given, is called with the text decoded so far after each
+    faster-whisper segment, so callers can start work before decoding finishes.
+    
     Returns transcription text. Logs which backend was used.
     """
     from .logging_utils import get_conversation_logger
     logger = get_conversation_logger()
     
-    if not os.path.exists(path):
+    is_file = hasattr(path, "read")
+    if not is_file and not os.path.exists(path):
         return ""
 
     backend_used = None
@@ -265,6 +474,8 @@ def stt_transcribe(path: str) -> str:
     # Note: audio_transcribe() internally checks if OpenAI is available
     try:
         if USE_LLM:
+            if is_file:
+                path.seek(0)
             result = audio_transcribe(path)
             if result is not None:
                 text, backend_used = result
@@ -281,6 +492,8 @@ def stt_transcribe(path: str) -> str:
         if FW_AVAILABLE:
             model = _get_faster_whisper_model()
             if model is not None:
+                if is_file:
+                    path.seek(0)
                 segments, info = model.transcribe(
                     path,
                     beam_size=5,
@@ -290,6 +503,11 @@ def stt_transcribe(path: str) -> str:
                 for seg in segments:
                     if getattr(seg, "text", ""):
                         out.append(seg.text.strip())
+                        if on_partial is not None:
+                            try:
+                                on_partial(" ".join(out))
+                            except Exception:
+                                pass  # a failing callback must not lose the transcript
                 text = " ".join(out).strip()
                 if text:
                     backend_used = "local_faster_whisper"
@@ -303,10 +521,14 @@ def stt_transcribe(path: str) -> str:
         logger.error(f"[ASR] Local faster-whisper failed: {e}")
 
     # 3) Last resort: Google Speech Recognition (optional fallback)
+    sr = _get_sr()
     if sr is not None:
-        ext = os.path.splitext(path)[-1].lower()
+        name = getattr(path, "name", "audio.wav") if is_file else path
+        ext = os.path.splitext(str(name))[-1].lower()
         if ext in [".wav", ".aif", ".aiff", ".flac", ".mp3", ".m4a"]:
             try:
+                if is_file:
+                    path.seek(0)
                 r = sr.Recognizer()
                 with sr.AudioFile(path) as source:
                     audio = r.record(source)
@@ -325,85 +547,80 @@ def stt_transcribe(path: str) -> str:
     return ""
 
 
-def mic_listen_once(timeout=5, phrase_time_limit=10) -> str:
+# Microphone recognizer shared by mic_listen_once calls; ambient noise is calibrated on first use
+_MIC_RECOGNIZER = None
+_MIC_CALIBRATED = False
+
+
+def _get_mic_recognizer(sr):
+    global _MIC_RECOGNIZER
+    if _MIC_RECOGNIZER is None:
+        r = sr.Recognizer()
+        # Improved settings for better accuracy (from original VoiceAgents)
+        r.energy_threshold = 200  # More sensitive (lower value)
+        r.dynamic_energy_threshold = True
+        r.dynamic_energy_adjustment_damping = 0.15
+        r.dynamic_energy_ratio = 1.5
+        r.pause_threshold = 1.0  # Wait longer before considering phrase complete
+        r.phrase_threshold = 0.3  # Minimum seconds of speaking audio before considering phrase
+        r.non_speaking_duration = 0.5  # Seconds of non-speaking audio to keep on both sides
+        _MIC_RECOGNIZER = r
+    return _MIC_RECOGNIZER
+
+
+def mic_listen_once(timeout=5, phrase_time_limit=10, recalibrate=False, on_partial=None) -> str:
     """
     Listen to microphone once and transcribe using Whisper (same priority as stt_transcribe).
     
+    Ambient noise is calibrated on the first call only (or when recalibrate=True);
+    later calls keep the learned energy threshold, which dynamic_energy_threshold
+    keeps adjusting while listening. on_partial is passed to stt_transcribe.
+    
     Priority order:
     1. OpenAI Whisper API (whisper-1)
     2. Local faster-whisper
     3. Google Speech Recognition (last resort fallback)
     """
+    global _MIC_CALIBRATED
+    sr = _get_sr()
     if sr is None:
         print("❌ Speech recognition not available - install SpeechRecognition and pyaudio")
         return ""
     
     try:
-        r = sr.Recognizer()
-        # Improved settings for better accuracy (from original VoiceAgents)
-        r.energy_threshold = 200  # More sensitive (lower value)
-        r.dynamic_energy_threshold = True
-        r.dynamic_energy_adjustment_damping = 0.15
-        r.dynamic_energy_ratio = 1.5
-        r.pause_threshold = 1.0  # Wait longer before considering phrase complete
-        r.phrase_threshold = 0.3  # Minimum seconds of speaking audio before considering phrase
-        r.non_speaking_duration = 0.5  # Seconds of non-speaking audio to keep on both sides
+        r = _get_mic_recognizer(sr)
         
         with sr.Microphone(sample_rate=16000) as source:
             print("[Listening...] Speak now")
-            # Longer calibration for better noise cancellation
-            r.adjust_for_ambient_noise(source, duration=1.5)
+            if recalibrate or not _MIC_CALIBRATED:
+                # Longer calibration for better noise cancellation
+                r.adjust_for_ambient_noise(source, duration=1.5)
+                _MIC_CALIBRATED = True
             # Listen for audio
             audio = r.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
         
         print("[Processing...] Transcribing audio")
         
-        # Save audio to temporary file for Whisper processing
-        import tempfile
-        import wave
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_path = tmp_file.name
-        
         try:
-            # Write audio data to WAV file
-            with wave.open(tmp_path, "wb") as wf:
-                wf.setnchannels(1)  # Mono
-                wf.setsampwidth(audio.sample_width)
-                wf.setframerate(audio.sample_rate)
-                wf.writeframes(audio.get_raw_data())
-            
-            # Use the same Whisper pipeline as stt_transcribe()
-            text = stt_transcribe(tmp_path)
-            
-            # Clean up temp file
-            try:
-                os.unlink(tmp_path)
-            except Exception:
-                pass
-            
+            # Use the same Whisper pipeline as stt_transcribe(), on an in-memory WAV
+            wav = wav_buffer((audio.get_raw_data(),), audio.sample_width, audio.sample_rate)
+            text = stt_transcribe(wav, on_partial=on_partial)
             if text:
                 return text
         except Exception as e:
-            # Clean up temp file on error
-            try:
-                os.unlink(tmp_path)
-            except Exception:
-                pass
             print(f"[ASR] Whisper transcription failed: {e}")
         
-        # Last resort: Google Speech Recognition (only if Whisper failed)
-        try:
-            text = r.recognize_google(audio, language='en-US', show_all=False)
-            print("[ASR] Using backend: google_speech_recognition (fallback)")
-            return text
-        except Exception:
+        # Last resort: Google Speech Recognition (only if Whisper failed).
+        # One retry for transient network/quota errors; unintelligible audio is not retried
+        for _ in range(2):
             try:
-                text = r.recognize_google(audio)
+                text = r.recognize_google(audio, language='en-US', show_all=False)
                 print("[ASR] Using backend: google_speech_recognition (fallback)")
                 return text
+            except sr.RequestError:
+                continue
             except Exception:
-                pass
+                break
         
         print("[ASR] All transcription methods failed")
         return ""
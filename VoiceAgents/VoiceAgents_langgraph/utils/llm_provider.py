@@ -12,11 +12,17 @@ Model names are also configurable via env:
 - OPENAI_MODEL
 - ANTHROPIC_MODEL
 - GOOGLE_MODEL
+
+Calls made in the background (submit_llm_call) share one thread pool:
+
+- VOICEAGENTS_LLM_WORKERS: pool size (default 8)
 """
 
 import os
 import time
-from typing import Optional, Dict, List, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Optional, Dict, List, Tuple, Union
 from dotenv import load_dotenv
 from .logging_utils import get_conversation_logger
 
@@ -39,13 +45,37 @@ _google_client = None
 USE_LLM = False
 
 
+def _make_openai_http_client():
+    """
+    Pooled httpx client for OpenAI: keep-alive connections across calls and
+    HTTP/2 when the optional 'h2' package is installed. Returns None to use the SDK default.
+    """
+    try:
+        import httpx
+        from openai import DefaultHttpxClient
+    except Exception:
+        return None
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return DefaultHttpxClient(
+        http2=http2,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60),
+    )
+
+
 def _get_openai_client():
     """Get or create OpenAI client."""
     global _openai_client
     if _openai_client is None:
         try:
             from openai import OpenAI
-            _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=_make_openai_http_client(),
+            )
         except Exception:
             pass
     return _openai_client
@@ -179,16 +209,36 @@ def _try_openai_completion(
     messages: List[Dict[str, str]],
     model: str,
     temperature: float,
+    json_mode: bool = False,
+    on_delta: Optional[Callable[[str], None]] = None,
 ) -> Optional[str]:
-    """Try OpenAI completion."""
+    """Try OpenAI completion (streamed to on_delta when given)."""
     client = _get_openai_client()
     if client is None:
         return None
     try:
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        if on_delta is not None:
+            parts = []
+            for chunk in client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                **extra,
+            ):
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    parts.append(piece)
+                    on_delta(piece)
+            return "".join(parts)
         response = client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
+            **extra,
         )
         return response.choices[0].message.content
     except Exception as e:
@@ -201,6 +251,7 @@ def _try_google_completion(
     messages: List[Dict[str, str]],
     model: str,
     temperature: float,
+    json_mode: bool = False,
 ) -> Optional[str]:
     """
     Try Google Gemini completion.
@@ -233,7 +284,8 @@ def _try_google_completion(
         prompt = "\n\n".join(prompt_parts)
 
         gen_config = genai.types.GenerationConfig(
-            temperature=temperature
+            temperature=temperature,
+            **({"response_mime_type": "application/json"} if json_mode else {}),
         )
         response = model_instance.generate_content(
             prompt,
@@ -351,6 +403,8 @@ def chat_completion(
     model: Optional[str] = None,
     temperature: float = 0,
     provider: Optional[str] = None,
+    json_mode: bool = False,
+    on_delta: Optional[Callable[[str], None]] = None,
 ) -> Optional[Tuple[str, str, str, int]]:
     """
     Unified chat completion interface with automatic fallback.
@@ -364,6 +418,12 @@ def chat_completion(
       Defaults to 'openai,anthropic,google'.
 
     Only providers with valid API keys are actually attempted.
+
+    json_mode requests a JSON object response where the provider supports it
+    (OpenAI response_format, Gemini response_mime_type); Anthropic relies on the prompt.
+
+    on_delta, if given, is called with each text fragment as it streams in (OpenAI only);
+    other providers return the full text without calling it.
     
     Returns:
         Tuple of (response_text, provider_name, model_name) or None if all providers failed.
@@ -400,9 +460,9 @@ def chat_completion(
 
         start_time = time.time()
         if provider_name == "openai":
-            result = _try_openai_completion(messages, provider_model, temperature)
+            result = _try_openai_completion(messages, provider_model, temperature, json_mode, on_delta)
         elif provider_name == "google":
-            result = _try_google_completion(messages, provider_model, temperature)
+            result = _try_google_completion(messages, provider_model, temperature, json_mode)
         elif provider_name == "anthropic":
             result = _try_anthropic_completion(messages, provider_model, temperature)
         elapsed_ms = int((time.time() - start_time) * 1000)
@@ -422,12 +482,32 @@ def chat_completion(
     return None
 
 
+# Shared pool for LLM calls run off the caller's thread; sized so abandoned calls don't starve new ones
+_LLM_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_LLM_EXECUTOR_LOCK = threading.Lock()
+
+
+def submit_llm_call(fn: Callable, *args, **kwargs) -> Future:
+    """Run an LLM-bound call on the shared background pool (VOICEAGENTS_LLM_WORKERS threads)."""
+    global _LLM_EXECUTOR
+    if _LLM_EXECUTOR is None:
+        with _LLM_EXECUTOR_LOCK:
+            if _LLM_EXECUTOR is None:
+                try:
+                    workers = max(1, int(os.getenv("VOICEAGENTS_LLM_WORKERS", "8")))
+                except ValueError:
+                    workers = 8
+                _LLM_EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")
+    return _LLM_EXECUTOR.submit(fn, *args, **kwargs)
+
+
 def audio_transcribe(
-    audio_path: str,
+    audio_path: Union[str, BinaryIO],
     provider: Optional[str] = None,
 ) -> Optional[tuple[str, str]]:
     """
     Transcribe audio file using OpenAI Whisper API.
+    audio_path may also be an open binary file (its .name gives the format).
 
     Returns tuple of (transcription_text, backend_name) where backend_name is
     "openai_whisper" for OpenAI API or None if failed.
@@ -442,11 +522,17 @@ def audio_transcribe(
         client = _get_openai_client()
         if client is not None:
             try:
-                with open(audio_path, "rb") as f:
+                if hasattr(audio_path, "read"):
                     response = client.audio.transcriptions.create(
                         model=asr_model,
-                        file=f,
+                        file=(os.path.basename(getattr(audio_path, "name", "audio.wav")), audio_path.read()),
                     )
+                else:
+                    with open(audio_path, "rb") as f:
+                        response = client.audio.transcriptions.create(
+                            model=asr_model,
+                            file=f,
+                        )
                 logger = get_conversation_logger()
                 logger.info(f"[ASR] Using backend: {asr_model}")
                 return (response.text, "openai_whisper")
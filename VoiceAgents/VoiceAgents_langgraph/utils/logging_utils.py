@@ -3,11 +3,23 @@ Logging utilities for VoiceAgents LangGraph
 Writes agent-specific logs to logs/ directory with unified schema
 """
 import os
+import sys
 import json
+import time
+import queue
+import atexit
+import random
 import logging
+import threading
 from typing import Dict, Any, Optional
 from datetime import datetime, timezone
-from . import now_iso
+from . import now_iso, loads_json
+
+# Optional fast JSON encoder; falls back to the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Log directory (go up two levels from utils/ to VoiceAgents_langgraph/)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,16 +35,200 @@ CAREGIVER_TXT = os.path.join(LOG_DIR, "caregiver_summaries.txt")
 ORCHESTRATION_LOG = os.path.join(LOG_DIR, "orchestration_log.jsonl")
 CONVERSATION_TXT = os.path.join(LOG_DIR, "conversation_log.txt")
 
+# Map agent names to log files (used by write_log)
+_AGENT_LOG_MAP = {
+    "appointment": APPOINTMENT_LOG,
+    "followup": FOLLOWUP_LOG,
+    "medication": MEDICATION_LOG,
+    "caregiver": CAREGIVER_LOG,
+    "orchestration": ORCHESTRATION_LOG
+}
+
+# Filesystem-encoded paths, computed once so appends skip per-call path encoding
+_FS_PATHS = {
+    path: os.fsencode(path)
+    for path in (APPOINTMENT_LOG, FOLLOWUP_LOG, MEDICATION_LOG, CAREGIVER_LOG,
+                 CAREGIVER_TXT, ORCHESTRATION_LOG, CONVERSATION_TXT)
+}
+_APPEND_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+# writev() is POSIX-only; elsewhere coalesced chunks are joined and written once
+_HAS_WRITEV = hasattr(os, "writev")
+# Larger writer-thread drains are joined instead (writev() rejects more than IOV_MAX chunks)
+_IOV_MAX = 1024
+
 # Global conversation logger (replaces TeeOutput)
 _conversation_logger = None
+# Console-only logger used for turn summaries (file line is written directly)
+_console_logger = None
+
+# Persistent append-mode file descriptors, keyed by encoded log path
+_fds: Dict[bytes, int] = {}
+_file_lock = threading.Lock()
+
+# INFO-level orchestration sampling; 1.0 (default) logs every entry
+try:
+    _LOG_SAMPLE_RATE = float(os.getenv("VOICEAGENTS_LOG_SAMPLE_RATE", "1.0"))
+except ValueError:
+    _LOG_SAMPLE_RATE = 1.0
+_DUPLICATE_WINDOW_S = 0.05
+# (agent, intent) -> [last emit monotonic time, entries suppressed since then]
+_rate_limiter: Dict[tuple, list] = {}
+_rate_lock = threading.Lock()
+
+# Log lines are encoded by the caller and appended by a background thread, in call order,
+# so turns never wait on disk. VOICEAGENTS_LOG_ASYNC=0 appends on the calling thread instead
+_LOG_ASYNC = os.getenv("VOICEAGENTS_LOG_ASYNC", "1") != "0"
+_LOG_BATCH_MAX = 256
+_LOG_Q: "queue.Queue[tuple]" = queue.Queue()
+_LOG_WRITER: Optional[threading.Thread] = None
+_LOG_WRITER_LOCK = threading.Lock()
+_LOG_WRITE_ERRORS = 0
+
+# Single-slot cache for the last formatted turn timestamp (turns often share a second)
+# (input, formatted) in one tuple, so concurrent callers always read a matching pair
+_last_ts: tuple = (None, None)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """os.write until every byte of data is written."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _append_batch(writes) -> None:
+    """
+    Append pre-encoded (log_path, bytes) pairs through persistent O_APPEND descriptors.
+    Chunks bound for the same file are coalesced into one writev() call where available.
+    """
+    with _file_lock:
+        pending: Dict[int, list] = {}
+        for log_path, data in writes:
+            fs_path = _FS_PATHS.get(log_path) or os.fsencode(log_path)
+            fd = _fds.get(fs_path)
+            if fd is None:
+                fd = os.open(fs_path, _APPEND_FLAGS, 0o644)
+                _fds[fs_path] = fd
+            chunks = pending.get(fd)
+            if chunks is None:
+                pending[fd] = [data]
+            else:
+                chunks.append(data)
+        
+        for fd, chunks in pending.items():
+            if len(chunks) == 1:
+                _write_all(fd, chunks[0])
+                continue
+            total = sum(map(len, chunks))
+            written = os.writev(fd, chunks) if _HAS_WRITEV and len(chunks) <= _IOV_MAX else 0
+            if written < total:
+                _write_all(fd, b"".join(chunks)[written:])
+
+
+def _log_writer() -> None:
+    global _LOG_WRITE_ERRORS
+    while True:
+        batch = [_LOG_Q.get()]
+        # Drain whatever queued up meanwhile so a burst costs one append pass
+        while len(batch) < _LOG_BATCH_MAX:
+            try:
+                batch.append(_LOG_Q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _append_batch([write for writes in batch for write in writes])
+        except Exception as e:
+            # Keep the writer alive, but never lose lines silently
+            _LOG_WRITE_ERRORS += 1
+            print(f"[log-writer] failed to append {len(batch)} queued write(s): {e!r}", file=sys.stderr)
+        finally:
+            for _ in batch:
+                _LOG_Q.task_done()
+
+
+def _ensure_log_writer() -> None:
+    global _LOG_WRITER
+    with _LOG_WRITER_LOCK:
+        if _LOG_WRITER is None:
+            _LOG_WRITER = threading.Thread(target=_log_writer, name="log-writer", daemon=True)
+            _LOG_WRITER.start()
+            atexit.register(flush_logs)
+
+
+def flush_logs() -> None:
+    """Block until every queued log write has reached its file (call before reading a log back)"""
+    if _LOG_WRITER is not None:
+        _LOG_Q.join()
+
+
+def log_write_errors() -> int:
+    """Number of queued write batches the writer thread failed to append"""
+    return _LOG_WRITE_ERRORS
+
+
+def _write(writes) -> None:
+    """
+    Single entry point for every log append: pre-encoded (log_path, bytes) pairs are
+    queued in call order for the writer thread, or appended here when VOICEAGENTS_LOG_ASYNC=0.
+    """
+    writes = tuple(writes)
+    if not _LOG_ASYNC:
+        _append_batch(writes)
+        return
+    if _LOG_WRITER is None:
+        _ensure_log_writer()
+    _LOG_Q.put_nowait(writes)
+
+
+def _append_bytes(log_path: str, data: bytes) -> None:
+    """Append pre-encoded bytes to a single log file."""
+    _write(((log_path, data),))
+
+
+def _sample_entry(agent: str, intent: Optional[str], level: str) -> Optional[int]:
+    """
+    Decide whether an orchestration entry should be written.
+    Returns None to drop it, otherwise the number of entries suppressed for the
+    same (agent, intent) since the last one written. ERROR entries always pass.
+    """
+    if _LOG_SAMPLE_RATE >= 1.0 or level.lower() == "error":
+        return 0
+    key = (agent, intent)
+    now = time.monotonic()
+    with _rate_lock:
+        state = _rate_limiter.get(key)
+        if state is None:
+            state = _rate_limiter[key] = [None, 0]
+        last_emit = state[0]
+        if ((last_emit is not None and now - last_emit < _DUPLICATE_WINDOW_S)
+                or random.random() >= _LOG_SAMPLE_RATE):
+            state[1] += 1
+            return None
+        suppressed = state[1]
+        state[0] = now
+        state[1] = 0
+        return suppressed
+
+
+class _ConversationFileHandler(logging.Handler):
+    """Logging handler that shares the conversation_log.txt handle with turn summaries."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            _append_bytes(CONVERSATION_TXT, (self.format(record) + "\n").encode("utf-8"))
+        except Exception:
+            self.handleError(record)
 
 
 def get_conversation_logger():
     """
     Get or create the global conversation logger.
-    Configured with StreamHandler (console) and FileHandler (conversation_log.txt).
+    Configured with StreamHandler (console) and a file handler (conversation_log.txt).
+    With VOICEAGENTS_CONSOLE_LOG=0 (batch/offline runs) no handlers are built and the
+    logger is disabled; turn summaries are still appended to conversation_log.txt.
     """
-    global _conversation_logger
+    global _conversation_logger, _console_logger
     
     if _conversation_logger is not None:
         return _conversation_logger
@@ -44,6 +240,20 @@ def get_conversation_logger():
     # Remove existing handlers to avoid duplicates
     logger.handlers.clear()
     
+    if os.getenv("VOICEAGENTS_CONSOLE_LOG", "1") == "0":
+        # Disabled loggers skip LogRecord creation and formatting entirely
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+        logger.disabled = True
+        console_logger = logging.getLogger("conversation.console")
+        console_logger.handlers.clear()
+        console_logger.addHandler(logging.NullHandler())
+        console_logger.propagate = False
+        console_logger.disabled = True
+        _conversation_logger = logger
+        _console_logger = console_logger
+        return logger
+    
     # Console handler (StreamHandler)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
@@ -53,7 +263,7 @@ def get_conversation_logger():
     
     # File handler (conversation_log.txt)
     # Note: We include timestamp in the message itself, so formatter doesn't add another one
-    file_handler = logging.FileHandler(CONVERSATION_TXT, mode="a", encoding="utf-8")
+    file_handler = _ConversationFileHandler()
     file_handler.setLevel(logging.INFO)
     file_formatter = logging.Formatter("%(message)s")  # No timestamp - we add it in the message
     file_handler.setFormatter(file_formatter)
@@ -62,7 +272,15 @@ def get_conversation_logger():
     # Prevent propagation to root logger
     logger.propagate = False
     
+    # Turn summaries go to the console through this logger and straight to the file
+    console_logger = logging.getLogger("conversation.console")
+    console_logger.setLevel(logging.INFO)
+    console_logger.handlers.clear()
+    console_logger.addHandler(console_handler)
+    console_logger.propagate = False
+    
     _conversation_logger = logger
+    _console_logger = console_logger
     return logger
 
 
@@ -70,6 +288,7 @@ def setup_console_logging():
     """
     Set up conversation logging (backward compatibility).
     Now uses Python logging module instead of TeeOutput.
+    A no-op beyond creating a disabled logger when VOICEAGENTS_CONSOLE_LOG=0.
     """
     get_conversation_logger()
 
@@ -81,6 +300,56 @@ def restore_console_logging():
     pass
 
 
+# Action label lookup tables (see _extract_action_label)
+_APPT_ACTIONS = frozenset({"check_status", "schedule", "reschedule", "cancel"})
+_APPT_ALIAS = {
+    "schedule_new": "schedule",
+    "general": "check_status",  # Default for appointment general queries
+}
+_MEDICATION_INFO_INTENTS = frozenset({"general", "info", "education", "side_effects"})
+_AGENT_LABELS = {
+    "caregiver": "caregiver_summary",
+    "help": "help_message",
+    "error": "error_handler",
+}
+
+# Escape quotes and flatten line breaks so each turn stays on one log line
+_MSG_TRANS = str.maketrans({'"': '\\"', "\n": " ", "\r": " "})
+_MSG_PREVIEW_CHARS = 200
+
+
+def _preview(message: str) -> str:
+    """Truncate to _MSG_PREVIEW_CHARS, then escape (truncating first avoids translating dropped text)."""
+    if len(message) > _MSG_PREVIEW_CHARS:
+        message = message[:_MSG_PREVIEW_CHARS] + "..."
+    return message.translate(_MSG_TRANS)
+
+
+def _format_turn_timestamp(timestamp: str) -> str:
+    """
+    Format a turn timestamp as ISO with Z suffix (e.g. 2025-01-01T12:00:00Z).
+    Canonical inputs (from now_iso() or already Z-suffixed) skip the datetime round-trip.
+    """
+    global _last_ts
+    last_in, last_out = _last_ts
+    if timestamp == last_in:
+        return last_out
+    
+    if len(timestamp) == 20 and timestamp.endswith("Z"):
+        ts_str = timestamp
+    elif len(timestamp) == 25 and timestamp.endswith("+00:00"):
+        ts_str = timestamp[:19] + "Z"
+    else:
+        try:
+            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            ts_str = dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        except Exception:
+            ts_str = timestamp
+    
+    _last_ts = (timestamp, ts_str)
+    return ts_str
+
+
 def _extract_action_label(actions: Optional[Dict[str, Any]], agent: Optional[str]) -> Optional[str]:
     """
     Extract a simple action label from actions dict or agent context.
@@ -91,45 +360,149 @@ def _extract_action_label(actions: Optional[Dict[str, Any]], agent: Optional[str
     
     # Appointment actions
     action = actions.get("action")
-    if action:
-        if action in ["check_status", "schedule", "reschedule", "cancel"]:
+    if action and isinstance(action, str):
+        if action in _APPT_ACTIONS:
             return action
-        elif action == "schedule_new":
-            return "schedule"
-        elif action == "general":
-            return "check_status"  # Default for appointment general queries
-    
-    # Medication actions
-    intent = actions.get("intent")
-    if intent and agent == "medication":
-        if intent in ["general", "info", "education"]:
-            return "medication_info"
-        elif intent == "side_effects":
-            return "medication_info"
+        alias = _APPT_ALIAS.get(action)
+        if alias:
+            return alias
     
-    # Followup actions
-    if agent == "followup":
-        triage_tier = actions.get("triage_tier")
-        if triage_tier:
-            return "symptom_triage"
-        if actions.get("symptoms_logged"):
+    # Medication / followup actions depend on actions content
+    if agent == "medication":
+        intent = actions.get("intent")
+        if isinstance(intent, str) and intent in _MEDICATION_INFO_INTENTS:
+            return "medication_info"
+    elif agent == "followup":
+        if actions.get("triage_tier") or actions.get("symptoms_logged"):
             return "symptom_triage"
     
-    # Caregiver actions
-    if agent == "caregiver":
-        return "caregiver_summary"
+    # Caregiver / help / error map straight from the agent name
+    return _AGENT_LABELS.get(agent)
+
+
+# Constant turn-line tokens, pre-encoded so lines are assembled directly as bytes
+_SEP = b" | "
+_CID_PREFIX = b"cid="
+_ROLE_USER = b"role=user"
+_ROLE_ASSISTANT = b"role=assistant"
+_ROLE_SYSTEM = b"role=system"
+_LEVEL_ERROR = b"level=ERROR"
+_USED_LLM_ON = b"used_llm=1"
+_USED_LLM_OFF = b"used_llm=0"
+_TTS_USED_ON = b"tts_used=1"
+
+
+def _emit_turn_line(line: bytes, level: int = logging.INFO) -> None:
+    """Echo a turn line to the console and append it to conversation_log.txt."""
+    get_conversation_logger()
+    if _console_logger.isEnabledFor(level):
+        _console_logger.log(level, line.decode("utf-8"))
+    _append_bytes(CONVERSATION_TXT, line + b"\n")
+
+
+def _ts_token(timestamp: str) -> bytes:
+    """Encode the bracketed [timestamp] token of a turn line."""
+    return b"[" + _format_turn_timestamp(timestamp).encode("utf-8") + b"]"
+
+
+def log_user_turn(
+    timestamp: str,
+    conversation_id: str,
+    message: Optional[str],
+    input_channel: Optional[str] = None,
+) -> None:
+    """
+    Log a user turn to conversation_log.txt.
+    Format: [timestamp] | cid=... | role=user | msg="..." | input=...
+    """
+    parts = [
+        _ts_token(timestamp),
+        _CID_PREFIX + str(conversation_id).encode("utf-8"),
+        _ROLE_USER,
+        b'msg="' + _preview(message or "").encode("utf-8") + b'"',
+    ]
+    if input_channel:
+        parts.append(b"input=" + input_channel.encode("utf-8"))
+    _emit_turn_line(_SEP.join(parts))
+
+
+def log_assistant_turn(
+    timestamp: str,
+    conversation_id: str,
+    agent: Optional[str],
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    message: Optional[str] = None,
+    actions: Optional[Dict[str, Any]] = None,
+    used_llm: Optional[int] = None,
+    latency_ms: Optional[int] = None,
+    tts_used: Optional[int] = None,
+    tts_backend: Optional[str] = None,
+) -> None:
+    """
+    Log an assistant turn to conversation_log.txt.
+    Format: [timestamp] | cid=... | role=assistant | agent=... | used_llm=... | provider=... | model=...
+            | latency_ms=... | tts_used=... | tts_backend=... | action=... | msg="..."
+    """
+    parts = [_ts_token(timestamp), _CID_PREFIX + str(conversation_id).encode("utf-8"), _ROLE_ASSISTANT]
     
-    # Help actions
-    if agent == "help":
-        if actions.get("used_llm"):
-            return "help_message"
-        return "help_message"
+    if agent:
+        parts.append(b"agent=" + agent.encode("utf-8"))
     
-    # Error
-    if agent == "error":
-        return "error_handler"
+    # LLM usage
+    has_llm = bool(provider and model)
+    if used_llm is not None:
+        parts.append(b"used_llm=" + str(used_llm).encode("utf-8"))
+    else:
+        parts.append(_USED_LLM_ON if has_llm else _USED_LLM_OFF)
     
-    return None
+    if has_llm:
+        parts.append(b"provider=" + str(provider).encode("utf-8"))
+        parts.append(b"model=" + str(model).encode("utf-8"))
+    
+    if latency_ms is not None:
+        parts.append(b"latency_ms=" + str(latency_ms).encode("utf-8"))
+    
+    # TTS usage
+    if tts_used is not None:
+        parts.append(b"tts_used=" + str(tts_used).encode("utf-8"))
+    elif tts_backend:
+        parts.append(_TTS_USED_ON)
+    
+    if tts_backend:
+        parts.append(b"tts_backend=" + tts_backend.encode("utf-8"))
+    
+    # Action label
+    action_label = _extract_action_label(actions, agent)
+    if action_label:
+        parts.append(b"action=" + action_label.encode("utf-8"))
+    
+    # Include message text (truncated if too long)
+    if message:
+        parts.append(b'msg="' + _preview(message).encode("utf-8") + b'"')
+    
+    _emit_turn_line(_SEP.join(parts))
+
+
+def log_system_error(
+    timestamp: str,
+    conversation_id: str,
+    agent: Optional[str],
+    error: str,
+) -> None:
+    """
+    Log an error turn to conversation_log.txt.
+    Format: [timestamp] | cid=... | role=system | agent=... | level=ERROR | error="..."
+    """
+    parts = [
+        _ts_token(timestamp),
+        _CID_PREFIX + str(conversation_id).encode("utf-8"),
+        _ROLE_SYSTEM,
+        b"agent=" + (agent or "unknown").encode("utf-8"),
+        _LEVEL_ERROR,
+        b'error="' + error.translate(_MSG_TRANS).encode("utf-8") + b'"',
+    ]
+    _emit_turn_line(_SEP.join(parts), logging.ERROR)
 
 
 def log_turn_summary(
@@ -151,93 +524,41 @@ def log_turn_summary(
     error: Optional[str] = None,
 ) -> None:
     """
-    Log a turn summary to conversation_log.txt following todo.md format.
-    
-    For user turns: timestamp, conversation_id, role=user, message
-    For assistant turns: timestamp, conversation_id, role=assistant, agent, used_llm, provider, model, latency_ms, tts_used, action
-    For errors: timestamp, conversation_id, role=system, agent, level=ERROR, error
+    Log a turn summary to conversation_log.txt following todo.md format (backward compatible).
+    Dispatches to log_user_turn, log_assistant_turn or log_system_error by role.
     """
-    logger = get_conversation_logger()
-    
-    # Format timestamp to match todo.md (ISO format with Z)
-    try:
-        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-        ts_str = dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-    except Exception:
-        ts_str = timestamp
-    
     if role == "user":
-        # User turn format: [timestamp] | cid=... | role=user | msg="..."
-        msg_preview = message[:200] + "..." if message and len(message) > 200 else (message or "")
-        # Escape quotes in message
-        msg_preview = msg_preview.replace('"', '\\"')
-        parts = [f"[{ts_str}]", f"cid={conversation_id}", "role=user", f'msg="{msg_preview}"']
-        if input_channel:
-            parts.append(f"input={input_channel}")
-        logger.info(" | ".join(parts))
-    
+        log_user_turn(timestamp, conversation_id, message, input_channel)
     elif role == "assistant":
-        # Assistant turn format: [timestamp] | cid=... | role=assistant | agent=... | used_llm=... | provider=... | model=... | latency_ms=... | tts_used=... | action=... | msg="..."
-        parts = [f"[{ts_str}]", f"cid={conversation_id}", "role=assistant"]
-        
-        if agent:
-            parts.append(f"agent={agent}")
-        
-        # LLM usage
-        if used_llm is not None:
-            parts.append(f"used_llm={used_llm}")
-        elif provider and model:
-            parts.append("used_llm=1")
-        else:
-            parts.append("used_llm=0")
-        
-        if provider and model:
-            parts.append(f"provider={provider}")
-            parts.append(f"model={model}")
-        
-        if latency_ms is not None:
-            parts.append(f"latency_ms={latency_ms}")
-        
-        # TTS usage
-        if tts_used is not None:
-            parts.append(f"tts_used={tts_used}")
-        elif tts_backend:
-            parts.append("tts_used=1")
-        
-        if tts_backend:
-            parts.append(f"tts_backend={tts_backend}")
-        
-        # Action label
-        action_label = _extract_action_label(actions, agent)
-        if action_label:
-            parts.append(f"action={action_label}")
-        
-        # Include message text (truncated if too long)
-        if message:
-            msg_preview = message[:200] + "..." if len(message) > 200 else message
-            msg_preview = msg_preview.replace('"', '\\"').replace('\n', ' ')  # Escape quotes and newlines
-            parts.append(f'msg="{msg_preview}"')
-        
-        logger.info(" | ".join(parts))
-    
+        log_assistant_turn(timestamp, conversation_id, agent, provider, model, message,
+                           actions, used_llm, latency_ms, tts_used, tts_backend)
     elif role == "system" and error:
-        # Error format: [timestamp] | cid=... | role=system | agent=... | level=ERROR | error="..."
-        error_msg = error.replace('"', '\\"')
-        parts = [
-            f"[{ts_str}]",
-            f"cid={conversation_id}",
-            "role=system",
-            f"agent={agent or 'unknown'}",
-            "level=ERROR",
-            f'error="{error_msg}"'
-        ]
-        logger.error(" | ".join(parts))
+        log_system_error(timestamp, conversation_id, agent, error)
+
+
+def _jsonl_bytes(obj: Dict[str, Any]) -> bytes:
+    """Encode a log entry as one UTF-8 JSONL line (orjson when installed)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. a value orjson can't serialize - let json report or handle it
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
 
 
 def log_to_file(log_path: str, obj: Dict[str, Any]) -> None:
     """Write a log entry to a JSONL file"""
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    _append_bytes(log_path, _jsonl_bytes(obj))
+
+
+def log_to_file_prebuilt(log_path: str, json_bytes: bytes) -> None:
+    """
+    Write an already-serialized log entry to a JSONL file.
+    For callers that encode the same shape repeatedly; a trailing newline is added if missing.
+    """
+    if not json_bytes.endswith(b"\n"):
+        json_bytes += b"\n"
+    _append_bytes(log_path, json_bytes)
 
 
 def write_log(
@@ -245,7 +566,8 @@ def write_log(
         level: str,
         message: str,
         risk: Optional[str] = None,
-        context: Optional[Dict[str, Any]] = None) -> None:
+        context: Optional[Dict[str, Any]] = None,
+        also_mirror_to_conversation: bool = False) -> None:
     """
     Unified log writer with consistent schema.
     
@@ -255,9 +577,12 @@ def write_log(
         message: Log message
         risk: Risk level if applicable (e.g., "RED", "ORANGE", "GREEN")
         context: Additional context dictionary
+        also_mirror_to_conversation: Also write a pipe-style line to conversation_log.txt
+            (e.g. for error turns), in the same write pass as the JSONL entry
     """
+    timestamp = now_iso()
     entry = {
-        "timestamp": now_iso(),
+        "timestamp": timestamp,
         "agent": agent,
         "level": level,
         "message": message,
@@ -265,17 +590,71 @@ def write_log(
         "context": context or {}
     }
     
-    # Map agent names to log files
-    agent_log_map = {
-        "appointment": APPOINTMENT_LOG,
-        "followup": FOLLOWUP_LOG,
-        "medication": MEDICATION_LOG,
-        "caregiver": CAREGIVER_LOG,
-        "orchestration": ORCHESTRATION_LOG
-    }
+    # Lowercase agent names (the common case) hit the map without calling .lower()
+    log_path = _AGENT_LOG_MAP.get(agent) or _AGENT_LOG_MAP.get(agent.lower(), ORCHESTRATION_LOG)
+    if log_path == ORCHESTRATION_LOG:
+        suppressed = _sample_entry(agent, entry["context"].get("intent"), level)
+        if suppressed is None:
+            return
+        if suppressed:
+            entry["context"] = {**entry["context"], "suppressed": suppressed}
+    if not also_mirror_to_conversation:
+        log_to_file(log_path, entry)
+        return
     
-    log_path = agent_log_map.get(agent.lower(), ORCHESTRATION_LOG)
-    log_to_file(log_path, entry)
+    # Mirror format: [timestamp] | role=system | agent=... | level=... | msg="..."
+    parts = [
+        f"[{_format_turn_timestamp(timestamp)}]",
+        "role=system",
+        f"agent={agent}",
+        f"level={level.upper()}",
+        f'msg="{_preview(message)}"'
+    ]
+    line = " | ".join(parts)
+    log_level = logging.getLevelName(level.upper())
+    get_conversation_logger()
+    _console_logger.log(log_level if isinstance(log_level, int) else logging.INFO, line)
+    _write((
+        (log_path, _jsonl_bytes(entry)),
+        (CONVERSATION_TXT, line.encode("utf-8") + b"\n"),
+    ))
+
+
+# Normalizer key sets: fields promoted to the top level or context of each schema.
+# provider/model/actions/policies are excluded too - these only go to conversation_log
+_APPT_EXCLUDED = frozenset({
+    "timestamp", "agent", "level", "message", "risk",
+    "patient_id", "input", "parsed", "response",
+    "provider", "model", "actions", "policies"
+})
+_FOLLOWUP_EXCLUDED = frozenset({
+    "timestamp", "agent", "level", "message", "risk",
+    "triage", "patient_id", "input", "symptom",
+    "severity", "response", "provider", "model", "actions", "policies"
+})
+_MED_EXCLUDED = frozenset({
+    "timestamp", "agent", "level", "message", "risk",
+    "patient_id", "input", "intent", "drug", "response",
+    "provider", "model", "actions", "policies"
+})
+_CAREGIVER_EXCLUDED = frozenset({
+    "timestamp", "agent", "level", "message", "risk",
+    "patient_id", "caregiver_id", "summary",
+    "provider", "model", "actions", "policies"
+})
+_ORCH_EXCLUDED = frozenset({
+    "timestamp", "agent", "level", "message", "risk",
+    "patient_id", "input", "intent",
+    "provider", "model", "actions", "policies"
+})
+
+
+def _extra_fields(entry: Dict[str, Any], excluded: frozenset) -> Dict[str, Any]:
+    """Fields of entry not covered by the schema, in their original order"""
+    extra = entry.keys() - excluded
+    if not extra:
+        return {}
+    return {k: v for k, v in entry.items() if k in extra}
 
 
 def log_appointment(entry: Dict[str, Any]) -> None:
@@ -287,14 +666,8 @@ def log_appointment(entry: Dict[str, Any]) -> None:
         entry["timestamp"] = now_iso()
     
     # Ensure consistent schema
-    # Exclude provider/model/actions/policies - these only go to conversation_log
-    excluded_fields = [
-        "timestamp", "agent", "level", "message", "risk",
-        "patient_id", "input", "parsed", "response",
-        "provider", "model", "actions", "policies"
-    ]
     normalized = {
-        "timestamp": entry.get("timestamp", now_iso()),
+        "timestamp": entry["timestamp"],
         "agent": entry.get("agent", "appointment"),
         "level": entry.get("level", "info"),
         "message": entry.get("message", entry.get("response", "")),
@@ -304,8 +677,7 @@ def log_appointment(entry: Dict[str, Any]) -> None:
             "input": entry.get("input"),
             "parsed": entry.get("parsed"),
             "response": entry.get("response"),
-            **{k: v for k, v in entry.items()
-               if k not in excluded_fields}
+            **_extra_fields(entry, _APPT_EXCLUDED)
         }
     }
     log_to_file(APPOINTMENT_LOG, normalized)
@@ -320,14 +692,8 @@ def log_followup(entry: Dict[str, Any]) -> None:
         entry["timestamp"] = now_iso()
     
     # Ensure consistent schema
-    # Exclude provider/model/actions/policies - these only go to conversation_log
-    excluded_fields = [
-        "timestamp", "agent", "level", "message", "risk",
-        "triage", "patient_id", "input", "symptom",
-        "severity", "response", "provider", "model", "actions", "policies"
-    ]
     normalized = {
-        "timestamp": entry.get("timestamp", now_iso()),
+        "timestamp": entry["timestamp"],
         "agent": entry.get("agent", "followup"),
         "level": entry.get("level", "info"),
         "message": entry.get("message", entry.get("response", "")),
@@ -338,8 +704,7 @@ def log_followup(entry: Dict[str, Any]) -> None:
             "symptom": entry.get("symptom"),
             "severity": entry.get("severity"),
             "response": entry.get("response"),
-            **{k: v for k, v in entry.items()
-               if k not in excluded_fields}
+            **_extra_fields(entry, _FOLLOWUP_EXCLUDED)
         }
     }
     log_to_file(FOLLOWUP_LOG, normalized)
@@ -354,14 +719,8 @@ def log_medication(entry: Dict[str, Any]) -> None:
         entry["timestamp"] = now_iso()
     
     # Ensure consistent schema
-    # Exclude provider/model/actions/policies - these only go to conversation_log
-    excluded_fields = [
-        "timestamp", "agent", "level", "message", "risk",
-        "patient_id", "input", "intent", "drug", "response",
-        "provider", "model", "actions", "policies"
-    ]
     normalized = {
-        "timestamp": entry.get("timestamp", now_iso()),
+        "timestamp": entry["timestamp"],
         "agent": entry.get("agent", "medication"),
         "level": entry.get("level", "info"),
         "message": entry.get("message", entry.get("response", "")),
@@ -372,15 +731,14 @@ def log_medication(entry: Dict[str, Any]) -> None:
             "intent": entry.get("intent"),
             "drug": entry.get("drug"),
             "response": entry.get("response"),
-            **{k: v for k, v in entry.items()
-               if k not in excluded_fields}
+            **_extra_fields(entry, _MED_EXCLUDED)
         }
     }
     log_to_file(MEDICATION_LOG, normalized)
 
 
-def log_caregiver(entry: Dict[str, Any], write_txt: bool = True) -> None:
-    """Log caregiver agent interaction (backward compatible)"""
+def _caregiver_writes(entry: Dict[str, Any], write_txt: bool) -> list:
+    """Normalize one caregiver entry into its (log_path, bytes) writes."""
     # Normalize timestamp key
     if "ts" in entry and "timestamp" not in entry:
         entry["timestamp"] = entry.pop("ts")
@@ -388,14 +746,8 @@ def log_caregiver(entry: Dict[str, Any], write_txt: bool = True) -> None:
         entry["timestamp"] = now_iso()
     
     # Ensure consistent schema
-    # Exclude provider/model/actions/policies - these only go to conversation_log
-    excluded_fields = [
-        "timestamp", "agent", "level", "message", "risk",
-        "patient_id", "caregiver_id", "summary",
-        "provider", "model", "actions", "policies"
-    ]
     normalized = {
-        "timestamp": entry.get("timestamp", now_iso()),
+        "timestamp": entry["timestamp"],
         "agent": entry.get("agent", "caregiver"),
         "level": entry.get("level", "info"),
         "message": entry.get("message", "Caregiver summary generated"),
@@ -404,20 +756,44 @@ def log_caregiver(entry: Dict[str, Any], write_txt: bool = True) -> None:
             "patient_id": entry.get("patient_id"),
             "caregiver_id": entry.get("caregiver_id"),
             "summary": entry.get("summary"),
-            **{k: v for k, v in entry.items()
-               if k not in excluded_fields}
+            **_extra_fields(entry, _CAREGIVER_EXCLUDED)
         }
     }
-    log_to_file(CAREGIVER_LOG, normalized)
+    writes = [(CAREGIVER_LOG, _jsonl_bytes(normalized))]
     
-    # Also write to text file if summary_text exists
+    # Also write to text file if summary_text exists (same write pass as the JSONL entry)
     if write_txt and "summary_text" in entry:
-        with open(CAREGIVER_TXT, "a", encoding="utf-8") as f:
-            f.write(entry["summary_text"] + "\n\n")
+        writes.append((CAREGIVER_TXT, (entry["summary_text"] + "\n\n").encode("utf-8")))
+    return writes
+
+
+def log_caregiver(entry: Dict[str, Any], write_txt: bool = True) -> None:
+    """Log caregiver agent interaction (backward compatible)"""
+    _write(_caregiver_writes(entry, write_txt))
+
+
+def log_caregiver_batch(entries, write_txt: bool = True) -> None:
+    """
+    Log a sweep of caregiver summaries in a single append pass.
+    Each file's records are joined up front so the sweep costs one write() per file
+    and one item on the writer queue, in order with every other log call.
+    """
+    pending: Dict[str, list] = {}
+    for entry in entries:
+        for log_path, data in _caregiver_writes(entry, write_txt):
+            pending.setdefault(log_path, []).append(data)
+    if pending:
+        _write([(log_path, b"".join(chunks)) for log_path, chunks in pending.items()])
 
 
 def log_orchestration(entry: Dict[str, Any]) -> None:
     """Log orchestration/routing interaction (backward compatible)"""
+    agent = entry.get("agent", "orchestration")
+    level = "error" if "error" in entry else entry.get("level", "info")
+    suppressed = _sample_entry(agent, entry.get("intent"), level)
+    if suppressed is None:
+        return
+    
     # Normalize timestamp key
     if "ts" in entry and "timestamp" not in entry:
         entry["timestamp"] = entry.pop("ts")
@@ -425,15 +801,9 @@ def log_orchestration(entry: Dict[str, Any]) -> None:
         entry["timestamp"] = now_iso()
     
     # Ensure consistent schema
-    # Exclude provider/model/actions/policies - these only go to conversation_log
-    excluded_fields = [
-        "timestamp", "agent", "level", "message", "risk",
-        "patient_id", "input", "intent",
-        "provider", "model", "actions", "policies"
-    ]
     normalized = {
-        "timestamp": entry.get("timestamp", now_iso()),
-        "agent": entry.get("agent", "orchestration"),
+        "timestamp": entry["timestamp"],
+        "agent": agent,
         "level": entry.get("level", "info"),
         "message": entry.get("message", entry.get("intent", "")),
         "risk": entry.get("risk"),
@@ -441,8 +811,37 @@ def log_orchestration(entry: Dict[str, Any]) -> None:
             "patient_id": entry.get("patient_id"),
             "input": entry.get("input"),
             "intent": entry.get("intent"),
-            **{k: v for k, v in entry.items()
-               if k not in excluded_fields}
+            **_extra_fields(entry, _ORCH_EXCLUDED)
         }
     }
+    if suppressed:
+        normalized["context"]["suppressed"] = suppressed
     log_to_file(ORCHESTRATION_LOG, normalized)
+
+
+LOG_TAIL_CHUNK = 64 * 1024
+
+
+def read_log_tail(path: str, max_lines: int, chunk_size: int = LOG_TAIL_CHUNK) -> list:
+    """Parse the last max_lines JSONL records of path, reading backwards from the end of the file"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        window = chunk_size
+        while True:
+            start = max(0, size - window)
+            f.seek(start)
+            lines = f.read().splitlines()
+            if start > 0:
+                lines = lines[1:]  # the window began mid-line
+            logs = []
+            for line in lines:
+                if line.strip():
+                    try:
+                        logs.append(loads_json(line))
+                    except Exception:
+                        pass
+            # Widen the window until it holds max_lines records (or the whole file)
+            if start == 0 or len(logs) >= max_lines:
+                return logs[-max_lines:]
+            window *= 4
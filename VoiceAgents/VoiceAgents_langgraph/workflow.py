@@ -1,9 +1,11 @@
 """
 Main LangGraph Workflow - Connects all agent nodes
 """
-from typing import Literal
+import re
+from typing import Dict, Literal, Optional
 from langgraph.graph import StateGraph, END
 from .state import VoiceAgentState
+from .utils import say
 from .nodes.routing import route_node
 from .nodes.appointment import appointment_node
 from .nodes.followup import followup_node
@@ -12,10 +14,21 @@ from .nodes.caregiver import caregiver_node
 from .nodes.help import help_node
 
 
+# Agent nodes reachable from the router; each intent routes to the node of the same name
+_INTENT_CHOICES = frozenset({"appointment", "followup", "medication", "caregiver", "help"})
+_ROUTE_MAP = {intent: intent for intent in _INTENT_CHOICES}
+
+# Replies that only read data, so a repeated question can be answered from the session cache.
+# Medication turns are excluded: each one must write its audit log and re-run risk escalation
+_REPLY_CACHE_INTENTS = frozenset({"help"})
+_REPLY_CACHE_MAX = 128
+_WS_RE = re.compile(r"\s+")
+
+
 def route_after_intent(state: VoiceAgentState) -> str:
-    """Route to appropriate agent based on intent"""
-    intent = state.get("intent", "help")
-    return intent
+    """Route to appropriate agent based on intent (unknown intents fall back to help)"""
+    intent = state.get("intent")
+    return intent if intent in _INTENT_CHOICES else "help"
 
 
 def create_workflow():
@@ -39,13 +52,7 @@ def create_workflow():
     workflow.add_conditional_edges(
         "route",
         route_after_intent,
-        {
-            "appointment": "appointment",
-            "followup": "followup",
-            "medication": "medication",
-            "caregiver": "caregiver",
-            "help": "help"
-        }
+        _ROUTE_MAP
     )
     
     # All agent nodes end
@@ -58,6 +65,42 @@ def create_workflow():
     return workflow.compile()
 
 
-# Create the compiled workflow instance
-voice_agent_workflow = create_workflow()
+def invoke_with_reply_cache(initial_state: VoiceAgentState, reply_cache: Optional[Dict] = None) -> VoiceAgentState:
+    """
+    Run the workflow, answering a repeated read-only turn (same patient, same text)
+    from reply_cache, a dict the caller keeps per session. Without a cache this is
+    just voice_agent_workflow.invoke().
+    """
+    # Module-level __getattr__ isn't consulted for lookups inside the module itself
+    workflow = globals().get("voice_agent_workflow") or __getattr__("voice_agent_workflow")
+    if reply_cache is None:
+        return workflow.invoke(initial_state)
+    
+    key = (initial_state.get("patient_id"),
+           _WS_RE.sub(" ", (initial_state.get("user_input") or "").strip().lower()))
+    cached = reply_cache.get(key)
+    if cached is not None:
+        final_state = dict(cached)
+        if cached.get("log_entry"):
+            final_state["log_entry"] = {**cached["log_entry"], "latency_ms": 0}
+        # The agent node would have spoken the reply itself
+        if initial_state.get("voice_enabled", False) and final_state.get("response"):
+            say(final_state["response"], voice=True)
+        return final_state
+    
+    final_state = workflow.invoke(initial_state)
+    if final_state.get("intent") in _REPLY_CACHE_INTENTS and final_state.get("response"):
+        if len(reply_cache) >= _REPLY_CACHE_MAX:
+            reply_cache.pop(next(iter(reply_cache)))
+        reply_cache[key] = final_state
+    return final_state
+
+
+def __getattr__(name: str):
+    """Compile the workflow instance on first access (PEP 562)"""
+    if name == "voice_agent_workflow":
+        global voice_agent_workflow
+        voice_agent_workflow = create_workflow()
+        return voice_agent_workflow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 